@@ -1,24 +1,57 @@
 import logging
+import multiprocessing
 import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from PyQt5.QtWidgets import QApplication
 
 # Custom Modules
 from gui.main_window import MainWindow
+from midi.midi_event_log import EVENT_LOGGER_NAME, MidiEventFilter, MidiEventFormatter
+
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
 
 def configure_logging(script_directory):
     log_file_path = os.path.join(script_directory, "MyAmpSwitcher.log")
-    logging.basicConfig(
-        filename=log_file_path,
-        level=logging.WARNING,
-        format="%(asctime)s - %(levelname)s - %(message)s",
+    file_handler = RotatingFileHandler(
+        log_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+    )
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    )
+    file_handler.addFilter(MidiEventFilter(events=False))
+
+    event_file_path = os.path.join(script_directory, "MyAmpSwitcher.midi.jsonl")
+    event_handler = RotatingFileHandler(
+        event_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
     )
+    event_handler.setFormatter(MidiEventFormatter())
+    event_handler.addFilter(MidiEventFilter(events=True))
+
+    # Every thread only enqueues records, the listener thread does the disk I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.WARNING)
+    root_logger.addHandler(queue_handler)
+
+    event_logger = logging.getLogger(EVENT_LOGGER_NAME)
+    event_logger.setLevel(logging.INFO)
+    event_logger.propagate = False
+    event_logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler, event_handler)
+    listener.start()
+    return listener
 
 
 def main():
     script_directory = os.path.dirname(os.path.realpath(__file__))
-    configure_logging(script_directory)
+    log_listener = configure_logging(script_directory)
     logging.info("Application started")
 
     app = QApplication([])
@@ -29,10 +62,13 @@ def main():
 
     def cleanup():
         logging.info("Cleaning up resources...")
+        log_listener.stop()
 
     app.aboutToQuit.connect(cleanup)
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
+    # Frozen builds start worker processes through this executable
+    multiprocessing.freeze_support()
     main()
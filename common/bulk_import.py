@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from common.file_utils import atomic_write
+from common.profile_schema import validate_profile
+
+
+def content_hash(profile_data):
+    # Formatting and key order do not make two profiles different
+    canonical = json.dumps(profile_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def validate_source(source):
+    name, data = source
+    try:
+        profile_data = json.loads(data)
+    except ValueError as e:
+        return name, data, None, [f"invalid json: {e}"]
+    errors = validate_profile(profile_data)
+    if errors:
+        return name, data, None, errors
+    return name, data, content_hash(profile_data), []
+
+
+def read_sources(path):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".json"):
+                    continue
+                yield os.path.basename(info.filename), archive.read(info)
+        return
+    for root, _, files in os.walk(path):
+        for filename in sorted(files):
+            if filename.lower().endswith(".json"):
+                with open(os.path.join(root, filename), "rb") as profile_file:
+                    yield filename, profile_file.read()
+
+
+def existing_hashes(profiles_directory):
+    hashes = {}
+    for filename in os.listdir(profiles_directory):
+        if not filename.lower().endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(profiles_directory, filename), "rb") as f:
+                hashes[content_hash(json.loads(f.read()))] = filename
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable profile {filename}: {e}")
+    return hashes
+
+
+def unique_filename(profiles_directory, filename):
+    base, extension = os.path.splitext(filename)
+    candidate = filename
+    counter = 2
+    while os.path.exists(os.path.join(profiles_directory, candidate)):
+        candidate = f"{base}-{counter}{extension}"
+        counter += 1
+    return candidate
+
+
+class BulkImportReport:
+    def __init__(self):
+        self.imported = []
+        self.duplicates = []
+        self.invalid = []
+
+    def format(self):
+        lines = [
+            f"Imported: {len(self.imported)}",
+            f"Duplicates skipped: {len(self.duplicates)}",
+            f"Invalid: {len(self.invalid)}",
+        ]
+        for name, errors in self.invalid:
+            lines.append(f"  {name}: {'; '.join(errors)}")
+        return "\n".join(lines)
+
+
+def bulk_import(path, profiles_directory, workers=None, chunksize=16):
+    report = BulkImportReport()
+    sources = list(read_sources(path))
+    if workers == 0 or len(sources) <= chunksize:
+        results = map(validate_source, sources)
+        report_results(results, profiles_directory, report)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(validate_source, sources, chunksize=chunksize)
+            report_results(results, profiles_directory, report)
+    return report
+
+
+def report_results(results, profiles_directory, report):
+    known = existing_hashes(profiles_directory)
+    for name, data, digest, errors in results:
+        if errors:
+            report.invalid.append((name, errors))
+        elif digest in known:
+            report.duplicates.append((name, known[digest]))
+        else:
+            filename = unique_filename(profiles_directory, name)
+            atomic_write(os.path.join(profiles_directory, filename), data)
+            known[digest] = filename
+            report.imported.append(filename)
+            logging.info(f"Imported profile: {filename}")
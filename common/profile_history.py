@@ -0,0 +1,169 @@
+import json
+import sys
+import time
+
+from common.file_utils import atomic_write
+
+HISTORY_VERSION = 1
+
+
+def encode(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+class Revision:
+    __slots__ = ("label", "saved", "fields", "buttons")
+
+    def __init__(self, label, saved, fields, buttons):
+        self.label = label
+        self.saved = saved
+        self.fields = fields
+        self.buttons = buttons
+
+    def same_state(self, other):
+        return self.fields == other.fields and self.buttons == other.buttons
+
+
+class ProfileHistory:
+    # Revisions are stored as encoded, immutable strings. A button that did not
+    # change between revisions is the same string object in both of them.
+    def __init__(self, max_revisions=200):
+        self.max_revisions = max_revisions
+        self.revisions = []
+        self.position = -1
+        self.pool = {}
+        self.dropped = 0
+
+    def intern(self, text):
+        return self.pool.setdefault(text, text)
+
+    def freeze(self, profile_data, label):
+        fields = {key: value for key, value in profile_data.items() if key != "buttons"}
+        buttons = None
+        if "buttons" in profile_data:
+            buttons = tuple(
+                self.intern(encode(button)) for button in profile_data["buttons"]
+            )
+        return Revision(label, time.time(), self.intern(encode(fields)), buttons)
+
+    def thaw(self, revision):
+        profile_data = json.loads(revision.fields)
+        if revision.buttons is not None:
+            profile_data["buttons"] = [
+                json.loads(button) for button in revision.buttons
+            ]
+        return profile_data
+
+    def record(self, profile_data, label=""):
+        revision = self.freeze(profile_data, label)
+        if self.position >= 0 and revision.same_state(self.revisions[self.position]):
+            return False
+        redo_start = self.position + 1
+        dropped = len(self.revisions) - redo_start
+        del self.revisions[redo_start:]
+        self.revisions.append(revision)
+        overflow = max(0, len(self.revisions) - self.max_revisions)
+        del self.revisions[:overflow]
+        self.position = len(self.revisions) - 1
+        # Strings only used by dropped revisions are released in batches
+        self.dropped += dropped + overflow
+        if self.dropped >= max(1, self.max_revisions // 10):
+            self.prune()
+        return True
+
+    def prune(self):
+        live = {}
+        for revision in self.revisions:
+            live[revision.fields] = revision.fields
+            for button in revision.buttons or ():
+                live[button] = button
+        self.pool = live
+        self.dropped = 0
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.revisions) - 1
+
+    def undo(self):
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.current()
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        self.position += 1
+        return self.current()
+
+    def current(self):
+        if self.position < 0:
+            return None
+        return self.thaw(self.revisions[self.position])
+
+    def current_label(self):
+        return self.revisions[self.position].label if self.position >= 0 else None
+
+    def stats(self):
+        strings = sum(sys.getsizeof(text) for text in self.pool)
+        references = sum(
+            sys.getsizeof(revision.buttons or ()) for revision in self.revisions
+        )
+        return {
+            "revisions": len(self.revisions),
+            "position": self.position,
+            "unique_strings": len(self.pool),
+            "approx_bytes": strings + references,
+        }
+
+    def save(self, path):
+        strings = list(self.pool)
+        index = {text: number for number, text in enumerate(strings)}
+        revisions = [
+            {
+                "label": revision.label,
+                "saved": revision.saved,
+                "fields": index[revision.fields],
+                "buttons": (
+                    None
+                    if revision.buttons is None
+                    else [index[button] for button in revision.buttons]
+                ),
+            }
+            for revision in self.revisions
+        ]
+        history = {
+            "version": HISTORY_VERSION,
+            "position": self.position,
+            "strings": strings,
+            "revisions": revisions,
+        }
+        atomic_write(path, json.dumps(history))
+
+    @classmethod
+    def load(cls, path, max_revisions=200):
+        with open(path) as history_file:
+            history_data = json.load(history_file)
+        if history_data.get("version") != HISTORY_VERSION:
+            raise ValueError(f"Unsupported history version in {path}")
+        history = cls(max_revisions)
+        strings = [history.intern(text) for text in history_data["strings"]]
+        for revision in history_data["revisions"]:
+            buttons = revision["buttons"]
+            history.revisions.append(
+                Revision(
+                    revision["label"],
+                    revision["saved"],
+                    strings[revision["fields"]],
+                    None if buttons is None else tuple(strings[i] for i in buttons),
+                )
+            )
+        history.position = history_data["position"]
+        if len(history.revisions) > max_revisions:
+            dropped = len(history.revisions) - max_revisions
+            del history.revisions[:dropped]
+            history.position = max(0, history.position - dropped)
+        history.prune()
+        return history
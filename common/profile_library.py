@@ -0,0 +1,228 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from common.file_utils import atomic_write
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    device TEXT,
+    revision INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name);
+CREATE INDEX IF NOT EXISTS profiles_device ON profiles (device);
+CREATE TABLE IF NOT EXISTS profile_tags (
+    tag TEXT NOT NULL,
+    profile_id INTEGER NOT NULL REFERENCES profiles (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, profile_id)
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    profile_id INTEGER NOT NULL REFERENCES profiles (id) ON DELETE CASCADE,
+    revision INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    saved REAL NOT NULL,
+    PRIMARY KEY (profile_id, revision)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+class ProfileLibrary:
+    def __init__(self, path, max_revisions=50):
+        self.path = path
+        self.max_revisions = max_revisions
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=FULL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __contains__(self, filename):
+        row = self.connection.execute(
+            "SELECT 1 FROM profiles WHERE filename = ?", (filename,)
+        ).fetchone()
+        return row is not None
+
+    def load(self, filename):
+        row = self.connection.execute(
+            "SELECT data FROM profiles WHERE filename = ?", (filename,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, filename, profile_data):
+        data = json.dumps(profile_data, indent=4)
+        name = profile_data.get("name", os.path.splitext(filename)[0])
+        device = profile_data.get("device")
+        tags = profile_data.get("tags", [])
+        now = time.time()
+        # The profile, its tags and its revision are committed together
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT id, revision FROM profiles WHERE filename = ?", (filename,)
+            ).fetchone()
+            if row is None:
+                revision = 1
+                profile_id = self.connection.execute(
+                    "INSERT INTO profiles (filename, name, device, revision, data, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (filename, name, device, revision, data, now),
+                ).lastrowid
+            else:
+                profile_id, revision = row[0], row[1] + 1
+                self.connection.execute(
+                    "UPDATE profiles SET name = ?, device = ?, revision = ?, data = ?,"
+                    " updated = ? WHERE id = ?",
+                    (name, device, revision, data, now, profile_id),
+                )
+                self.connection.execute(
+                    "DELETE FROM profile_tags WHERE profile_id = ?", (profile_id,)
+                )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO profile_tags (tag, profile_id) VALUES (?, ?)",
+                [(tag, profile_id) for tag in tags],
+            )
+            self.connection.execute(
+                "INSERT INTO revisions (profile_id, revision, data, saved)"
+                " VALUES (?, ?, ?, ?)",
+                (profile_id, revision, data, now),
+            )
+            if self.max_revisions:
+                self.connection.execute(
+                    "DELETE FROM revisions WHERE profile_id = ? AND revision <= ?",
+                    (profile_id, revision - self.max_revisions),
+                )
+        return revision
+
+    def delete(self, filename):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM profiles WHERE filename = ?", (filename,)
+            )
+
+    def list_profiles(self):
+        return self.connection.execute(
+            "SELECT filename, name, device FROM profiles ORDER BY name"
+        ).fetchall()
+
+    def find_by_name(self, name):
+        return self._filenames("SELECT filename FROM profiles WHERE name = ?", name)
+
+    def find_by_device(self, device):
+        return self._filenames("SELECT filename FROM profiles WHERE device = ?", device)
+
+    def find_by_tag(self, tag):
+        return self._filenames(
+            "SELECT profiles.filename FROM profile_tags"
+            " JOIN profiles ON profiles.id = profile_tags.profile_id"
+            " WHERE profile_tags.tag = ?",
+            tag,
+        )
+
+    def _filenames(self, query, value):
+        return [row[0] for row in self.connection.execute(query, (value,))]
+
+    def revisions(self, filename):
+        return self.connection.execute(
+            "SELECT revisions.revision, revisions.saved FROM revisions"
+            " JOIN profiles ON profiles.id = revisions.profile_id"
+            " WHERE profiles.filename = ? ORDER BY revisions.revision",
+            (filename,),
+        ).fetchall()
+
+    def load_revision(self, filename, revision):
+        row = self.connection.execute(
+            "SELECT revisions.data FROM revisions"
+            " JOIN profiles ON profiles.id = revisions.profile_id"
+            " WHERE profiles.filename = ? AND revisions.revision = ?",
+            (filename, revision),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def source_mtime(self, filename):
+        row = self.connection.execute(
+            "SELECT mtime_ns FROM sources WHERE filename = ?", (filename,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def import_file(self, path, filename=None, changed_only=True):
+        # JSON files edited or added on disk since they were last imported win
+        # over the library copy, unchanged files are not even read
+        filename = filename or os.path.basename(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        if changed_only and self.source_mtime(filename) == mtime_ns:
+            return False
+        with open(path) as profile_file:
+            profile_data = json.load(profile_file)
+        imported = self.load(filename) != profile_data
+        if imported:
+            self.save(filename, profile_data)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources (filename, mtime_ns) VALUES (?, ?)",
+                (filename, mtime_ns),
+            )
+        return imported
+
+    def import_directory(self, profiles_directory, changed_only=False):
+        imported = 0
+        for filename in sorted(os.listdir(profiles_directory)):
+            if not filename.lower().endswith(".json"):
+                continue
+            path = os.path.join(profiles_directory, filename)
+            try:
+                if self.import_file(path, filename, changed_only):
+                    imported += 1
+            except (OSError, ValueError) as e:
+                logging.error(f"Skipping profile {filename}: {e}")
+        return imported
+
+    def export_profile(self, filename, path):
+        profile_data = self.load(filename)
+        if profile_data is None:
+            raise KeyError(filename)
+        atomic_write(path, json.dumps(profile_data, indent=4))
+
+    def export_directory(self, profiles_directory):
+        os.makedirs(profiles_directory, exist_ok=True)
+        filenames = [row[0] for row in self.list_profiles()]
+        for filename in filenames:
+            self.export_profile(filename, os.path.join(profiles_directory, filename))
+        return len(filenames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the SQLite profile library")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("library", help="path of the library file")
+    parser.add_argument("directory", help="folder of JSON profiles")
+    args = parser.parse_args(argv)
+
+    library = ProfileLibrary(args.library)
+    try:
+        if args.command == "import":
+            count = library.import_directory(args.directory)
+            print(f"Imported {count} profiles into {args.library}")
+        else:
+            count = library.export_directory(args.directory)
+            print(f"Exported {count} profiles to {args.directory}")
+    finally:
+        library.close()
+
+
+if __name__ == "__main__":
+    main()
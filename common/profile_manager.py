@@ -1,7 +1,9 @@
 import os
 import logging
 import json
-from PyQt5.QtWidgets import QMessageBox, QFileDialog
+from PyQt5.QtWidgets import QMessageBox, QFileDialog, QInputDialog
+from common.file_utils import atomic_write
+from common.profile_library import ProfileLibrary
 
 
 def is_json_file(filename):
@@ -25,6 +27,20 @@ class ProfileManager:
         self.profile_data = profile_data
         self.version = version
         self.settings = self.load_settings()
+        self.library = self.open_library()
+
+    def open_library(self):
+        library_name = self.settings.get("profile_library")
+        if not library_name:
+            return None
+        try:
+            return ProfileLibrary(
+                os.path.join(self.script_directory, library_name),
+                self.settings.get("library_revisions", 50),
+            )
+        except Exception as e:
+            logging.error(f"Error opening profile library {library_name}: {e}")
+            return None
 
     def reload_window(self, window):
         self.window = window
@@ -38,6 +54,15 @@ class ProfileManager:
 
     def load_profile_data(self, profile_name):
         json_file_path = os.path.join(self.script_directory, "profiles", profile_name)
+        if self.library is not None:
+            if os.path.isfile(json_file_path):
+                try:
+                    self.library.import_file(json_file_path, profile_name)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Error importing profile {profile_name}: {e}")
+            profile_data = self.library.load(profile_name)
+            if profile_data is not None:
+                return profile_data
         if not os.path.isfile(json_file_path):
             logging.warning(
                 f"Profile file not found: {profile_name}. Creating a new one."
@@ -53,10 +78,38 @@ class ProfileManager:
             return {"name": "New Profile", "channel": 0, "buttons": []}
         try:
             with open(json_file_path) as json_file:
-                return json.load(json_file)
+                profile_data = json.load(json_file)
         except Exception as e:
             logging.error(f"Error loading profile data: {e}")
             raise ProfileNotValid("Error loading profile data") from e
+        if self.library is not None:
+            self.library.save(profile_name, profile_data)
+        return profile_data
+
+    def save_profile_data(self, profile_name, profile_data):
+        if self.library is not None:
+            self.library.save(profile_name, profile_data)
+        else:
+            atomic_write(
+                os.path.join(self.script_directory, "profiles", profile_name),
+                json.dumps(profile_data, indent=4),
+            )
+        logging.info(f"Saved {profile_name}")
+
+    def select_library_profile(self):
+        # Profiles added to the profiles folder, e.g. by a bulk import, are
+        # listed too
+        profiles_directory = os.path.join(self.script_directory, "profiles")
+        if os.path.isdir(profiles_directory):
+            self.library.import_directory(profiles_directory, changed_only=True)
+        profiles = self.library.list_profiles()
+        labels = [f"{name} ({filename})" for filename, name, _ in profiles]
+        label, accepted = QInputDialog.getItem(
+            None, "Select Profile", "Profile:", labels, 0, False
+        )
+        if not accepted or not labels:
+            return None
+        return profiles[labels.index(label)][0]
 
     def load_settings(self, settings_filename="settings.json"):
         settings_file_path = os.path.join(self.script_directory, settings_filename)
@@ -102,6 +155,11 @@ class ProfileManager:
 
     def change_profile(self, selected_file=None):
         # Importing the profile
+        if selected_file is None and self.library is not None:
+            selected_file = self.select_library_profile()
+            if selected_file is None:
+                self.window.update_status_bar("No profile selected")
+                return
         if selected_file is None:
             options = QFileDialog.Options()
             options |= QFileDialog.DontUseNativeDialog
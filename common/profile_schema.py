@@ -0,0 +1,234 @@
+import json
+import re
+
+MIDI_VALUE_FIELDS = ("program_change", "cc_number", "cc_value")
+CONTROL_VALUE_FIELDS = ("cc_number", "min", "max", "value")
+CONTROL_STYLES = ("slider", "knob")
+
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_button(button, index):
+    errors = []
+    prefix = f"buttons[{index}]"
+    if not isinstance(button, dict):
+        return [f"{prefix} must be an object"]
+    if not isinstance(button.get("name", ""), str):
+        errors.append(f"{prefix}.name must be a string")
+    for field in MIDI_VALUE_FIELDS:
+        value = button.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool):
+            errors.append(f"{prefix}.{field} must be an integer")
+        elif not 0 <= value <= 127:
+            errors.append(f"{prefix}.{field} must be between 0 and 127")
+    patch = button.get("patch")
+    if patch is not None and (not isinstance(patch, str) or not patch):
+        errors.append(f"{prefix}.patch must be a patch name or hash")
+    if ("cc_number" in button) != ("cc_value" in button):
+        errors.append(f"{prefix} needs both cc_number and cc_value")
+    errors.extend(validate_tempo(button, prefix + "."))
+    return errors
+
+
+def validate_tempo(data, prefix=""):
+    tempo = data.get("tempo")
+    if tempo is None:
+        return []
+    if not isinstance(tempo, (int, float)) or isinstance(tempo, bool):
+        return [f"{prefix}tempo must be a number"]
+    if not 20 <= tempo <= 300:
+        return [f"{prefix}tempo must be between 20 and 300"]
+    return []
+
+
+def validate_control(control, index):
+    prefix = f"controls[{index}]"
+    if not isinstance(control, dict):
+        return [f"{prefix} must be an object"]
+    errors = []
+    if not isinstance(control.get("name", ""), str):
+        errors.append(f"{prefix}.name must be a string")
+    if "cc_number" not in control:
+        errors.append(f"{prefix} needs a cc_number")
+    for field in CONTROL_VALUE_FIELDS:
+        value = control.get(field)
+        if value is None:
+            continue
+        if not is_integer(value):
+            errors.append(f"{prefix}.{field} must be an integer")
+        elif not 0 <= value <= 127:
+            errors.append(f"{prefix}.{field} must be between 0 and 127")
+    if control.get("style", "slider") not in CONTROL_STYLES:
+        errors.append(f"{prefix}.style must be one of {', '.join(CONTROL_STYLES)}")
+    smoothing = control.get("smoothing_ms", 0)
+    if not isinstance(smoothing, (int, float)) or isinstance(smoothing, bool):
+        errors.append(f"{prefix}.smoothing_ms must be a number")
+    elif smoothing < 0:
+        errors.append(f"{prefix}.smoothing_ms must not be negative")
+    if not errors and control.get("min", 0) > control.get("max", 127):
+        errors.append(f"{prefix}.min must not be greater than max")
+    return errors
+
+
+def validate_profile(profile_data):
+    if not isinstance(profile_data, dict):
+        return ["profile must be an object"]
+    errors = []
+    if not isinstance(profile_data.get("name"), str):
+        errors.append("name must be a string")
+    channel = profile_data.get("channel", 0)
+    if not isinstance(channel, int) or isinstance(channel, bool):
+        errors.append("channel must be an integer")
+    elif not 0 <= channel <= 15:
+        errors.append("channel must be between 0 and 15")
+    errors.extend(validate_tempo(profile_data))
+    buttons = profile_data.get("buttons", [])
+    if not isinstance(buttons, list):
+        errors.append("buttons must be a list")
+        return errors
+    for index, button in enumerate(buttons):
+        errors.extend(validate_button(button, index))
+    controls = profile_data.get("controls", [])
+    if not isinstance(controls, list):
+        errors.append("controls must be a list")
+        return errors
+    for index, control in enumerate(controls):
+        errors.extend(validate_control(control, index))
+    return errors
+
+
+SETTINGS_STRINGS = (
+    "port_name",
+    "profile",
+    "icon",
+    "font",
+    "librarian_input",
+    "sysex_dump_request",
+    "loopback_input",
+)
+SETTINGS_POSITIVE_INTEGERS = (
+    "size",
+    "buttons_per_row",
+    "width",
+    "height",
+    "sysex_chunk_size",
+    "input_queue_size",
+    "library_revisions",
+)
+SETTINGS_INTEGERS = ("x", "y")
+SETTINGS_FLAGS = (
+    "auto_reconnect",
+    "feedback_all_profiles",
+    "isolated_output",
+    "isolated_output_priority",
+    "journal",
+    "midi_thru",
+    "output_scheduling",
+    "profile_session",
+    "stall_watchdog",
+    "suppress_redundant_sends",
+)
+SETTINGS_POSITIVE_NUMBERS = (
+    "cc_max_rate",
+    "clock_bpm",
+    "status_updates_per_second",
+    "stall_threshold_ms",
+    "sysex_dump_gap_ms",
+    "sysex_chunk_pause_ms",
+)
+
+
+def validate_settings(settings):
+    if not isinstance(settings, dict):
+        return ["settings must be an object"]
+    errors = []
+    for field in SETTINGS_STRINGS:
+        if field in settings and not isinstance(settings[field], str):
+            errors.append(f"{field} must be a string")
+    for field in SETTINGS_INTEGERS:
+        if field in settings and not is_integer(settings[field]):
+            errors.append(f"{field} must be an integer")
+    for field in SETTINGS_POSITIVE_INTEGERS:
+        if field not in settings:
+            continue
+        if not is_integer(settings[field]):
+            errors.append(f"{field} must be an integer")
+        elif settings[field] < 1:
+            errors.append(f"{field} must be at least 1")
+    input_port_names = settings.get("input_port_names", [])
+    if not isinstance(input_port_names, list) or not all(
+        isinstance(name, str) for name in input_port_names
+    ):
+        errors.append("input_port_names must be a list of port names")
+    for field in SETTINGS_FLAGS:
+        if field in settings and not isinstance(settings[field], bool):
+            errors.append(f"{field} must be true or false")
+    for field in SETTINGS_POSITIVE_NUMBERS:
+        value = settings.get(field, 1)
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            errors.append(f"{field} must be a number")
+        elif value <= 0:
+            errors.append(f"{field} must be greater than 0")
+    return errors
+
+
+def error_path(error):
+    # "buttons[3].cc_value must be ..." -> ["buttons", 3, "cc_value"]
+    location = error.split(" ", 1)[0]
+    path = []
+    for part in re.findall(r"\w+|\[\d+\]", location):
+        path.append(int(part[1:-1]) if part.startswith("[") else part)
+    return path
+
+
+def skip_whitespace(text, index):
+    while index < len(text) and text[index] in " \t\r\n":
+        index += 1
+    return index
+
+
+def locate(text, path):
+    # Offset in the JSON text of the value at path, or of the closest parent found
+    decoder = json.JSONDecoder()
+    index = skip_whitespace(text, 0)
+    for key in path:
+        if index >= len(text) or text[index] not in "{[":
+            return index
+        is_object = text[index] == "{"
+        position = 0
+        index = skip_whitespace(text, index + 1)
+        while index < len(text) and text[index] not in "}]":
+            found = None
+            if is_object:
+                name, index = json.decoder.scanstring(text, index + 1)
+                index = skip_whitespace(text, index)
+                index = skip_whitespace(text, index + 1)
+                found = name == key
+            else:
+                found = position == key
+                position += 1
+            if found:
+                break
+            index = decoder.raw_decode(text, index)[1]
+            index = skip_whitespace(text, index)
+            if index < len(text) and text[index] == ",":
+                index = skip_whitespace(text, index + 1)
+        else:
+            return index
+    return index
+
+
+def check_document(text, validate):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        return None, [(e.lineno, f"Invalid JSON: {e.msg}")]
+    errors = []
+    for error in validate(data):
+        offset = locate(text, error_path(error))
+        errors.append((text.count("\n", 0, offset) + 1, error))
+    return data, errors
@@ -0,0 +1,126 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QApplication, QGridLayout, QPushButton, QWidget
+
+from gui.button_style import ButtonStyle
+
+COLORS = ["#e57373", "#81c784", "#64b5f6", "#ffd54f", "#ba68c8", "#4db6ac"]
+
+
+def synthetic_buttons(count):
+    return [
+        {"name": f"Preset {number}", "color": COLORS[number % len(COLORS)]}
+        for number in range(count)
+    ]
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def per_widget_button(button_info, settings, button_style):
+    button = QPushButton(button_info["name"])
+    button.setMinimumHeight(40)
+    color = button_info.get("color")
+    if color is not None:
+        button.setStyleSheet(
+            f"QPushButton:pressed{{background: #000;}}"
+            f"QPushButton{{background: {color}; border-radius: 10px; border: 1px solid #8f8f91; padding: 1px;}}"
+        )
+    button.setFont(QFont(settings["font"], settings["size"]))
+    return button
+
+
+def shared_style_button(button_info, settings, button_style):
+    button = QPushButton(button_info["name"])
+    button.setMinimumHeight(40)
+    button_style.style_button(button, button_info.get("color"))
+    button.setFont(button_style.font(settings["font"], settings["size"]))
+    return button
+
+
+def rebuild(container, buttons, settings, make_button, button_style):
+    layout = container.layout()
+    for button in container.findChildren(QPushButton):
+        layout.removeWidget(button)
+        button.deleteLater()
+    if button_style is not None:
+        button_style.prepare(button.get("color") for button in buttons)
+    for index, button_info in enumerate(buttons):
+        row, column = divmod(index, settings["buttons_per_row"])
+        layout.addWidget(make_button(button_info, settings, button_style), row, column)
+    # Styles are resolved when the widgets are polished for display
+    for button in container.findChildren(QPushButton):
+        button.ensurePolished()
+    QApplication.processEvents()
+
+
+def run(make_button, buttons, settings, rebuilds, application):
+    container = QWidget()
+    button_style = (
+        ButtonStyle(container) if make_button is shared_style_button else None
+    )
+    container.setLayout(QGridLayout())
+
+    gc.collect()
+    rss_before = resident_bytes()
+    tracemalloc.start()
+    timings = []
+    for _ in range(rebuilds):
+        started = time.perf_counter()
+        rebuild(container, buttons, settings, make_button, button_style)
+        timings.append(time.perf_counter() - started)
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_after = resident_bytes()
+
+    container.deleteLater()
+    application.processEvents()
+    return {
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "best_ms": min(timings) * 1000,
+        "python_peak_kb": python_peak / 1024,
+        "rss_growth_kb": (
+            None if rss_before is None else (rss_after - rss_before) / 1024
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare button rebuilds with per-widget and shared stylesheets"
+    )
+    parser.add_argument("--buttons", type=int, default=500)
+    parser.add_argument("--rebuilds", type=int, default=5)
+    parser.add_argument("--font", default="Arial")
+    parser.add_argument("--size", type=int, default=14)
+    args = parser.parse_args(argv)
+
+    application = QApplication.instance() or QApplication(sys.argv[:1])
+    settings = {"font": args.font, "size": args.size, "buttons_per_row": 10}
+    buttons = synthetic_buttons(args.buttons)
+
+    for label, make_button in [
+        ("per-widget stylesheet", per_widget_button),
+        ("shared stylesheet", shared_style_button),
+    ]:
+        result = run(make_button, buttons, settings, args.rebuilds, application)
+        rss = result["rss_growth_kb"]
+        print(
+            f"{label:22} mean {result['mean_ms']:8.1f} ms  best {result['best_ms']:8.1f} ms"
+            f"  python peak {result['python_peak_kb']:8.1f} KiB"
+            + ("" if rss is None else f"  RSS growth {rss:8.1f} KiB")
+        )
+
+
+if __name__ == "__main__":
+    main()
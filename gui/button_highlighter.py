@@ -0,0 +1,94 @@
+import threading
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from midi.button_index import group_key
+
+ACTIVE_PROPERTY = "active"
+
+
+class ButtonHighlighter(QObject):
+    flush_requested = pyqtSignal()
+
+    def __init__(self, button_index, on_other_profile=None, max_rate=20, parent=None):
+        super(ButtonHighlighter, self).__init__(parent)
+        self.button_index = button_index
+        self.on_other_profile = on_other_profile
+        self.interval = 1.0 / max_rate
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.scheduled = False
+        self.last_flush = 0.0
+        self.profile_name = None
+        self.widgets = []
+        self.active = {}
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_requested.connect(self.schedule_flush)
+
+    def set_buttons(self, profile_name, widgets):
+        # Pending matches hold positions in the previous button list
+        with self.lock:
+            self.pending = {}
+        self.profile_name = profile_name
+        self.widgets = widgets
+        self.active = {}
+
+    def post(self, message):
+        # Called from the MIDI input thread; only the latest match per group is kept
+        key, matches = self.button_index.lookup(message)
+        if key is None:
+            return
+        with self.lock:
+            self.pending[group_key(key)] = matches
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.flush_requested.emit()
+
+    def schedule_flush(self):
+        delay = self.last_flush + self.interval - time.monotonic()
+        self.flush_timer.start(max(0, int(delay * 1000)))
+
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.scheduled = False
+        highlighted = set(self.active.values())
+
+        for group, matches in pending.items():
+            if group[0] == "program_change":
+                # A new program recalls its own controller values
+                for active_group in list(self.active):
+                    if (
+                        active_group[0] == "control_change"
+                        and active_group[1] == group[1]
+                    ):
+                        del self.active[active_group]
+            self.active.pop(group, None)
+            # A match looked up just before a reload can still point past the end
+            positions = [
+                position
+                for profile, position in matches
+                if profile == self.profile_name and position < len(self.widgets)
+            ]
+            if positions:
+                self.active[group] = self.widgets[positions[0]]
+            elif matches and self.on_other_profile is not None:
+                self.on_other_profile(matches)
+
+        now_highlighted = set(self.active.values())
+        for widget in highlighted - now_highlighted:
+            self.set_highlight(widget, False)
+        for widget in now_highlighted - highlighted:
+            self.set_highlight(widget, True)
+        self.last_flush = time.monotonic()
+
+    def set_highlight(self, widget, active):
+        widget.setProperty(ACTIVE_PROPERTY, active)
+        # Dynamic property selectors are only re-evaluated on a repolish
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
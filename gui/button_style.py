@@ -0,0 +1,65 @@
+import logging
+from PyQt5.QtGui import QColor, QFont
+
+COLOR_PROPERTY = "colorClass"
+
+COLOR_RULE = (
+    'QPushButton[colorClass="{name}"]'
+    "{{background: {color}; border-radius: 10px; border: 1px solid #8f8f91; padding: 1px;}}"
+    'QPushButton[colorClass="{name}"]:pressed{{background: #000;}}'
+)
+
+# Last, so it wins over the color rules it shares its specificity with
+ACTIVE_RULE = 'QPushButton[active="true"]{border: 3px solid #2196f3;}'
+
+
+class ButtonStyle:
+    # The buttons' container holds one stylesheet with a rule per button color;
+    # buttons only carry a dynamic property naming their color class. Scoping
+    # the sheet keeps the rest of the application on its native style.
+    def __init__(self, container):
+        self.container = container
+        self.base_stylesheet = container.styleSheet()
+        self.color_classes = {}
+        self.fonts = {}
+        self.apply()
+
+    def prepare(self, colors):
+        new_colors = [
+            color
+            for color in dict.fromkeys(colors)
+            if color is not None and color not in self.color_classes
+        ]
+        if not new_colors:
+            return
+        for color in new_colors:
+            # Only valid colors reach the sheet, in Qt's own #rrggbb spelling,
+            # so a bad profile color cannot break the rules after it
+            if QColor(color).isValid():
+                self.color_classes[color] = f"c{len(self.color_classes)}"
+            else:
+                logging.warning(f"Ignoring invalid button color {color!r}")
+                self.color_classes[color] = None
+        self.apply()
+
+    def apply(self):
+        rules = [
+            COLOR_RULE.format(name=name, color=QColor(color).name())
+            for color, name in self.color_classes.items()
+            if name is not None
+        ]
+        rules.append(ACTIVE_RULE)
+        self.container.setStyleSheet(self.base_stylesheet + "".join(rules))
+
+    def style_button(self, button, color):
+        if color is None:
+            return
+        self.prepare([color])
+        if self.color_classes[color] is not None:
+            button.setProperty(COLOR_PROPERTY, self.color_classes[color])
+
+    def font(self, family, size):
+        key = (family, size)
+        if key not in self.fonts:
+            self.fonts[key] = QFont(family, size)
+        return self.fonts[key]
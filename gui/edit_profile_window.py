@@ -1,7 +1,16 @@
 import json
 import os
-import logging
-from PyQt5.QtWidgets import QDialog, QTextEdit, QPushButton, QVBoxLayout, QMessageBox
+from PyQt5.QtWidgets import (
+    QDialog,
+    QLabel,
+    QTextEdit,
+    QPushButton,
+    QVBoxLayout,
+    QMessageBox,
+)
+
+from common.profile_schema import validate_profile
+from gui.live_validator import LiveValidator
 
 
 class EditProfileWindow(QDialog):
@@ -21,37 +30,47 @@ class EditProfileWindow(QDialog):
         self.json_text = QTextEdit(self)
         self.json_text.setPlainText(json.dumps(profile_data, indent=4))
 
+        self.error_label = QLabel(self)
+        self.error_label.setStyleSheet("color: #b00020;")
+        self.error_label.hide()
+
         save_button = QPushButton("Save", self)
         save_button.clicked.connect(self.save_and_close)
 
+        self.validator = LiveValidator(
+            self.json_text, validate_profile, self.error_label, parent=self
+        )
+        self.validator.state_changed.connect(save_button.setEnabled)
+
         layout = QVBoxLayout()
         layout.addWidget(self.json_text)
+        layout.addWidget(self.error_label)
         layout.addWidget(save_button)
 
         self.setLayout(layout)
 
     def save_and_close(self):
-        try:
-            new_profile_data = json.loads(self.json_text.toPlainText())
-            self.update_profile_data(new_profile_data)
-            self.save_profile_data()
-            self.reload_main_window()
-
-        except json.JSONDecodeError as e:
-            QMessageBox.warning(self, "Invalid JSON", f"Error in JSON format: {e}")
+        new_profile_data, errors = self.validator.current()
+        if errors:
+            QMessageBox.warning(self, "Invalid Profile", "\n".join(errors))
+            return
+        self.update_profile_data(new_profile_data)
+        self.save_profile_data()
+        self.reload_main_window()
+
+    def done(self, result):
+        self.validator.stop()
+        super(EditProfileWindow, self).done(result)
 
     def update_profile_data(self, new_profile_data):
-        self.profile_data.update(new_profile_data)
+        # A new dict: the profile the main window and its history hold stays as it was
+        self.profile_data = new_profile_data
 
     def save_profile_data(self):
-        profile_path = os.path.join(
-            self.script_directory, "profiles", self.settings["profile"]
-        )
-
         try:
-            with open(profile_path, "w") as profile_file:
-                json.dump(self.profile_data, profile_file, indent=4)
-            logging.info(f"Saved {self.settings['profile']}")
+            self.main_window.profile_manager.save_profile_data(
+                self.settings["profile"], self.profile_data
+            )
 
         except Exception as e:
             QMessageBox.warning(self, "Save Error", f"Error saving profile: {e}")
@@ -1,7 +1,17 @@
 import json
 import logging
 import os
-from PyQt5.QtWidgets import QDialog, QMessageBox, QPushButton, QTextEdit, QVBoxLayout
+from PyQt5.QtWidgets import (
+    QDialog,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QTextEdit,
+    QVBoxLayout,
+)
+
+from common.profile_schema import validate_settings
+from gui.live_validator import LiveValidator
 
 
 class EditSettingsWindow(QDialog):
@@ -21,34 +31,46 @@ class EditSettingsWindow(QDialog):
         self.json_text = QTextEdit(self)
         self.json_text.setPlainText(json.dumps(self.settings_data, indent=4))
 
+        self.error_label = QLabel(self)
+        self.error_label.setStyleSheet("color: #b00020;")
+        self.error_label.hide()
+
         save_button = QPushButton("Save", self)
         save_button.clicked.connect(self.save_and_close)
 
+        self.validator = LiveValidator(
+            self.json_text, validate_settings, self.error_label, parent=self
+        )
+        self.validator.state_changed.connect(save_button.setEnabled)
+
         layout = QVBoxLayout()
         layout.addWidget(self.json_text)
+        layout.addWidget(self.error_label)
         layout.addWidget(save_button)
 
         self.setLayout(layout)
 
     def save_and_close(self):
-        try:
-            new_settings_data = json.loads(self.json_text.toPlainText())
-            self.settings_data.update(new_settings_data)
+        new_settings_data, errors = self.validator.current()
+        if errors:
+            QMessageBox.warning(self, "Invalid Settings", "\n".join(errors))
+            return
+        self.settings_data.update(new_settings_data)
 
-            with open(
-                os.path.join(self.script_directory, self.setting_filename), "w"
-            ) as settings_file:
-                json.dump(self.settings_data, settings_file, indent=4)
-            logging.info("Saved settings")
+        with open(
+            os.path.join(self.script_directory, self.setting_filename), "w"
+        ) as settings_file:
+            json.dump(self.settings_data, settings_file, indent=4)
+        logging.info("Saved settings")
 
-            self.accept()
-            self.reload_main_window()
+        self.accept()
+        self.reload_main_window(new_settings_data)
 
-        except json.JSONDecodeError as e:
-            QMessageBox.warning(self, "Invalid JSON", f"Error in JSON format: {e}")
+    def done(self, result):
+        self.validator.stop()
+        super(EditSettingsWindow, self).done(result)
 
-    def reload_main_window(self):
-        new_settings_data = json.loads(self.json_text.toPlainText())
+    def reload_main_window(self, new_settings_data):
         new_settings = self.main_window.settings.copy()
         new_settings.update(new_settings_data)
 
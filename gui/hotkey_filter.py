@@ -0,0 +1,50 @@
+import logging
+import time
+from PyQt5.QtCore import QObject, QEvent, Qt
+from PyQt5.QtGui import QKeySequence
+
+
+def parse_hotkey(hotkey):
+    sequence = QKeySequence(str(hotkey))
+    if sequence.count() != 1:
+        return None
+    key = sequence[0] & ~int(Qt.KeyboardModifierMask)
+    if key in (0, Qt.Key_unknown):
+        return None
+    return key
+
+
+class HotkeyFilter(QObject):
+    BLOCKING_MODIFIERS = Qt.ControlModifier | Qt.AltModifier | Qt.MetaModifier
+
+    def __init__(self, window):
+        super(HotkeyFilter, self).__init__(window)
+        self.window = window
+        self.dispatch_table = {}
+
+    def set_bindings(self, bindings):
+        dispatch_table = {}
+        for hotkey, action in bindings:
+            key = parse_hotkey(hotkey)
+            if key is None:
+                logging.warning(f"Invalid hotkey: {hotkey}")
+                continue
+            if key in dispatch_table:
+                logging.warning(f"Hotkey {hotkey} is assigned to more than one button")
+            dispatch_table[key] = action
+        self.dispatch_table = dispatch_table
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.KeyPress:
+            return False
+        started = time.perf_counter()
+        action = self.dispatch_table.get(event.key())
+        if (
+            action is None
+            or event.isAutoRepeat()
+            or event.modifiers() & self.BLOCKING_MODIFIERS
+            or not self.window.isActiveWindow()
+        ):
+            return False
+        action(started=started)
+        return True
@@ -0,0 +1,107 @@
+import threading
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCursor, QTextFormat
+from PyQt5.QtWidgets import QTextEdit
+
+from common.profile_schema import check_document
+
+MAX_LISTED_ERRORS = 5
+
+
+class LiveValidator(QObject):
+    validated = pyqtSignal(int, object, list)
+    state_changed = pyqtSignal(bool)
+
+    def __init__(self, editor, validate, error_label, delay=300, parent=None):
+        super(LiveValidator, self).__init__(parent)
+        self.editor = editor
+        self.validate = validate
+        self.error_label = error_label
+        self.generation = 0
+        self.data = None
+        self.errors = []
+        self.checked_generation = -1
+        self.pending = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(delay)
+        self.debounce.timeout.connect(self.submit)
+        self.editor.textChanged.connect(self.text_changed)
+        # Results come back from the worker thread as queued calls
+        self.validated.connect(self.show_result)
+
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        self.submit()
+
+    def text_changed(self):
+        self.generation += 1
+        self.debounce.start()
+
+    def submit(self):
+        with self.lock:
+            self.pending = (self.generation, self.editor.toPlainText())
+        self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            with self.lock:
+                self.wakeup.clear()
+                if self.stopping:
+                    return
+                generation, text = self.pending
+            data, errors = check_document(text, self.validate)
+            self.validated.emit(generation, data, errors)
+
+    def show_result(self, generation, data, errors):
+        if generation != self.generation:
+            return
+        self.apply(generation, data, errors)
+
+    def apply(self, generation, data, errors):
+        self.data = data
+        self.errors = errors
+        self.checked_generation = generation
+        self.mark_errors()
+        self.state_changed.emit(not errors)
+
+    def current(self):
+        # Save uses the background result unless the text changed since then
+        if self.checked_generation != self.generation:
+            self.debounce.stop()
+            data, errors = check_document(self.editor.toPlainText(), self.validate)
+            self.apply(self.generation, data, errors)
+        return self.data, [error for _, error in self.errors]
+
+    def mark_errors(self):
+        selections = []
+        document = self.editor.document()
+        for line, _ in self.errors:
+            block = document.findBlockByLineNumber(line - 1)
+            if not block.isValid():
+                continue
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(QColor(255, 220, 220))
+            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            selection.cursor = QTextCursor(block)
+            selections.append(selection)
+        self.editor.setExtraSelections(selections)
+
+        lines = [f"Line {line}: {error}" for line, error in self.errors]
+        if len(lines) > MAX_LISTED_ERRORS:
+            hidden = len(lines) - MAX_LISTED_ERRORS
+            lines = lines[:MAX_LISTED_ERRORS] + [f"... and {hidden} more"]
+        self.error_label.setText("\n".join(lines))
+        self.error_label.setVisible(bool(lines))
+
+    def stop(self):
+        self.debounce.stop()
+        with self.lock:
+            self.stopping = True
+        self.wakeup.set()
+        self.worker.join()
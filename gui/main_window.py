@@ -3,6 +3,9 @@ import logging
 import json
 import shutil
 import plistlib
+import time
+import threading
+import cProfile
 from PyQt5.QtWidgets import (
     QMainWindow,
     QAction,
@@ -17,19 +20,40 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QFileDialog,
     QDialog,
+    QApplication,
+    QDial,
+    QSlider,
 )
-from PyQt5.QtGui import QIcon, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, pyqtSignal
 
 # Custom Modules
 from gui.edit_settings_window import EditSettingsWindow
 from gui.edit_profile_window import EditProfileWindow
 from gui.profile_recorder_window import ProfileRecorderWindow
+from gui.button_highlighter import ButtonHighlighter
+from gui.button_style import ButtonStyle
+from gui.hotkey_filter import HotkeyFilter
+from gui.status_reporter import StatusReporter
+from gui.stall_watchdog import StallWatchdog
+from gui.sysex_progress import SysexProgress
+from common.profile_history import ProfileHistory
 from common.profile_manager import ProfileManager, ProfileNotValid, is_json_file
+from common.bulk_import import bulk_import
+from midi.button_index import ButtonIndex
+from midi.midi_clock import MidiClock, TapTempo
 from midi.midi_handler import MidiHandler
+from midi.reconnect import CONNECTED, RECONNECTING, ReconnectSupervisor
+from midi.session_journal import SessionJournal
+from midi.sysex_librarian import PatchLibrary
+from midi.transports import get_transport
 
 
 class MainWindow(QMainWindow):
+    output_state_changed = pyqtSignal(str)
+    latency_probe_finished = pyqtSignal(object)
+    bulk_import_finished = pyqtSignal(str, object)
+
     MIDI_LAYOUT_ORDER = [
         ("midi_output_label", 0),
         ("midi_output_combobox", 1),
@@ -60,6 +84,10 @@ class MainWindow(QMainWindow):
         )
         self.profile_manager.ensure_directories_exist()
         self.settings = self.profile_manager.load_settings()
+        self.profiler = None
+        if self.settings.get("profile_session", False):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
 
         try:
             self.profile_data = self.profile_manager.load_profile_data(
@@ -76,8 +104,40 @@ class MainWindow(QMainWindow):
                 port_name=self.midi_output_combobox.currentText(),
             )
 
+        self.histories = {}
+        self.record_history(self.profile_data, "opened")
+
+        self.midi_clock = MidiClock(
+            self.midi_handler.send_realtime, self.settings.get("clock_bpm", 120)
+        )
+        self.tap_tempo = TapTempo()
+        self.patch_library = self.open_patch_library(script_directory)
+        if "tempo" in self.profile_data:
+            self.midi_clock.set_tempo(self.profile_data["tempo"])
+
+        self.output_state_label = QLabel()
+        self.output_state_changed.connect(self.update_output_state)
+        self.latency_probe_finished.connect(self.show_latency_report)
+        self.latency_probe_thread = None
+        self.bulk_import_finished.connect(self.show_bulk_import_report)
+        self.bulk_import_thread = None
+        if self.settings.get("auto_reconnect", True):
+            self.midi_handler.reconnect_supervisor = ReconnectSupervisor(
+                self.midi_handler, self.output_state_changed.emit
+            )
+
         port_name = self.settings["port_name"]
         output_port = None
+        self.midi_handler.transport = get_transport(
+            self.settings.get("output_transport", "mido")
+        )
+        self.midi_handler.isolated_output = self.settings.get("isolated_output", False)
+        self.midi_handler.isolated_priority = self.settings.get(
+            "isolated_output_priority", False
+        )
+        self.midi_handler.output_scheduling = self.settings.get(
+            "output_scheduling", False
+        )
 
         for port in self.midi_handler.get_output():
             if port_name in port:
@@ -88,14 +148,51 @@ class MainWindow(QMainWindow):
             logging.error(f"Error: MIDI port '{port_name}' not found.")
 
         self.midi_handler.set_midi_channel(self.profile_data["channel"])
+        self.midi_handler.suppress_redundant = self.settings.get(
+            "suppress_redundant_sends", False
+        )
+        self.midi_handler.cc_max_rate = self.settings.get("cc_max_rate", 50)
+        self.midi_handler.sysex_chunk_size = self.settings.get("sysex_chunk_size", 256)
+        self.midi_handler.sysex_pause = (
+            self.settings.get("sysex_chunk_pause_ms", 20) / 1000
+        )
+        self.midi_handler.input_queue_size = self.settings.get("input_queue_size", 1024)
+        if self.settings.get("feedback_port_name"):
+            self.midi_handler.start_feedback_input(self.settings["feedback_port_name"])
+        if self.settings.get("input_port_names"):
+            self.midi_handler.start_controller_inputs(
+                self.settings["input_port_names"], self.settings.get("midi_thru", False)
+            )
+        if self.settings.get("journal", False):
+            self.start_session_journal()
         self.setup_ui()
         self.save_midi_output_on_opening()
 
+        self.stall_watchdog = None
+        if self.settings.get("stall_watchdog", True):
+            self.stall_watchdog = StallWatchdog(
+                self.settings.get("stall_threshold_ms", 250) / 1000, parent=self
+            )
+            self.stall_watchdog.start()
+
     def setup_ui(self):
         self.setWindowTitle(self.profile_data["name"])
         # self.setGeometry(100, 100, 600, 400)
         self.load_window_position()
 
+        self.hotkey_filter = HotkeyFilter(self)
+        QApplication.instance().installEventFilter(self.hotkey_filter)
+        self.buttons_widget = QWidget()
+        self.button_style = ButtonStyle(self.buttons_widget)
+        self.button_index = ButtonIndex()
+        self.button_highlighter = ButtonHighlighter(
+            self.button_index, self.show_other_profile_match, parent=self
+        )
+        self.midi_handler.message_listeners.append(self.button_highlighter.post)
+        self.indexed_profiles = {}
+        if self.settings.get("feedback_all_profiles", False):
+            self.index_all_profiles()
+
         self.setup_menu_bar()
         self.setup_midi_layout()
         self.setup_buttons_layout()
@@ -105,8 +202,43 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.save_window_position()
+        self.midi_handler.stop_inputs()
+        if self.midi_handler.reconnect_supervisor is not None:
+            self.midi_handler.reconnect_supervisor.stop()
+        self.midi_handler.stop_controls()
+        self.midi_clock.stop()
+        self.midi_handler.stop_librarian()
+        self.midi_handler.cancel_sysex()
+        self.midi_handler.close_output()
+        if self.profile_manager.library is not None:
+            self.profile_manager.library.close()
+        if self.midi_handler.journal is not None:
+            self.midi_handler.journal.close()
+        self.save_histories()
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.stop()
+            logging.info(f"GUI stalls: {self.stall_watchdog.stats()}")
+        if self.profiler is not None:
+            self.profiler.disable()
+            profile_path = os.path.join(self.script_directory, "MyAmpSwitcher.prof")
+            self.profiler.dump_stats(profile_path)
+            self.profiler = None
+            logging.warning(f"Session profile written to {profile_path}")
         super().closeEvent(event)
 
+    def start_session_journal(self):
+        journals_directory = os.path.join(self.script_directory, "journals")
+        os.makedirs(journals_directory, exist_ok=True)
+        journal_path = os.path.join(
+            journals_directory, time.strftime("session-%Y%m%d-%H%M%S.masj")
+        )
+        try:
+            self.midi_handler.journal = SessionJournal(journal_path)
+            self.midi_handler.journal.mark(f"profile: {self.profile_data['name']}")
+            logging.info(f"Recording session journal: {journal_path}")
+        except Exception as e:
+            logging.error(f"Error starting session journal: {e}")
+
     def setup_menu_bar(self):
         menubar = self.menuBar()
         menubar.setNativeMenuBar(False)
@@ -116,14 +248,46 @@ class MainWindow(QMainWindow):
         self.add_menu_action(profile_menu, "Edit", self.edit_profile)
         self.add_menu_action(profile_menu, "Load", self.load_profile)
         profile_menu.addSeparator()
+        self.add_menu_action(profile_menu, "Undo", self.undo_profile)
+        self.add_menu_action(profile_menu, "Redo", self.redo_profile)
+        profile_menu.addSeparator()
         self.add_menu_action(profile_menu, "Record", self.record_profile)
         profile_menu.addSeparator()
         self.add_menu_action(profile_menu, "Import", self.import_profile)
+        self.add_menu_action(profile_menu, "Import Folder", self.import_profile_folder)
+        self.add_menu_action(
+            profile_menu, "Import Archive", self.import_profile_archive
+        )
         self.add_menu_action(profile_menu, "Export", self.export_profile)
 
         settings_menu = menubar.addMenu("Settings")
         self.add_menu_action(settings_menu, "Edit", self.edit_settings)
 
+        tools_menu = menubar.addMenu("Tools")
+        self.add_menu_action(tools_menu, "Output Statistics", self.show_output_stats)
+        self.add_menu_action(tools_menu, "Input Statistics", self.show_input_stats)
+        self.add_menu_action(
+            tools_menu, "Loopback Latency Test", self.run_latency_probe
+        )
+        panic_action = QAction("Panic (All Off)", self)
+        panic_action.setShortcut(self.settings.get("panic_hotkey", "Ctrl+Shift+P"))
+        panic_action.triggered.connect(self.midi_handler.panic)
+        tools_menu.addAction(panic_action)
+        tools_menu.addSeparator()
+        self.add_menu_action(
+            tools_menu, "Start/Stop MIDI Clock", self.toggle_midi_clock
+        )
+        tap_action = QAction("Tap Tempo", self)
+        tap_action.setShortcut(self.settings.get("tap_tempo_hotkey", "T"))
+        tap_action.triggered.connect(self.tap_clock_tempo)
+        tools_menu.addAction(tap_action)
+        self.add_menu_action(tools_menu, "Clock Statistics", self.show_clock_stats)
+        tools_menu.addSeparator()
+        self.add_menu_action(tools_menu, "Send SysEx File", self.send_sysex_file)
+        self.add_menu_action(
+            tools_menu, "Start/Stop SysEx Backup", self.toggle_sysex_backup
+        )
+
         help_menu = menubar.addMenu("About")
         self.add_menu_action(help_menu, "Version", self.show_about_dialog)
 
@@ -166,39 +330,166 @@ class MainWindow(QMainWindow):
             self.profile_data.get("buttons", []), key=lambda x: x.get("order", 0)
         )
 
-        self.channel_buttons_layout = QGridLayout()
+        self.channel_buttons_layout = QGridLayout(self.buttons_widget)
+        self.channel_buttons_layout.setContentsMargins(0, 0, 0, 0)
 
+        self.button_style.prepare(button.get("color") for button in sorted_buttons)
+        hotkey_bindings = []
+        widgets = []
         for idx, button_info in enumerate(sorted_buttons):
-            button = self.create_button_from_info(button_info)
+            button = self.create_button_from_info(button_info, hotkey_bindings)
             row, col = divmod(idx, self.settings["buttons_per_row"])
             self.channel_buttons_layout.addWidget(button, row, col)
+            widgets.append(button)
+        self.hotkey_filter.set_bindings(hotkey_bindings)
+        self.index_buttons(sorted_buttons, widgets)
+
+        self.central_layout.addWidget(self.buttons_widget)
 
-        self.central_layout.addLayout(self.channel_buttons_layout)
+        self.controls_layout = QGridLayout()
+        self.update_controls_layout()
+        self.central_layout.addLayout(self.controls_layout)
         self.setCentralWidget(self.central_widget)
 
-    def create_button_from_info(self, button_info):
+    def update_controls_layout(self):
+        while self.controls_layout.count():
+            self.controls_layout.takeAt(0).widget().deleteLater()
+
+        for row, control_info in enumerate(self.profile_data.get("controls", [])):
+            label = QLabel(control_info.get("name", "Unknown"))
+            value_label = QLabel()
+            control = self.create_control_from_info(control_info, value_label)
+            self.controls_layout.addWidget(label, row, 0)
+            self.controls_layout.addWidget(control, row, 1)
+            self.controls_layout.addWidget(value_label, row, 2)
+
+    def create_control_from_info(self, control_info, value_label):
+        if control_info.get("style", "slider") == "knob":
+            control = QDial()
+            control.setNotchesVisible(True)
+            control.setMaximumHeight(60)
+        else:
+            control = QSlider(Qt.Horizontal)
+        control.setRange(control_info.get("min", 0), control_info.get("max", 127))
+        control.setValue(control_info.get("value", control.minimum()))
+        value_label.setNum(control.value())
+
+        cc_number = control_info["cc_number"]
+        smoothing = control_info.get("smoothing_ms", 0) / 1000
+
+        def value_changed(value):
+            value_label.setNum(value)
+            self.midi_handler.set_control(cc_number, value, smoothing)
+
+        control.valueChanged.connect(value_changed)
+        return control
+
+    def create_button_from_info(self, button_info, hotkey_bindings=None):
         name = button_info.get("name", "Unknown")
         button = QPushButton(name)
         button.setMinimumHeight(40)
         color = button_info.get("color", None)
 
-        if color is not None:
-            button.setStyleSheet(
-                f"QPushButton:pressed{{background: #000;}}"
-                f"QPushButton{{background: {color}; border-radius: 10px; border: 1px solid #8f8f91; padding: 1px;}}"
-            )
+        self.button_style.style_button(button, color)
+        button.setFont(
+            self.button_style.font(self.settings["font"], self.settings["size"])
+        )
+        send_action = self.midi_handler.compile_send(
+            button_info.get("program_change", None),
+            button_info.get("cc_number", None),
+            button_info.get("cc_value", None),
+            name,
+            button_info.get("always_send", False),
+        )
+        action = send_action
+        tempo = button_info.get("tempo", None)
+        if tempo is not None:
+            action = self.send_with_tempo(action, tempo)
+        patch = button_info.get("patch", None)
+        if patch is not None:
+            action = self.send_with_patch(action, patch)
+        button.clicked.connect(action)
+
+        hotkey = button_info.get("hotkey", None)
+        if hotkey is not None and hotkey_bindings is not None:
+            button.setToolTip(f"Hotkey: {hotkey}")
+            hotkey_bindings.append((hotkey, action))
+        return button
 
-        button.setFont(QFont(self.settings["font"], self.settings["size"]))
-        button.clicked.connect(
-            lambda _, pc=button_info.get(
-                "program_change", None
-            ), cc_num=button_info.get("cc_number", None), cc_val=button_info.get(
-                "cc_value", None
-            ): self.midi_handler.send_midi_message(
-                pc, cc_num, cc_val
+    def index_buttons(self, sorted_buttons, widgets):
+        profile_name = self.settings["profile"]
+        previous = self.button_highlighter.profile_name
+        if previous not in (None, profile_name) and not self.settings.get(
+            "feedback_all_profiles", False
+        ):
+            self.button_index.remove_profile(previous)
+        self.indexed_profiles[profile_name] = sorted_buttons
+        self.button_index.add_profile(
+            profile_name, sorted_buttons, self.midi_handler.midi_channel
+        )
+        self.button_highlighter.set_buttons(profile_name, widgets)
+
+    def index_all_profiles(self):
+        profiles_directory = os.path.join(self.script_directory, "profiles")
+        for profile_name in sorted(os.listdir(profiles_directory)):
+            if not profile_name.lower().endswith(".json"):
+                continue
+            try:
+                profile_data = self.profile_manager.load_profile_data(profile_name)
+            except Exception as e:
+                logging.warning(f"Skipping profile {profile_name} in the index: {e}")
+                continue
+            sorted_buttons = sorted(
+                profile_data.get("buttons", []), key=lambda x: x.get("order", 0)
+            )
+            self.indexed_profiles[profile_name] = sorted_buttons
+            self.button_index.add_profile(
+                profile_name, sorted_buttons, profile_data.get("channel", 0)
             )
+
+    def show_other_profile_match(self, matches):
+        profile_name, position = matches[0]
+        button_name = self.indexed_profiles[profile_name][position].get("name")
+        self.update_status_bar(f"Device is on '{button_name}' of {profile_name}")
+
+    def send_with_tempo(self, send_action, tempo):
+        def action(checked=False, started=None):
+            send_action(checked, started=started)
+            self.set_clock_tempo(tempo)
+
+        return action
+
+    def send_with_patch(self, send_action, patch):
+        # The program change goes first, the patch then lands in its edit buffer
+        def action(checked=False, started=None):
+            send_action(checked, started=started)
+            self.send_patch(patch)
+
+        return action
+
+    def open_patch_library(self, script_directory):
+        try:
+            return PatchLibrary(os.path.join(script_directory, "patches"))
+        except Exception as e:
+            logging.error(f"Error opening SysEx patch library: {e}")
+            return None
+
+    def send_patch(self, patch):
+        if self.patch_library is None:
+            self.update_status_bar(f"No SysEx patch library to send {patch} from")
+            return None
+
+        def finished(state, sent_bytes, error):
+            if error:
+                self.update_status_bar(f"Error sending SysEx patch {patch}: {error}")
+            else:
+                self.update_status_bar(
+                    f"SysEx patch {patch} {state} ({sent_bytes} bytes)"
+                )
+
+        return self.midi_handler.send_patch(
+            self.patch_library, patch, finished=finished
         )
-        return button
 
     def save_window_position(self):
         new_position = {
@@ -232,19 +523,13 @@ class MainWindow(QMainWindow):
                 json.dump(new_settings, settings_file, indent=4)
             new_profile_data = self.profile_data.copy()
             new_profile_data["channel"] = int(self.midi_channel_combobox.currentText())
-            with open(
-                os.path.join(
-                    self.profile_manager.script_directory,
-                    "profiles",
-                    self.settings["profile"],
-                ),
-                "w",
-            ) as profile_file:
-                json.dump(new_profile_data, profile_file, indent=4)
+            self.profile_manager.save_profile_data(
+                self.settings["profile"], new_profile_data
+            )
+            self.record_history(new_profile_data, "channel")
             self.update_status_bar(
                 f"Midi Channel saved successfully on profile '{self.settings['profile']}'"
             )
-            logging.info(f"Saved {self.settings['profile']}")
         except Exception as e:
             logging.error(f"Error saving profile data: {e}")
             QMessageBox.warning(None, "Save Error", f"Error saving profile data: {e}")
@@ -252,6 +537,10 @@ class MainWindow(QMainWindow):
     def set_status_bar(self):
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
+        self.statusBar.addPermanentWidget(self.output_state_label)
+        self.status_reporter = StatusReporter(
+            self.statusBar, self.settings.get("status_updates_per_second", 10)
+        )
         self.statusBar.showMessage("Ready", 2000)
 
     def set_window_icon(self):
@@ -261,7 +550,17 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(app_icon)
 
     def update_status_bar(self, message, timeout=2000):
-        self.statusBar.showMessage(message, timeout)
+        self.status_reporter.post(message, timeout)
+
+    def update_output_state(self, state):
+        if state == CONNECTED:
+            self.output_state_label.setText("MIDI connected")
+            self.output_state_label.setStyleSheet("color: green;")
+        elif state == RECONNECTING:
+            self.output_state_label.setText("MIDI reconnecting...")
+            self.output_state_label.setStyleSheet("color: red;")
+        else:
+            self.output_state_label.setText("")
 
     def update_midi_channel_combobox(self, new_channel):
         current_index = self.midi_channel_combobox.findText(str(new_channel))
@@ -272,37 +571,25 @@ class MainWindow(QMainWindow):
         for button in self.findChildren(QPushButton):
             button.deleteLater()
 
+        self.button_style.prepare(button.get("color") for button in sorted_buttons)
+        hotkey_bindings = []
+        widgets = []
         for idx, button_info in enumerate(sorted_buttons):
-            pc_number = button_info.get("program_change", None)
-            cc_number = button_info.get("cc_number", None)
-            cc_value = button_info.get("cc_value", None)
-            name = button_info.get("name", "Unknown")
-            button = QPushButton(name)
-            button.setMinimumHeight(40)
-            color = button_info.get("color", None)
-            if color is not None:
-                color = button_info.get(
-                    "color", "black"
-                )  # Default to black if color is not specified
-                button.setStyleSheet(
-                    f"QPushButton:pressed{{background: #000;}}"
-                    f"QPushButton{{background: {color}; border-radius: 10px; border: 1px solid #8f8f91; padding: 1px;}}"
-                )
-            button.setFont(QFont(self.settings["font"], self.settings["size"]))
-            button.clicked.connect(
-                lambda _, pc=pc_number, cc_num=cc_number, cc_val=cc_value: self.midi_handler.send_midi_message(
-                    pc, cc_num, cc_val
-                )
-            )
-
+            button = self.create_button_from_info(button_info, hotkey_bindings)
             row, col = divmod(idx, self.settings["buttons_per_row"])
             self.channel_buttons_layout.addWidget(button, row, col)
+            widgets.append(button)
+        self.hotkey_filter.set_bindings(hotkey_bindings)
+        self.index_buttons(sorted_buttons, widgets)
 
     def update_content(self, new_profile_data, new_settings):
         self.profile_data = new_profile_data
         self.settings = new_settings
+        self.record_history(self.profile_data, "edit")
 
         self.setWindowTitle(self.profile_data["name"])
+        if self.midi_handler.journal is not None:
+            self.midi_handler.journal.mark(f"profile: {self.profile_data['name']}")
 
         self.update_midi_channel_combobox(self.profile_data.get("channel", 0))
 
@@ -311,6 +598,9 @@ class MainWindow(QMainWindow):
                 self.profile_data.get("buttons", []), key=lambda x: x.get("order", 0)
             )
         )
+        self.update_controls_layout()
+        if "tempo" in self.profile_data:
+            self.set_clock_tempo(self.profile_data["tempo"])
 
         self.refresh_midi_button = QPushButton("Refresh")
         self.refresh_midi_button.clicked.connect(self.reload_midi_output)
@@ -360,13 +650,7 @@ class MainWindow(QMainWindow):
             selected_file = file_dialog.selectedFiles()[0]
             new_profile_name = os.path.basename(selected_file)
 
-            with open(
-                os.path.join(
-                    self.profile_manager.script_directory, "profiles", new_profile_name
-                ),
-                "w",
-            ) as profile_file:
-                json.dump(template_json, profile_file, indent=4)
+            self.profile_manager.save_profile_data(new_profile_name, template_json)
             logging.info(f"Saved new profile: {new_profile_name}")
 
             new_profile_data = self.profile_manager.load_profile_data(new_profile_name)
@@ -398,6 +682,61 @@ class MainWindow(QMainWindow):
         )
         edit_settings__window.exec_()
 
+    def history_path(self, profile_name):
+        return os.path.join(
+            self.script_directory, "history", f"{profile_name}.history.json"
+        )
+
+    def profile_history(self):
+        profile_name = self.settings["profile"]
+        if profile_name not in self.histories:
+            max_revisions = self.settings.get("history_revisions", 200)
+            history = ProfileHistory(max_revisions)
+            if os.path.isfile(self.history_path(profile_name)):
+                try:
+                    history = ProfileHistory.load(
+                        self.history_path(profile_name), max_revisions
+                    )
+                except Exception as e:
+                    logging.error(f"Error loading history of {profile_name}: {e}")
+            self.histories[profile_name] = history
+        return self.histories[profile_name]
+
+    def record_history(self, profile_data, label):
+        self.profile_history().record(profile_data, label)
+
+    def undo_profile(self):
+        self.apply_history(self.profile_history().undo(), "Undo")
+
+    def redo_profile(self):
+        self.apply_history(self.profile_history().redo(), "Redo")
+
+    def apply_history(self, profile_data, action):
+        if profile_data is None:
+            self.update_status_bar(f"Nothing to {action.lower()}")
+            return
+        try:
+            self.profile_manager.save_profile_data(
+                self.settings["profile"], profile_data
+            )
+        except Exception as e:
+            logging.error(f"Error saving profile data: {e}")
+            QMessageBox.warning(None, "Save Error", f"Error saving profile data: {e}")
+            return
+        self.update_content(profile_data, self.settings)
+        label = self.profile_history().current_label()
+        self.update_status_bar(f"{action}: profile restored to '{label}' revision")
+
+    def save_histories(self):
+        if not self.histories:
+            return
+        os.makedirs(os.path.join(self.script_directory, "history"), exist_ok=True)
+        for profile_name, history in self.histories.items():
+            try:
+                history.save(self.history_path(profile_name))
+            except Exception as e:
+                logging.error(f"Error saving history of {profile_name}: {e}")
+
     def load_profile(self):
         self.profile_data = self.profile_manager.change_profile()
 
@@ -440,6 +779,57 @@ class MainWindow(QMainWindow):
                 settings["profile"] = new_profile_name
                 self.profile_manager.change_profile()
 
+    def import_profile_folder(self):
+        directory = QFileDialog.getExistingDirectory(
+            self, "Import Profiles From Folder", os.path.expanduser("~")
+        )
+        if directory:
+            self.run_bulk_import(directory)
+
+    def import_profile_archive(self):
+        archive, _ = QFileDialog.getOpenFileName(
+            self,
+            "Import Profiles From Archive",
+            os.path.expanduser("~"),
+            "Zip archives (*.zip)",
+        )
+        if archive:
+            self.run_bulk_import(archive)
+
+    def run_bulk_import(self, path):
+        if self.bulk_import_thread is not None and self.bulk_import_thread.is_alive():
+            self.update_status_bar("A profile import is already running")
+            return
+        profiles_directory = os.path.join(
+            self.profile_manager.script_directory, "profiles"
+        )
+
+        def run():
+            # Reading, validating in the process pool and writing all happen here
+            try:
+                report = bulk_import(path, profiles_directory)
+            except Exception as e:
+                logging.error(f"Error importing profiles from {path}: {e}")
+                report = e
+            self.bulk_import_finished.emit(path, report)
+
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+        self.bulk_import_thread = threading.Thread(
+            target=run, name="profile-bulk-import", daemon=True
+        )
+        self.bulk_import_thread.start()
+        self.update_status_bar(f"Importing profiles from {path}...")
+
+    def show_bulk_import_report(self, path, report):
+        QApplication.restoreOverrideCursor()
+        if isinstance(report, Exception):
+            QMessageBox.warning(
+                None, "Import Error", f"Error importing profiles: {report}"
+            )
+            return
+        self.update_status_bar(f"Imported {len(report.imported)} profiles")
+        QMessageBox.information(self, "Import Summary", report.format())
+
     def record_profile(self):
         record_window = ProfileRecorderWindow()
         record_window.exec_()
@@ -469,7 +859,7 @@ class MainWindow(QMainWindow):
 
     def select_midi_channel(self, index):
         selected_channel = self.midi_channel_combobox.itemText(index)
-        self.profile_data["channel"] = int(selected_channel)
+        self.profile_data = dict(self.profile_data, channel=int(selected_channel))
         self.update_status_bar(f"MIDI channel {selected_channel} selected.")
 
     def reload_midi_output(self):
@@ -503,6 +893,190 @@ class MainWindow(QMainWindow):
             self.settings["port_name"] = self.midi_output_combobox.currentText()
         return midi_outputs
 
+    def show_output_stats(self):
+        stats = self.midi_handler.output_stats()
+        if stats is None:
+            QMessageBox.information(
+                self,
+                "Output Statistics",
+                'Set "output_scheduling": true in the settings to collect statistics.',
+            )
+            return
+        if stats["running_status"]:
+            running_status = f"Bytes saved by running status: {stats['bytes_saved']}"
+        else:
+            running_status = "Running status: off, it needs the rawmidi transport"
+        QMessageBox.information(
+            self,
+            "Output Statistics",
+            f"Messages sent: {stats['messages_sent']}\n"
+            f"Bytes on the wire: {stats['wire_bytes']}\n"
+            f"{running_status}\n"
+            f"Queue depth: {stats['queue_depth']} (max {stats['max_queue_depth']})\n"
+            f"Sent by lane: {stats['switch_sent']} switches, "
+            f"{stats['control_sent']} controls, {stats['bulk_sent']} bulk\n"
+            f"Panics: {stats['panics']} ({stats['dropped']} queued messages dropped)",
+        )
+
+    def show_input_stats(self):
+        stats = self.midi_handler.input_stats()
+        if stats is None:
+            QMessageBox.information(
+                self,
+                "Input Statistics",
+                'Set "feedback_port_name" or "input_port_names" in the settings '
+                "to capture MIDI input.",
+            )
+            return
+        lines = [f"{name}: {count} messages" for name, count in stats["ports"].items()]
+        lines.extend(
+            f"{name} queue: {consumer['received']} received, "
+            f"{consumer['dropped']} dropped, {consumer['queued']} waiting"
+            for name, consumer in stats["consumers"].items()
+        )
+        QMessageBox.information(self, "Input Statistics", "\n".join(lines))
+
+    def run_latency_probe(self):
+        input_name = self.settings.get("loopback_input") or self.settings.get(
+            "feedback_port_name"
+        )
+        if not input_name:
+            QMessageBox.information(
+                self,
+                "Loopback Latency",
+                'Connect the output back to an input and set "loopback_input" '
+                "in the settings.",
+            )
+            return
+        if self.midi_handler.midi_output is None:
+            self.midi_handler.warn_output_missing()
+            return
+        if (
+            self.latency_probe_thread is not None
+            and self.latency_probe_thread.is_alive()
+        ):
+            self.update_status_bar("Loopback latency test already running")
+            return
+
+        def probe():
+            try:
+                report = self.midi_handler.run_latency_probe(input_name)
+            except Exception as e:
+                logging.error(f"Error measuring loopback latency: {e}")
+                report = e
+            self.latency_probe_finished.emit(report)
+
+        self.latency_probe_thread = threading.Thread(
+            target=probe, name="midi-latency-probe", daemon=True
+        )
+        self.latency_probe_thread.start()
+        self.update_status_bar("Measuring loopback latency...")
+
+    def show_latency_report(self, report):
+        if isinstance(report, Exception):
+            QMessageBox.warning(
+                self, "Loopback Latency", f"Error measuring latency: {report}"
+            )
+            return
+        logging.info(f"Loopback latency: {report.summary()}")
+        QMessageBox.information(self, "Loopback Latency", report.format())
+
+    def toggle_midi_clock(self):
+        if self.midi_clock.running:
+            self.midi_clock.stop()
+            self.update_status_bar("MIDI clock stopped")
+        elif self.midi_handler.midi_output is None:
+            self.midi_handler.warn_output_missing()
+        else:
+            self.midi_clock.start()
+            self.update_status_bar(
+                f"MIDI clock started at {self.midi_clock.bpm:.1f} BPM"
+            )
+
+    def set_clock_tempo(self, bpm):
+        bpm = self.midi_clock.set_tempo(bpm)
+        self.update_status_bar(f"Tempo: {bpm:.1f} BPM")
+
+    def tap_clock_tempo(self):
+        bpm = self.tap_tempo.tap()
+        if bpm is None:
+            self.update_status_bar("Tap again to set the tempo")
+        else:
+            self.set_clock_tempo(bpm)
+
+    def show_clock_stats(self):
+        stats = self.midi_clock.statistics()
+        if stats["ticks"] == 0:
+            QMessageBox.information(
+                self,
+                "Clock Statistics",
+                f"Tempo: {stats['bpm']:.1f} BPM\nStart the MIDI clock to collect statistics.",
+            )
+            return
+        QMessageBox.information(
+            self,
+            "Clock Statistics",
+            f"Tempo: {stats['bpm']:.1f} BPM\n"
+            f"Clock ticks sent: {stats['ticks']}\n"
+            f"Jitter: mean {stats['mean_jitter_ms']:.3f} ms, "
+            f"p99 {stats['p99_jitter_ms']:.3f} ms, max {stats['max_jitter_ms']:.3f} ms\n"
+            f"Drift: {stats['drift_ms']:.3f} ms",
+        )
+
+    def send_sysex_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Send SysEx File",
+            os.path.expanduser("~"),
+            "SysEx files (*.syx);;All files (*)",
+        )
+        if not path:
+            return
+        progress = SysexProgress(path, self.update_status_bar, self)
+        transfer = self.midi_handler.send_sysex_file(
+            path, progress.report, progress.finished
+        )
+        if transfer is None:
+            progress.dialog.close()
+            progress.deleteLater()
+            return
+        progress.attach(transfer)
+
+    def toggle_sysex_backup(self):
+        summary = self.midi_handler.stop_librarian()
+        if summary is not None:
+            stats = self.patch_library.stats()
+            QMessageBox.information(
+                self,
+                "SysEx Backup",
+                f"Patches received: {summary['dumps']}\n"
+                f"New patches: {summary['new']}\n"
+                f"Already in the library: {summary['duplicates']}\n"
+                f"Library: {stats['patches']} patches, {stats['size']} bytes "
+                f"stored in {stats['stored_size']} bytes",
+            )
+            return
+        if self.patch_library is None:
+            QMessageBox.warning(
+                self, "SysEx Backup", "The SysEx patch library could not be opened"
+            )
+            return
+        try:
+            request = bytes.fromhex(self.settings.get("sysex_dump_request", ""))
+        except ValueError as e:
+            QMessageBox.warning(
+                self, "SysEx Backup", f"sysex_dump_request is not valid hex: {e}"
+            )
+            return
+        recorder = self.midi_handler.start_librarian(
+            self.patch_library,
+            self.settings.get("librarian_input") or None,
+            self.settings.get("sysex_dump_gap_ms", 500) / 1000,
+            request,
+        )
+        if recorder is not None:
+            self.update_status_bar("Receiving SysEx patches, stop the backup when done")
+
     def show_about_dialog(self):
         about_text = f"""<h2>MyAmpSwitcher v{self.profile_manager.version}</h2>
                         MyAmpSwitcher was created by Paolo Frigo and released as an open source
@@ -546,6 +1120,10 @@ class MainWindow(QMainWindow):
             logging.error(f"Error opening MIDI port: {e}")
             self.update_status_bar("MIDI Output selected cannot be empty")
             self.midi_handler.midi_output = None
+            if self.midi_handler.reconnect_supervisor is not None:
+                self.midi_handler.reconnect_supervisor.watch(
+                    selected_port, connected=False
+                )
 
     def save_midi_output_on_opening(self):
         if (
@@ -1,4 +1,8 @@
+import logging
+import mido
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
+    QAbstractItemView,
     QDialog,
     QHBoxLayout,
     QPushButton,
@@ -7,34 +11,19 @@ from PyQt5.QtWidgets import (
     QLabel,
     QVBoxLayout,
     QFileDialog,
+    QListWidget,
+    QMessageBox,
 )
-from PyQt5.QtCore import QTimer
+from gui.status_reporter import StatusReporter
+from midi.message_capture import MessageCapture
 from midi.midi_handler import MidiHandler
 
 
-class StatusBarUpdater:
-    def __init__(self, status_label, duration=1000):
-        self.status_label = status_label
-        self.duration = duration
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback):
-        QTimer.singleShot(self.duration, self.clear_status_bar)
-
-    def set_text(self, message):
-        self.status_label.setText(message)
-
-    def clear_status_bar(self):
-        self.status_label.clear()
-
-
 class ProfileRecorderWindow(QDialog):
     def __init__(self):
         super(ProfileRecorderWindow, self).__init__()
 
-        self.midi_message_list = []
+        self.midi_message_list = MessageCapture()
 
         self.setWindowTitle("MIDI Profile Recorder")
 
@@ -46,6 +35,12 @@ class ProfileRecorderWindow(QDialog):
         self.ops_button_layout.addWidget(self.start_button)
         self.ops_button_layout.addWidget(self.stop_button)
 
+        # Nothing selected records from the default input
+        self.input_list = QListWidget(self)
+        self.input_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.input_list.setMaximumHeight(80)
+        self.input_list.addItems(self.input_names())
+
         self.splitter = QSplitter()
         self.left_column = QTextEdit(self)
         self.right_column = QTextEdit(self)
@@ -53,17 +48,23 @@ class ProfileRecorderWindow(QDialog):
         self.editor_button_layout = QHBoxLayout()
         self.save_button = QPushButton("Save As Profile", self)
         self.clear_button = QPushButton("Clear", self)
+        self.import_midi_button = QPushButton("Import MIDI File", self)
+        self.export_midi_button = QPushButton("Export MIDI File", self)
         self.editor_button_layout.addWidget(self.clear_button)
+        self.editor_button_layout.addWidget(self.import_midi_button)
+        self.editor_button_layout.addWidget(self.export_midi_button)
         self.editor_button_layout.addWidget(self.save_button)
         self.midi_log = self.left_column
 
         self.status_label = QLabel()
+        self.status_reporter = StatusReporter(self.status_label, timeout=1000)
 
         self.splitter.addWidget(self.left_column)
         self.splitter.addWidget(self.right_column)
 
         self.layout = QVBoxLayout(self)
         self.layout.addLayout(self.ops_button_layout)
+        self.layout.addWidget(self.input_list)
         self.layout.addWidget(self.splitter)
         self.layout.addLayout(self.editor_button_layout)
         self.layout.addWidget(self.status_label)
@@ -73,24 +74,96 @@ class ProfileRecorderWindow(QDialog):
         self.left_column.setReadOnly(True)
         self.right_column.setReadOnly(True)
 
-        self.start_button.clicked.connect(self.midi_handler.start_midi_input)
+        self.input_timer = QTimer(self)
+        self.input_timer.setInterval(50)
+        self.input_timer.timeout.connect(self.midi_handler.process_input)
+
+        self.start_button.clicked.connect(self.start_midi)
         self.stop_button.clicked.connect(self.stop_midi)
         self.clear_button.clicked.connect(self.clear_midi_log)
         self.save_button.clicked.connect(self.save_config)
+        self.import_midi_button.clicked.connect(self.import_midi_file)
+        self.export_midi_button.clicked.connect(self.export_midi_file)
+
+    def input_names(self):
+        try:
+            return mido.get_input_names()
+        except Exception as e:
+            logging.error(f"Error listing MIDI inputs: {e}")
+            return []
+
+    def start_midi(self):
+        if self.midi_handler.midi_input:
+            return
+        port_names = [item.text() for item in self.input_list.selectedItems()]
+        if self.midi_handler.start_midi_input(port_names) is not None:
+            self.input_timer.start()
 
     def stop_midi(self):
+        self.input_timer.stop()
         self.midi_handler.stop_midi_input()
         self.midi_handler.generate_profile()
 
+    def done(self, result):
+        self.input_timer.stop()
+        self.midi_handler.stop_inputs()
+        super(ProfileRecorderWindow, self).done(result)
+
     def clear_midi_log(self):
-        self.midi_message_list = []
+        self.midi_message_list.clear()
         self.midi_log.clear()
         self.right_column.clear()
         self.update_status_bar("Clear MIDI log and editor")
 
+    def midi_file_dialog(self, accept_mode, title):
+        file_dialog = QFileDialog()
+        file_dialog.setAcceptMode(accept_mode)
+        if accept_mode == QFileDialog.AcceptOpen:
+            file_dialog.setFileMode(QFileDialog.ExistingFile)
+        file_dialog.setNameFilter("MIDI files (*.mid *.midi)")
+        file_dialog.setDefaultSuffix("mid")
+        file_dialog.setWindowTitle(title)
+        if file_dialog.exec_():
+            return file_dialog.selectedFiles()[0]
+        return None
+
+    def export_midi_file(self):
+        if len(self.midi_message_list) == 0:
+            self.update_status_bar("Nothing to export")
+            return
+        selected_file = self.midi_file_dialog(
+            QFileDialog.AcceptSave, "Export the capture as a MIDI File"
+        )
+        if selected_file is None:
+            return
+        try:
+            self.midi_message_list.save_midi_file(selected_file)
+            self.update_status_bar(f"MIDI file exported successfully: {selected_file}")
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Error exporting MIDI file: {e}")
+
+    def import_midi_file(self):
+        selected_file = self.midi_file_dialog(
+            QFileDialog.AcceptOpen, "Import a MIDI File into the recorder"
+        )
+        if selected_file is None:
+            return
+        try:
+            capture = MessageCapture.load_midi_file(selected_file)
+        except Exception as e:
+            QMessageBox.warning(self, "Import Error", f"Error importing MIDI file: {e}")
+            return
+        self.midi_message_list.clear()
+        self.midi_log.clear()
+        for message, seconds in zip(capture, capture.times()):
+            self.midi_message_list.append(message, seconds)
+        self.midi_log.setPlainText("\n".join(str(message) for message in capture))
+        self.update_status_bar(
+            f"Imported {len(capture)} messages ({capture.duration():.1f} s)"
+        )
+
     def update_status_bar(self, message):
-        with StatusBarUpdater(self.status_label) as updater:
-            updater.set_text(message)
+        self.status_reporter.post(message)
 
     def clear_status_bar(self):
         self.status_label.clear()
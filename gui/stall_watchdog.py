@@ -0,0 +1,87 @@
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer
+
+
+class StallWatchdog(QObject):
+    # A GUI-thread timer beats, a watchdog thread notices when the beats stop
+    def __init__(
+        self,
+        threshold=0.25,
+        interval=0.05,
+        max_reports=20,
+        clock=time.monotonic,
+        parent=None,
+    ):
+        super(StallWatchdog, self).__init__(parent)
+        self.threshold = threshold
+        self.interval = interval
+        self.clock = clock
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = clock()
+        self.stall_started = None
+        self.stall_stack = None
+        self.stalls = deque(maxlen=max_reports)
+        self.stall_count = 0
+        self.longest_stall = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.timeout.connect(self.beat)
+
+    def start(self):
+        self.last_beat = self.clock()
+        self.heartbeat.start(int(self.interval * 1000))
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def beat(self):
+        now = self.clock()
+        if self.stall_started is not None:
+            self.finish_stall(now)
+        self.last_beat = now
+
+    def check(self):
+        if self.stall_started is not None:
+            return
+        last_beat = self.last_beat
+        if self.clock() - last_beat < self.threshold:
+            return
+        frame = sys._current_frames().get(self.main_thread_id)
+        self.stall_stack = "".join(traceback.format_stack(frame)) if frame else ""
+        self.stall_started = last_beat
+        logging.warning(
+            f"GUI thread stalled for more than {self.threshold * 1000:.0f} ms in:\n"
+            f"{self.stall_stack}"
+        )
+
+    def finish_stall(self, now):
+        duration = now - self.stall_started
+        self.stalls.append((duration, self.stall_stack))
+        self.stall_count += 1
+        self.longest_stall = max(self.longest_stall, duration)
+        logging.warning(f"GUI thread stall ended after {duration * 1000:.0f} ms")
+        self.stall_started = None
+        self.stall_stack = None
+
+    def stats(self):
+        return {
+            "stalls": self.stall_count,
+            "longest_stall_ms": self.longest_stall * 1000,
+        }
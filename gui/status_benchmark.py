@@ -0,0 +1,110 @@
+import argparse
+import sys
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMainWindow
+
+from gui.status_reporter import StatusReporter
+
+
+class DirectStatus(QObject):
+    # One queued call and one status bar update per message
+    message_posted = pyqtSignal(str, int)
+
+    def __init__(self, status_bar):
+        super(DirectStatus, self).__init__()
+        self.updates = 0
+        self.status_bar = status_bar
+        self.message_posted.connect(self.show)
+
+    def post(self, message, timeout=2000):
+        self.message_posted.emit(message, timeout)
+
+    def show(self, message, timeout):
+        self.status_bar.showMessage(message, timeout)
+        self.updates += 1
+
+    def stats(self):
+        return {"repaints": self.updates}
+
+
+def produce(post, messages, rate, threads, index):
+    interval = threads / rate if rate else 0.0
+    started = time.perf_counter()
+    for number in range(index, messages, threads):
+        due = started + (number // threads) * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        post(f"Received MIDI message: control_change value={number % 128}")
+
+
+def run(make_reporter, messages, rate, threads, application):
+    window = QMainWindow()
+    window.resize(600, 100)
+    window.show()
+    reporter = make_reporter(window.statusBar())
+    application.processEvents()
+
+    producers = [
+        threading.Thread(
+            target=produce, args=(reporter.post, messages, rate, threads, index)
+        )
+        for index in range(threads)
+    ]
+    # GUI thread time is the time spent handling events, idle waits excluded
+    busy = 0.0
+    started = time.perf_counter()
+    for producer in producers:
+        producer.start()
+    while any(producer.is_alive() for producer in producers):
+        busy += process_events(application)
+        time.sleep(0.001)
+    settle = time.perf_counter() + 0.3
+    while time.perf_counter() < settle:
+        busy += process_events(application)
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    updates = reporter.stats()["repaints"]
+    window.close()
+    window.deleteLater()
+    application.processEvents()
+    return {"busy_ms": busy * 1000, "updates": updates, "elapsed": elapsed}
+
+
+def process_events(application):
+    started = time.perf_counter()
+    application.processEvents()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare GUI thread time of per-message and coalesced status updates"
+    )
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=5000, help="messages per second")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--max-rate", type=int, default=10, help="repaints per second")
+    args = parser.parse_args(argv)
+
+    application = QApplication.instance() or QApplication(sys.argv[:1])
+    for label, make_reporter in [
+        ("per-message updates", DirectStatus),
+        (
+            "status reporter",
+            lambda status_bar: StatusReporter(status_bar, max_rate=args.max_rate),
+        ),
+    ]:
+        result = run(make_reporter, args.messages, args.rate, args.threads, application)
+        print(
+            f"{label:20} GUI thread {result['busy_ms']:8.1f} ms"
+            f"  status updates {result['updates']:6}"
+            f"  in {result['elapsed']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
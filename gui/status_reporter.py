@@ -0,0 +1,72 @@
+import threading
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class StatusReporter(QObject):
+    flush_requested = pyqtSignal()
+
+    def __init__(self, target, max_rate=10, timeout=2000, parent=None):
+        super(StatusReporter, self).__init__(parent)
+        self.target = target
+        self.interval = 1.0 / max_rate
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pending = None
+        self.pending_count = 0
+        self.scheduled = False
+        self.last_flush = 0.0
+        self.posted = 0
+        self.repaints = 0
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        self.clear_timer = QTimer(self)
+        self.clear_timer.setSingleShot(True)
+        self.clear_timer.timeout.connect(self.clear)
+        # Posts from other threads are delivered to the GUI thread as queued calls
+        self.flush_requested.connect(self.schedule_flush)
+
+    def post(self, message, timeout=None):
+        with self.lock:
+            self.pending = (message, timeout or self.timeout)
+            self.pending_count += 1
+            self.posted += 1
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.flush_requested.emit()
+
+    def schedule_flush(self):
+        delay = self.last_flush + self.interval - time.monotonic()
+        self.flush_timer.start(max(0, int(delay * 1000)))
+
+    def flush(self):
+        with self.lock:
+            message, timeout = self.pending
+            count = self.pending_count
+            self.pending = None
+            self.pending_count = 0
+            self.scheduled = False
+        if count > 1:
+            message = f"{count} messages, last: {message}"
+        self.show(message, timeout)
+        self.last_flush = time.monotonic()
+        self.repaints += 1
+
+    def show(self, message, timeout):
+        if hasattr(self.target, "showMessage"):
+            self.target.showMessage(message, timeout)
+        else:
+            self.target.setText(message)
+            self.clear_timer.start(timeout)
+
+    def clear(self):
+        if hasattr(self.target, "clearMessage"):
+            self.target.clearMessage()
+        else:
+            self.target.clear()
+
+    def stats(self):
+        return {"posted": self.posted, "repaints": self.repaints}
@@ -0,0 +1,53 @@
+import os
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog
+from midi.sysex_transfer import CANCELLED, DONE
+
+
+class SysexProgress(QObject):
+    progressed = pyqtSignal(int)
+    completed = pyqtSignal(str, int, str)
+
+    def __init__(self, path, status_bar, parent=None):
+        super(SysexProgress, self).__init__(parent)
+        self.file_name = os.path.basename(path)
+        self.status_bar = status_bar
+        self.percent = -1
+        self.dialog = QProgressDialog(
+            f"Sending {self.file_name}", "Cancel", 0, 100, parent
+        )
+        self.dialog.setWindowTitle("SysEx Transfer")
+        self.dialog.setWindowModality(Qt.WindowModal)
+        self.dialog.setAutoClose(False)
+        self.dialog.setAutoReset(False)
+        self.dialog.setMinimumDuration(0)
+        # Both signals are emitted on the transfer thread and delivered queued
+        self.progressed.connect(self.dialog.setValue)
+        self.completed.connect(self.finish)
+
+    def attach(self, transfer):
+        self.dialog.canceled.connect(transfer.cancel)
+
+    def report(self, sent_bytes, total_bytes):
+        # One repaint per percent, not one per chunk
+        percent = sent_bytes * 100 // total_bytes if total_bytes else 100
+        if percent != self.percent:
+            self.percent = percent
+            self.progressed.emit(percent)
+
+    def finished(self, state, sent_bytes, error):
+        self.completed.emit(state, sent_bytes, error or "")
+
+    def finish(self, state, sent_bytes, error):
+        self.dialog.close()
+        if state == DONE:
+            self.status_bar(f"SysEx sent: {self.file_name} ({sent_bytes} bytes)")
+        elif state == CANCELLED:
+            self.status_bar(
+                f"SysEx transfer cancelled after {sent_bytes} bytes: {self.file_name}"
+            )
+        else:
+            QMessageBox.warning(
+                None, "SysEx Transfer Error", f"Error sending {self.file_name}: {error}"
+            )
+        self.deleteLater()
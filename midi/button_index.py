@@ -0,0 +1,60 @@
+def button_keys(button_info, channel):
+    keys = []
+    if button_info.get("program_change") is not None:
+        keys.append(("program_change", channel, button_info["program_change"]))
+    if button_info.get("cc_number") is not None:
+        keys.append(
+            (
+                "control_change",
+                channel,
+                button_info["cc_number"],
+                button_info.get("cc_value"),
+            )
+        )
+    return keys
+
+
+def message_key(message):
+    if message.type == "program_change":
+        return ("program_change", message.channel, message.program)
+    if message.type == "control_change":
+        return ("control_change", message.channel, message.control, message.value)
+    return None
+
+
+def group_key(key):
+    # Buttons in the same group replace each other on the device: one program
+    # per channel, one value per controller
+    return key[:2] if key[0] == "program_change" else key[:3]
+
+
+class ButtonIndex:
+    def __init__(self):
+        self.entries = {}
+        self.profiles = {}
+
+    def add_profile(self, profile_name, buttons, channel):
+        self.remove_profile(profile_name)
+        keys = []
+        for position, button_info in enumerate(buttons):
+            for key in button_keys(button_info, channel):
+                self.entries.setdefault(key, []).append((profile_name, position))
+                keys.append(key)
+        self.profiles[profile_name] = keys
+
+    def remove_profile(self, profile_name):
+        for key in set(self.profiles.pop(profile_name, [])):
+            entries = [entry for entry in self.entries[key] if entry[0] != profile_name]
+            if entries:
+                self.entries[key] = entries
+            else:
+                del self.entries[key]
+
+    def lookup(self, message):
+        key = message_key(message)
+        if key is None:
+            return key, []
+        return key, self.entries.get(key, [])
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+
+class ControlChangeCoalescer:
+    # Only the latest value of each (channel, control) is kept, so a fast
+    # slider never builds a backlog of stale CC messages.
+    def __init__(self, send, max_rate=50, clock=time.monotonic, sleep=time.sleep):
+        self.send = send
+        self.interval = 1.0 / max_rate
+        self.clock = clock
+        self.sleep = sleep
+        self.condition = threading.Condition()
+        self.ramps = {}
+        self.sent_values = {}
+        self.received = 0
+        self.sent = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def set(self, channel, control, value, smoothing=0.0):
+        key = (channel, control)
+        with self.condition:
+            start = self.sent_values.get(key) if smoothing > 0 else None
+            self.ramps[key] = (start, value, self.clock(), smoothing)
+            self.received += 1
+            self.condition.notify()
+
+    def due(self, now):
+        updates = []
+        for key, (start, target, started, smoothing) in list(self.ramps.items()):
+            value = target
+            if start is not None:
+                progress = min(1.0, (now - started) / smoothing)
+                value = round(start + (target - start) * progress)
+            if value != self.sent_values.get(key):
+                self.sent_values[key] = value
+                updates.append((key[0], key[1], value))
+            if value == target:
+                del self.ramps[key]
+        return updates
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.ramps:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                updates = self.due(self.clock())
+            for channel, control, value in updates:
+                try:
+                    self.send(channel, control, value)
+                    self.sent += 1
+                except Exception as e:
+                    logging.error(f"Error sending control change: {e}")
+            self.sleep(self.interval)
+
+    def forget(self):
+        with self.condition:
+            self.sent_values.clear()
+
+    def cancel(self):
+        # Pending ramps are abandoned, e.g. after a panic reset the controllers
+        with self.condition:
+            self.ramps.clear()
+            self.sent_values.clear()
+
+    def stats(self):
+        return {"received": self.received, "sent": self.sent}
@@ -0,0 +1,67 @@
+import threading
+
+
+def redundant(programs, controls, port, message):
+    if message.type == "program_change":
+        return programs.get((port, message.channel)) == message.program
+    if message.type == "control_change":
+        return controls.get((port, message.channel, message.control)) == message.value
+    return False
+
+
+def apply_message(programs, controls, port, message):
+    if message.type == "program_change":
+        channel_key = (port, message.channel)
+        programs[channel_key] = message.program
+        # A new program usually recalls its own controller values
+        stale = [key for key in controls if key[:2] == channel_key]
+        for key in stale:
+            del controls[key]
+    elif message.type == "control_change":
+        controls[(port, message.channel, message.control)] = message.value
+
+
+class DeviceState:
+    # Updated from the input, thru, coalescer and GUI threads
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.programs = {}
+        self.controls = {}
+
+    def is_redundant(self, port, message):
+        with self.lock:
+            return redundant(self.programs, self.controls, port, message)
+
+    def changed_messages(self, port, messages):
+        # Each message is checked against the state the messages sent before it
+        # in the batch leave behind: a CC after a new program is always sent
+        with self.lock:
+            programs = {k: v for k, v in self.programs.items() if k[0] == port}
+            controls = {k: v for k, v in self.controls.items() if k[0] == port}
+        changed = []
+        for message in messages:
+            if not redundant(programs, controls, port, message):
+                changed.append(message)
+                apply_message(programs, controls, port, message)
+        return changed
+
+    def update(self, port, message):
+        with self.lock:
+            apply_message(self.programs, self.controls, port, message)
+
+    def program(self, port, channel):
+        with self.lock:
+            return self.programs.get((port, channel))
+
+    def control(self, port, channel, control):
+        with self.lock:
+            return self.controls.get((port, channel, control))
+
+    def forget(self, port=None):
+        with self.lock:
+            if port is None:
+                self.programs.clear()
+                self.controls.clear()
+                return
+            self.programs = {k: v for k, v in self.programs.items() if k[0] != port}
+            self.controls = {k: v for k, v in self.controls.items() if k[0] != port}
@@ -0,0 +1,218 @@
+import logging
+import queue
+import select
+import threading
+import time
+
+
+class CapturedMessage:
+    __slots__ = ("source", "timestamp", "message")
+
+    def __init__(self, source, timestamp, message):
+        self.source = source
+        self.timestamp = timestamp
+        self.message = message
+
+    def __repr__(self):
+        return f"[{self.source}] {self.message}"
+
+
+class InputConsumer:
+    # Every consumer has its own bounded queue: a slow consumer drops its own
+    # oldest messages and never holds up the poll thread or the other consumers.
+    # Without a handler the queue is drained by its owner, e.g. a GUI timer.
+    def __init__(self, name, handler=None, maxsize=1024, sources=None):
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue(maxsize)
+        self.sources = None if sources is None else set(sources)
+        self.received = 0
+        self.dropped = 0
+        self.thread = None
+
+    def accepts(self, captured):
+        return self.sources is None or captured.source in self.sources
+
+    def offer(self, captured):
+        self.put(captured)
+        self.received += 1
+
+    def put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def drain(self, limit=None):
+        items = []
+        while limit is None or len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def start(self):
+        if self.handler is None or self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self.run, name=f"midi-input-{self.name}", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        while True:
+            captured = self.queue.get()
+            if captured is None:
+                return
+            try:
+                self.handler(captured)
+            except Exception as e:
+                logging.error(f"Error in MIDI input consumer {self.name}: {e}")
+
+    def stop(self):
+        if self.thread is not None:
+            self.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+        }
+
+
+class InputMultiplexer:
+    # One thread reads every input port and fans each message out to the
+    # consumers, tagged with the port it came from and when it was read
+    def __init__(self, poll_interval=0.002, clock=time.perf_counter):
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.ports = {}
+        self.consumers = []
+        self.counts = {}
+        self.running = False
+        self.thread = None
+
+    def add_port(self, name, port):
+        with self.lock:
+            previous = self.ports.get(name)
+            self.ports[name] = port
+            self.counts.setdefault(name, 0)
+        if previous is not None and previous is not port:
+            previous.close()
+
+    def remove_port(self, name):
+        with self.lock:
+            port = self.ports.pop(name, None)
+        if port is not None:
+            port.close()
+
+    def port_names(self):
+        with self.lock:
+            return list(self.ports)
+
+    def add_consumer(self, consumer):
+        consumer.start()
+        with self.lock:
+            self.consumers.append(consumer)
+        return consumer
+
+    def remove_consumer(self, consumer):
+        with self.lock:
+            if consumer in self.consumers:
+                self.consumers.remove(consumer)
+        consumer.stop()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.run, name="midi-input-poll", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.thread.join()
+            self.thread = None
+        with self.lock:
+            ports = list(self.ports.values())
+            consumers = list(self.consumers)
+            self.ports.clear()
+            self.consumers.clear()
+        for port in ports:
+            port.close()
+        for consumer in consumers:
+            consumer.stop()
+
+    def poll(self):
+        with self.lock:
+            ports = list(self.ports.items())
+            consumers = list(self.consumers)
+        received = 0
+        for name, port in ports:
+            try:
+                messages = list(port.iter_pending())
+            except Exception as e:
+                logging.error(f"MIDI input '{name}' failed, removing it: {e}")
+                self.remove_port(name)
+                continue
+            if not messages:
+                continue
+            timestamp = self.clock()
+            for message in messages:
+                captured = CapturedMessage(name, timestamp, message)
+                for consumer in consumers:
+                    if consumer.accepts(captured):
+                        consumer.offer(captured)
+            self.counts[name] = self.counts.get(name, 0) + len(messages)
+            received += len(messages)
+        return received
+
+    def resolution(self):
+        # Longest a message can wait in a port before it is read and stamped
+        with self.lock:
+            ports = list(self.ports.values())
+        if ports and all(hasattr(port, "fileno") for port in ports):
+            return 0.0
+        return self.poll_interval
+
+    def wait(self):
+        with self.lock:
+            ports = list(self.ports.values())
+        # Ports backed by a file descriptor wake the thread up as data arrives,
+        # the others are polled at poll_interval
+        if ports and all(hasattr(port, "fileno") for port in ports):
+            try:
+                select.select(ports, [], [], self.poll_interval * 50)
+                return
+            except (OSError, ValueError):
+                # A port closed while waiting, it is gone on the next pass
+                pass
+        time.sleep(self.poll_interval)
+
+    def run(self):
+        while self.running:
+            if not self.poll():
+                self.wait()
+
+    def stats(self):
+        with self.lock:
+            consumers = list(self.consumers)
+            counts = dict(self.counts)
+        return {
+            "ports": counts,
+            "consumers": {consumer.name: consumer.stats() for consumer in consumers},
+        }
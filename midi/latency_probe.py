@@ -0,0 +1,219 @@
+import argparse
+import statistics
+import threading
+import time
+
+import mido
+
+from midi.input_mux import InputConsumer
+from midi.sender_process import percentiles
+
+# Non-commercial SysEx ID followed by "MA", then a 28 bit sequence number
+PROBE_HEADER = (0x7D, 0x4D, 0x41)
+SEQUENCE_SHIFTS = (21, 14, 7, 0)
+# Input poll interval while probing; ports that can be waited on are read as
+# soon as data arrives
+PROBE_POLL_INTERVAL = 0.0002
+
+
+def probe_message(sequence):
+    data = PROBE_HEADER + tuple((sequence >> shift) & 0x7F for shift in SEQUENCE_SHIFTS)
+    return mido.Message("sysex", data=data)
+
+
+def probe_sequence(message):
+    if message.type != "sysex" or len(message.data) != 7:
+        return None
+    if tuple(message.data[:3]) != PROBE_HEADER:
+        return None
+    sequence = 0
+    for value in message.data[3:]:
+        sequence = (sequence << 7) | value
+    return sequence
+
+
+class ProbeReport:
+    def __init__(self, port, transport, sent, arrivals, resolution=None):
+        # arrivals: (sequence, round trip in seconds) in the order they came back;
+        # resolution: how often the input was read, 0 when read as data arrives
+        self.port = port
+        self.transport = transport
+        self.sent = sent
+        self.arrivals = arrivals
+        self.resolution = resolution
+        seen = set()
+        # Only the first copy of a probe times the round trip
+        self.round_trips = []
+        self.duplicates = 0
+        self.reordered = 0
+        highest = -1
+        for sequence, round_trip in arrivals:
+            if sequence in seen:
+                self.duplicates += 1
+                continue
+            seen.add(sequence)
+            self.round_trips.append(round_trip)
+            if sequence < highest:
+                self.reordered += 1
+            highest = max(highest, sequence)
+        self.received = len(seen)
+        self.lost = sent - self.received
+
+    def summary(self):
+        summary = {
+            "port": self.port,
+            "transport": self.transport,
+            "sent": self.sent,
+            "received": self.received,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+        }
+        if self.resolution is not None:
+            summary["resolution_ms"] = self.resolution * 1000
+        latencies = self.round_trips
+        if latencies:
+            summary.update(percentiles(latencies))
+            summary["min_ms"] = min(latencies) * 1000
+            summary["stdev_ms"] = (
+                statistics.pstdev(latencies) * 1000 if len(latencies) > 1 else 0.0
+            )
+        return summary
+
+    def format(self):
+        summary = self.summary()
+        text = (
+            f"{self.port} ({self.transport}): {self.received}/{self.sent} probes back, "
+            f"{self.lost} lost, {self.reordered} reordered, {self.duplicates} duplicated"
+        )
+        if "p50_ms" in summary:
+            text += (
+                f"\nRound trip: min {summary['min_ms']:.3f} ms, "
+                f"p50 {summary['p50_ms']:.3f} ms, p99 {summary['p99_ms']:.3f} ms, "
+                f"max {summary['max_ms']:.3f} ms, stdev {summary['stdev_ms']:.3f} ms"
+            )
+            if self.resolution:
+                text += f"\nArrival times to within {summary['resolution_ms']:.3f} ms"
+            elif self.resolution is not None:
+                text += "\nArrival times taken as the data arrives"
+        return text
+
+
+class LatencyProbe:
+    # Probes go out on a fixed schedule and are matched by sequence number when
+    # the loopback input hands them back, so loss and reordering show up too.
+    # Arrival times come from the input multiplexer, on the same clock, which
+    # polls tightly while the probe runs.
+    def __init__(
+        self,
+        output,
+        input_mux,
+        source,
+        count=200,
+        interval=0.01,
+        timeout=1.0,
+        clock=time.perf_counter,
+        sleep=time.sleep,
+    ):
+        self.output = output
+        self.input_mux = input_mux
+        self.source = source
+        self.count = count
+        self.interval = interval
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.sent_at = {}
+        self.arrivals = []
+        self.returned = set()
+        self.lock = threading.Lock()
+        self.complete = threading.Event()
+
+    def receive(self, captured):
+        sequence = probe_sequence(captured.message)
+        if sequence is None:
+            return
+        with self.lock:
+            sent_at = self.sent_at.get(sequence)
+            if sent_at is None:
+                return
+            self.arrivals.append((sequence, captured.timestamp - sent_at))
+            self.returned.add(sequence)
+            if len(self.returned) == self.count:
+                self.complete.set()
+
+    def run(self, port_name=None, transport_name=None):
+        consumer = InputConsumer(
+            "latency-probe", self.receive, maxsize=self.count * 2, sources=[self.source]
+        )
+        poll_interval = self.input_mux.poll_interval
+        self.input_mux.poll_interval = min(poll_interval, PROBE_POLL_INTERVAL)
+        resolution = self.input_mux.resolution()
+        self.input_mux.add_consumer(consumer)
+        try:
+            started = self.clock()
+            for sequence in range(self.count):
+                delay = started + sequence * self.interval - self.clock()
+                if delay > 0:
+                    self.sleep(delay)
+                message = probe_message(sequence)
+                with self.lock:
+                    self.sent_at[sequence] = self.clock()
+                self.output.send(message)
+            self.complete.wait(self.timeout)
+        finally:
+            self.input_mux.remove_consumer(consumer)
+            self.input_mux.poll_interval = poll_interval
+        with self.lock:
+            arrivals = list(self.arrivals)
+        return ProbeReport(port_name, transport_name, self.count, arrivals, resolution)
+
+
+def parse_pair(text):
+    output_name, _, input_name = text.partition("=")
+    return output_name, input_name or output_name
+
+
+def main(argv=None):
+    # Imported here, midi_handler imports this module
+    from midi.midi_handler import MidiHandler
+    from midi.transports import get_transport
+
+    parser = argparse.ArgumentParser(
+        description="Measure MIDI round trip latency through a loopback"
+    )
+    parser.add_argument(
+        "--port",
+        action="append",
+        required=True,
+        help="OUTPUT=INPUT loopback pair, INPUT defaults to OUTPUT; repeat for more",
+    )
+    parser.add_argument(
+        "--transport", action="append", help="mido (default), rawmidi or pipe; repeat"
+    )
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=10, help="milliseconds")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds")
+    args = parser.parse_args(argv)
+
+    for transport_name in args.transport or ["mido"]:
+        for output_name, input_name in map(parse_pair, args.port):
+            midi_handler = MidiHandler(None)
+            midi_handler.transport = get_transport(transport_name)
+            try:
+                midi_handler.midi_output = midi_handler.open_output(output_name)
+                midi_handler.midi_output_name = output_name
+                report = midi_handler.run_latency_probe(
+                    input_name, args.count, args.interval / 1000, args.timeout
+                )
+            except Exception as e:
+                print(f"{output_name} ({transport_name}): {e}")
+                continue
+            finally:
+                midi_handler.stop_inputs()
+                midi_handler.close_output()
+            print(report.format())
+
+
+if __name__ == "__main__":
+    main()
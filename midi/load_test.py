@@ -0,0 +1,325 @@
+import argparse
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import mido
+
+from midi.message_capture import MessageCapture
+from midi.midi_handler import MidiHandler
+from midi.session_journal import JournalReader
+
+DEFAULT_MIX = {"pc": 1, "cc": 8, "sysex": 1}
+SYSEX_LENGTH = 32
+
+
+def synthetic_stream(count, mix=None, channel=0, seed=None):
+    mix = mix or DEFAULT_MIX
+    kinds = [kind for kind in ("pc", "cc", "sysex") if mix.get(kind)]
+    weights = [mix[kind] for kind in kinds]
+    randomizer = random.Random(seed)
+    for index in range(count):
+        kind = randomizer.choices(kinds, weights)[0]
+        if kind == "pc":
+            yield mido.Message("program_change", channel=channel, program=index % 128)
+        elif kind == "cc":
+            yield mido.Message(
+                "control_change", channel=channel, control=11, value=index % 128
+            )
+        else:
+            data = [(index + offset) % 128 for offset in range(SYSEX_LENGTH)]
+            yield mido.Message("sysex", data=data)
+
+
+def journal_stream(journal_path):
+    with JournalReader(journal_path) as reader:
+        return [message for _, message in reader.messages()]
+
+
+class FakeOutputPort:
+    def __init__(self, name="load-test"):
+        self.name = name
+        self.messages = []
+        self.closed = False
+
+    def send(self, message):
+        self.messages.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeInputPort:
+    def __init__(self, name="load-test"):
+        self.name = name
+        self.pending = deque()
+        self.closed = False
+
+    def feed(self, message):
+        self.pending.append(message)
+
+    def iter_pending(self):
+        while self.pending:
+            yield self.pending.popleft()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeInputTransport:
+    name = "load-test"
+
+    def __init__(self, port):
+        self.port = port
+
+    def open_input(self, port_name=None):
+        return self.port
+
+
+class DeliveryCapture(MessageCapture):
+    # The recorder's capture, also keeping the delivered objects for ordering
+    def __init__(self):
+        super().__init__()
+        self.delivered = []
+
+    def append(self, message, timestamp=None):
+        super().append(message, timestamp)
+        self.delivered.append(message)
+
+
+class LogPane:
+    def __init__(self):
+        self.lines = []
+
+    def append(self, text):
+        self.lines.append(text)
+
+    def clear(self):
+        self.lines = []
+
+
+class LoadTestWindow:
+    def __init__(self):
+        self.midi_log = LogPane()
+        self.right_column = LogPane()
+        self.status_updates = 0
+        self.last_status = None
+
+    def update_status_bar(self, message, timeout=2000):
+        self.status_updates += 1
+        self.last_status = message
+
+
+class LoadTestReport:
+    def __init__(self, target, generated, delivered, elapsed, order):
+        self.target = target
+        self.generated = len(generated)
+        self.delivered = len(delivered)
+        self.elapsed = elapsed
+        self.dropped = self.generated - self.delivered
+        self.out_of_order = count_out_of_order(order, delivered)
+        self.max_stall = 0.0
+        self.total_stall = 0.0
+        self.memory_growth = None
+        self.memory_peak = None
+
+    @property
+    def throughput(self):
+        return self.delivered / self.elapsed if self.elapsed else 0.0
+
+    def format(self):
+        lines = [
+            f"Target:        {self.target}",
+            f"Messages:      {self.delivered}/{self.generated} in {self.elapsed:.3f} s",
+            f"Throughput:    {self.throughput:.0f} msg/s",
+            f"Dropped:       {self.dropped}",
+            f"Out of order:  {self.out_of_order}",
+            f"GUI stall:     max {self.max_stall * 1000:.2f} ms, "
+            f"total {self.total_stall * 1000:.2f} ms",
+        ]
+        if self.memory_growth is not None:
+            lines.append(
+                f"Memory:        +{self.memory_growth / 1024:.1f} KiB, "
+                f"peak {self.memory_peak / 1024:.1f} KiB"
+            )
+        return "\n".join(lines)
+
+
+def count_out_of_order(order, delivered):
+    out_of_order = 0
+    highest = -1
+    for message in delivered:
+        position = order.get(id(message), -1)
+        if position < highest:
+            out_of_order += 1
+        else:
+            highest = position
+    return out_of_order
+
+
+def paced_bursts(messages, rate, burst):
+    # Yields (due time, burst) so a burst of messages averages the requested rate
+    interval = burst / rate if rate else 0.0
+    for index, start in enumerate(range(0, len(messages), burst)):
+        end = start + burst
+        yield index * interval, messages[start:end]
+
+
+def wait_until(started, due):
+    delay = due - (time.perf_counter() - started)
+    if delay > 0:
+        time.sleep(delay)
+
+
+class LoadTest:
+    def __init__(self, messages, rate=1000, burst=1, heartbeat=0.005):
+        self.messages = list(messages)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.heartbeat = heartbeat
+
+    def run_recorder(self, track_memory=False, queue_size=1024, drain_interval=0.05):
+        # Same path as a recording: the input multiplexer polls the port on its
+        # own thread and the GUI thread drains the recorder queue on a timer
+        window = LoadTestWindow()
+        capture = DeliveryCapture()
+        midi_handler = MidiHandler(window, capture)
+        port = FakeInputPort()
+        midi_handler.transport = FakeInputTransport(port)
+        midi_handler.input_queue_size = queue_size
+        order = {id(message): index for index, message in enumerate(self.messages)}
+
+        def produce():
+            for due, burst in paced_bursts(self.messages, self.rate, self.burst):
+                wait_until(started, due)
+                for message in burst:
+                    port.feed(message)
+
+        def pending():
+            counts = midi_handler.input_stats()["ports"]
+            return (
+                producer.is_alive()
+                or counts.get(port.name, 0) < len(self.messages)
+                or consumer.queue.qsize() > 0
+            )
+
+        self._start_memory(track_memory)
+        consumer = midi_handler.start_midi_input([port.name])
+        producer = threading.Thread(target=produce, name="load-test-input")
+        drain_every = max(1, round(drain_interval / self.heartbeat))
+        started = time.perf_counter()
+        producer.start()
+        max_stall, total_stall = self._heartbeat_while(
+            pending, midi_handler.process_input, drain_every
+        )
+        producer.join()
+        midi_handler.process_input()
+        elapsed = time.perf_counter() - started
+        midi_handler.stop_inputs()
+
+        report = LoadTestReport(
+            "recorder", self.messages, capture.delivered, elapsed, order
+        )
+        report.max_stall, report.total_stall = max_stall, total_stall
+        self._stop_memory(report, track_memory)
+        return report
+
+    def run_output(self, track_memory=False, port=None):
+        window = LoadTestWindow()
+        midi_handler = MidiHandler(window, [])
+        port = port or FakeOutputPort()
+        midi_handler.midi_output = port
+        midi_handler.midi_output_name = port.name
+        order = {id(message): index for index, message in enumerate(self.messages)}
+
+        # Sends run on the GUI thread, so every burst blocks it for its duration
+        max_stall = total_stall = 0.0
+        self._start_memory(track_memory)
+        started = time.perf_counter()
+        for due, burst in paced_bursts(self.messages, self.rate, self.burst):
+            wait_until(started, due)
+            burst_started = time.perf_counter()
+            midi_handler.send_messages(burst, f"Burst of {len(burst)}")
+            stall = time.perf_counter() - burst_started
+            max_stall = max(max_stall, stall)
+            total_stall += stall
+        elapsed = time.perf_counter() - started
+
+        report = LoadTestReport("output", self.messages, port.messages, elapsed, order)
+        report.max_stall, report.total_stall = max_stall, total_stall
+        self._stop_memory(report, track_memory)
+        return report
+
+    def _heartbeat_while(self, running, tick=None, tick_every=1):
+        max_stall = total_stall = 0.0
+        beats = 0
+        expected = time.perf_counter() + self.heartbeat
+        while running():
+            time.sleep(self.heartbeat)
+            beats += 1
+            if tick is not None and beats % tick_every == 0:
+                tick()
+            now = time.perf_counter()
+            stall = max(0.0, now - expected)
+            max_stall = max(max_stall, stall)
+            total_stall += stall
+            expected = now + self.heartbeat
+        return max_stall, total_stall
+
+    def _start_memory(self, track_memory):
+        if track_memory:
+            tracemalloc.start()
+            self.memory_baseline = tracemalloc.get_traced_memory()[0]
+
+    def _stop_memory(self, report, track_memory):
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report.memory_growth = current - self.memory_baseline
+            report.memory_peak = peak - self.memory_baseline
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown message kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Drive MidiHandler with a synthetic or recorded MIDI stream"
+    )
+    parser.add_argument("--target", choices=["recorder", "output"], default="recorder")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=1000, help="messages per second")
+    parser.add_argument("--burst", type=int, default=1, help="messages per burst")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--journal", help="replay a session journal instead")
+    parser.add_argument("--memory", action="store_true", help="track memory growth")
+    parser.add_argument(
+        "--queue-size", type=int, default=1024, help="recorder input queue size"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.journal:
+        messages = journal_stream(args.journal)
+    else:
+        messages = synthetic_stream(args.count, args.mix, seed=args.seed)
+
+    load_test = LoadTest(messages, args.rate, args.burst)
+    if args.target == "recorder":
+        report = load_test.run_recorder(args.memory, args.queue_size)
+    else:
+        report = load_test.run_output(args.memory)
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
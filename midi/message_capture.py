@@ -0,0 +1,106 @@
+import threading
+import time
+from array import array
+
+import mido
+
+MAX_DELTA_US = 2**32 - 1
+
+
+class MessageCapture:
+    # Raw message bytes in one bytearray plus two packed arrays: the start
+    # offset of each message and its delta time in microseconds
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.data = bytearray()
+            self.offsets = array("I")
+            self.deltas = array("I")
+            self.last_time = None
+
+    def append(self, message, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock()
+        with self.lock:
+            if self.last_time is None:
+                delta = 0
+            else:
+                delta = round((timestamp - self.last_time) * 1000000)
+            self.last_time = timestamp
+            start = len(self.data)
+            self.data.extend(message.bytes())
+            self.deltas.append(min(max(delta, 0), MAX_DELTA_US))
+            # Published last, so len() never counts a half-written message
+            self.offsets.append(start)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def raw(self, index):
+        with self.lock:
+            start = self.offsets[index]
+            if index + 1 < len(self.offsets):
+                end = self.offsets[index + 1]
+            else:
+                end = len(self.data)
+            return bytes(self.data[start:end])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return mido.Message.from_bytes(
+            self.raw(index), time=self.deltas[index] / 1000000
+        )
+
+    def __iter__(self):
+        with self.lock:
+            count = len(self.offsets)
+        for index in range(count):
+            yield self[index]
+
+    def times(self):
+        elapsed = 0
+        for delta in self.deltas:
+            elapsed += delta
+            yield elapsed / 1000000
+
+    def memory_size(self):
+        return (
+            len(self.data)
+            + len(self.offsets) * self.offsets.itemsize
+            + len(self.deltas) * self.deltas.itemsize
+        )
+
+    def duration(self):
+        return sum(self.deltas) / 1000000
+
+    def save_midi_file(self, path, ticks_per_beat=480, tempo=500000):
+        midi_file = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+        track = mido.MidiTrack()
+        midi_file.tracks.append(track)
+        track.append(mido.MetaMessage("set_tempo", tempo=tempo, time=0))
+        written_ticks = 0
+        for message, seconds in zip(self, self.times()):
+            # Realtime messages have no place in a Standard MIDI File
+            if message.is_realtime:
+                continue
+            ticks = round(mido.second2tick(seconds, ticks_per_beat, tempo))
+            track.append(message.copy(time=ticks - written_ticks))
+            written_ticks = ticks
+        track.append(mido.MetaMessage("end_of_track", time=0))
+        midi_file.save(path)
+
+    @classmethod
+    def load_midi_file(cls, path):
+        capture = cls()
+        elapsed = 0.0
+        # Iterating a MidiFile merges its tracks and converts ticks to seconds
+        for message in mido.MidiFile(path):
+            elapsed += message.time
+            if not message.is_meta:
+                capture.append(message, elapsed)
+        return capture
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import mido
+
+PPQN = 24
+MIN_BPM = 20.0
+MAX_BPM = 300.0
+
+
+def clamp_bpm(bpm):
+    return max(MIN_BPM, min(MAX_BPM, float(bpm)))
+
+
+class TapTempo:
+    def __init__(self, max_taps=5, timeout=2.0, clock=time.monotonic):
+        self.taps = deque(maxlen=max_taps)
+        self.timeout = timeout
+        self.clock = clock
+
+    def tap(self):
+        now = self.clock()
+        if self.taps and now - self.taps[-1] > self.timeout:
+            self.taps.clear()
+        self.taps.append(now)
+        if len(self.taps) < 2:
+            return None
+        interval = (self.taps[-1] - self.taps[0]) / (len(self.taps) - 1)
+        return clamp_bpm(60.0 / interval)
+
+
+class ClockStats:
+    # Recorded on the clock thread, summarised on the GUI thread
+    def __init__(self, window=4096):
+        self.lateness = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.ticks = 0
+        self.first = None
+        self.last = None
+
+    def record(self, scheduled, sent):
+        with self.lock:
+            if self.first is None:
+                self.first = (scheduled, sent)
+            self.last = (scheduled, sent)
+            self.lateness.append(sent - scheduled)
+            self.ticks += 1
+
+    def summary(self):
+        with self.lock:
+            lateness = sorted(abs(value) for value in self.lateness)
+            ticks, first, last = self.ticks, self.first, self.last
+        if not lateness:
+            return {"ticks": 0}
+        drift = (last[1] - first[1]) - (last[0] - first[0])
+        return {
+            "ticks": ticks,
+            "mean_jitter_ms": sum(lateness) / len(lateness) * 1000,
+            "p99_jitter_ms": lateness[int(len(lateness) * 0.99)] * 1000,
+            "max_jitter_ms": lateness[-1] * 1000,
+            "drift_ms": drift * 1000,
+        }
+
+
+class MidiClock:
+    # Ticks are scheduled against absolute times, so a late tick never pushes
+    # the following ones back and the clock does not drift.
+    def __init__(
+        self,
+        send,
+        bpm=120.0,
+        spin=0.002,
+        clock=time.perf_counter,
+        sleep=time.sleep,
+    ):
+        self.send = send
+        self.bpm = clamp_bpm(bpm)
+        self.spin = spin
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.stats = ClockStats()
+        self.tick_message = mido.Message("clock")
+
+    def interval(self):
+        return 60.0 / (self.bpm * PPQN)
+
+    def set_tempo(self, bpm):
+        with self.lock:
+            self.bpm = clamp_bpm(bpm)
+        return self.bpm
+
+    def start(self):
+        if self.running:
+            return
+        self.stats = ClockStats()
+        self.running = True
+        self.send(mido.Message("start"))
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join()
+        self.thread = None
+        self.send(mido.Message("stop"))
+
+    def wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > self.spin:
+            self.sleep(remaining - self.spin)
+        # The last stretch is spun, sleep() alone overshoots by a millisecond or more
+        while self.clock() < deadline:
+            pass
+
+    def run(self):
+        bpm = self.bpm
+        interval = self.interval()
+        origin = self.clock()
+        tick = 0
+        while self.running:
+            with self.lock:
+                if self.bpm != bpm:
+                    # Tempo changes start a new grid at the next tick
+                    origin += tick * interval
+                    tick = 0
+                    bpm = self.bpm
+                    interval = self.interval()
+            scheduled = origin + tick * interval
+            if self.clock() - scheduled > interval:
+                # Never burst missed ticks after a stall, restart the grid instead
+                logging.warning("MIDI clock fell behind, resynchronising")
+                origin = scheduled = self.clock()
+                tick = 0
+            self.wait_until(scheduled)
+            try:
+                self.send(self.tick_message)
+            except Exception as e:
+                logging.error(f"Error sending MIDI clock: {e}")
+            # Stamped once the tick is written, so slow writes count as jitter
+            self.stats.record(scheduled, self.clock())
+            tick += 1
+
+    def statistics(self):
+        summary = self.stats.summary()
+        summary["bpm"] = self.bpm
+        summary["running"] = self.running
+        return summary
@@ -0,0 +1,47 @@
+import json
+import logging
+import time
+
+EVENT_LOGGER_NAME = "midi.events"
+
+event_logger = logging.getLogger(EVENT_LOGGER_NAME)
+
+
+def log_midi_event(direction, message, port=None, source=None):
+    # The message is formatted by the listener thread, never by the sender
+    if not event_logger.isEnabledFor(logging.INFO):
+        return
+    event_logger.info(
+        direction,
+        extra={
+            "midi_event": {
+                "direction": direction,
+                "monotonic": time.monotonic(),
+                "port": port,
+                "source": source,
+                "message": message,
+            }
+        },
+    )
+
+
+class MidiEventFilter(logging.Filter):
+    def __init__(self, events=True):
+        super(MidiEventFilter, self).__init__()
+        self.events = events
+
+    def filter(self, record):
+        return hasattr(record, "midi_event") == self.events
+
+
+class MidiEventFormatter(logging.Formatter):
+    def format(self, record):
+        event = dict(record.midi_event)
+        message = event.pop("message")
+        fields = message.dict()
+        fields.pop("time", None)
+        if fields["type"] == "sysex":
+            fields["data"] = message.hex()
+        event["time"] = record.created
+        event["message"] = fields
+        return json.dumps(event)
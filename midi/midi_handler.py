@@ -1,40 +1,324 @@
+import gzip
 import mido
 import json
 import logging
+import time
 from PyQt5.QtWidgets import QMessageBox
+from midi.cc_coalescer import ControlChangeCoalescer
+from midi.device_state import DeviceState
+from midi.input_mux import InputConsumer, InputMultiplexer
+from midi.latency_probe import LatencyProbe, probe_sequence
+from midi.midi_event_log import log_midi_event
+from midi.output_scheduler import (
+    DIN_BYTES_PER_SECOND,
+    LANE_CONTROL,
+    OutputScheduler,
+    panic_messages,
+)
+from midi.sender_process import IsolatedOutput
+from midi.session_journal import RECEIVED, SENT
+from midi.sysex_librarian import LibrarianRecorder
+from midi.sysex_transfer import SYSEX_END, SysexTransfer
+from midi.transports import MidoTransport
+
+# Longest the GUI thread waits for a SysEx transfer to stop before a panic
+PANIC_TRANSFER_WAIT = 0.1
+
+
+class SendAction:
+    def __init__(
+        self,
+        midi_handler,
+        pc_number=None,
+        cc_number=None,
+        cc_value=None,
+        name=None,
+        always_send=False,
+    ):
+        self.midi_handler = midi_handler
+        self.pc_number = pc_number
+        self.cc_number = cc_number
+        self.cc_value = cc_value
+        self.name = name
+        self.always_send = always_send
+        self.channel = None
+        self.messages = None
+        self.status_message = None
+
+    def compile(self, channel):
+        self.messages, self.status_message = self.midi_handler.build_messages(
+            self.pc_number, self.cc_number, self.cc_value, channel
+        )
+        self.channel = channel
+
+    def __call__(self, checked=False, started=None):
+        # Messages are rebuilt only when the channel changed since the last send
+        channel = self.midi_handler.midi_channel
+        if self.messages is None or channel != self.channel:
+            try:
+                self.compile(channel)
+            except Exception as e:
+                logging.error(f"Unexpected error: {e}")
+                return
+        self.midi_handler.send_messages(
+            self.messages,
+            self.status_message,
+            started=started,
+            source=self.name,
+            always_send=self.always_send,
+        )
 
 
 class MidiHandler:
     def __init__(self, window, midi_message_list=[]):
         self.window = window
         self.midi_input = None
+        self.midi_input_added = []
         self.midi_message_list = midi_message_list
         self.midi_output = None
+        self.midi_output_name = None
         self.midi_channel = None
+        self.journal = None
+        self.feedback_input = None
+        self.feedback_input_name = None
+        self.device_state = DeviceState()
+        self.suppress_redundant = False
+        self.output_scheduling = False
+        self.output_bytes_per_second = DIN_BYTES_PER_SECOND
+        self.reconnect_supervisor = None
+        self.transport = MidoTransport()
+        self.cc_coalescer = None
+        self.cc_max_rate = 50
+        self.message_listeners = []
+        self.isolated_output = False
+        self.isolated_priority = False
+        self.sysex_chunk_size = 256
+        self.sysex_pause = 0.02
+        self.sysex_transfer = None
+        self.librarian = None
+        self.librarian_input = None
+        self.librarian_consumer = None
+        self.panic_messages = panic_messages()
+        self.input_mux = None
+        self.input_queue_size = 1024
+        self.recorder_consumer = None
+        self.state_consumer = None
+        self.thru_consumer = None
 
     def set_midi_channel(self, midi_channel):
         self.midi_channel = midi_channel
 
     def set_midi_output(self, output_port):
-        self.midi_output = self.open_output(output_port)
+        if isinstance(self.midi_output, OutputScheduler):
+            self.close_output()
+        self.midi_output = self.wrap_output(self.open_output(output_port))
+        self.midi_output_name = output_port
+        self.device_state.forget(output_port)
+        if self.cc_coalescer is not None:
+            self.cc_coalescer.forget()
+        if self.reconnect_supervisor is not None:
+            self.reconnect_supervisor.watch(output_port)
+
+    def wrap_output(self, port):
+        if self.output_scheduling:
+            on_error = None
+            if self.reconnect_supervisor is not None:
+                on_error = self.reconnect_supervisor.connection_lost
+            return OutputScheduler(
+                port, self.output_bytes_per_second, on_error=on_error
+            )
+        return port
+
+    def open_input(self, port_name=None):
+        opener = getattr(self.transport, "open_input", None)
+        if opener is not None:
+            return opener(port_name)
+        return mido.open_input(port_name)
+
+    def input_multiplexer(self):
+        if self.input_mux is None:
+            self.input_mux = InputMultiplexer()
+            self.input_mux.start()
+        return self.input_mux
+
+    def add_input(self, port_name=None):
+        port = self.open_input(port_name)
+        name = port_name or getattr(port, "name", None) or "default"
+        self.input_multiplexer().add_port(name, port)
+        return name
 
-    def start_midi_input(self):
+    def start_midi_input(self, port_names=None):
+        names = []
+        added = []
         try:
-            self.midi_input = mido.open_input()
-            self.window.update_status_bar("MIDI Input Capture\n")
-            self.midi_input.callback = self.handle_midi_message
+            for port_name in port_names or [None]:
+                # Ports already open for feedback or a controller are shared
+                if port_name in self.input_multiplexer().port_names():
+                    names.append(port_name)
+                    continue
+                name = self.add_input(port_name)
+                names.append(name)
+                added.append(name)
         except Exception as e:
+            for name in added:
+                self.input_mux.remove_port(name)
             self.window.update_status_bar(f"Error starting MIDI input: {e}\n")
+            return None
+        self.midi_input = names
+        self.midi_input_added = added
+        # Drained by the recorder window on the GUI thread, see process_input
+        self.recorder_consumer = self.input_multiplexer().add_consumer(
+            InputConsumer("recorder", maxsize=self.input_queue_size, sources=names)
+        )
+        self.window.update_status_bar("MIDI Input Capture\n")
+        return self.recorder_consumer
+
+    def process_input(self, limit=None):
+        consumer = self.recorder_consumer
+        if consumer is None:
+            return 0
+        captured_messages = consumer.drain(limit)
+        for captured in captured_messages:
+            self.handle_midi_message(
+                captured.message, captured.source, captured.timestamp
+            )
+        return len(captured_messages)
 
     def stop_midi_input(self):
         if self.midi_input:
-            self.midi_input.close()
+            self.process_input()
+            self.input_mux.remove_consumer(self.recorder_consumer)
+            for name in self.midi_input_added:
+                self.input_mux.remove_port(name)
+            self.midi_input_added = []
+            self.recorder_consumer = None
             self.window.update_status_bar("MIDI Input Stopped\n")
             self.midi_input = None
 
-    def handle_midi_message(self, message):
-        self.midi_message_list.append(message)
-        self.window.midi_log.append(f"{message}")
+    def watch_inputs(self, names):
+        # One state consumer follows the feedback input and every controller
+        if self.state_consumer is None:
+            self.state_consumer = self.input_multiplexer().add_consumer(
+                InputConsumer(
+                    "state",
+                    self.handle_captured_feedback,
+                    self.input_queue_size,
+                    names,
+                )
+            )
+        else:
+            self.state_consumer.sources.update(names)
+
+    def start_feedback_input(self, port_name):
+        try:
+            self.feedback_input = self.open_input(port_name)
+        except Exception as e:
+            logging.error(f"Error opening MIDI feedback input '{port_name}': {e}")
+            self.feedback_input = None
+            return
+        self.feedback_input_name = port_name
+        self.input_multiplexer().add_port(port_name, self.feedback_input)
+        self.watch_inputs([port_name])
+
+    def stop_feedback_input(self):
+        if self.feedback_input:
+            self.input_mux.remove_port(self.feedback_input_name)
+            self.feedback_input = None
+            self.feedback_input_name = None
+
+    def start_controller_inputs(self, port_names, thru=False):
+        opened = []
+        for port_name in port_names:
+            try:
+                opened.append(self.add_input(port_name))
+            except Exception as e:
+                logging.error(f"Error opening MIDI input '{port_name}': {e}")
+        if not opened:
+            return opened
+        self.watch_inputs(opened)
+        if thru:
+            # Never the feedback input, the device would hear its own echo
+            self.thru_consumer = self.input_multiplexer().add_consumer(
+                InputConsumer("thru", self.route_message, self.input_queue_size, opened)
+            )
+        return opened
+
+    def stop_inputs(self):
+        if self.input_mux is not None:
+            self.input_mux.stop()
+            self.input_mux = None
+        self.feedback_input = None
+        self.feedback_input_name = None
+        self.midi_input = None
+        self.midi_input_added = []
+        self.recorder_consumer = None
+        self.state_consumer = None
+        self.thru_consumer = None
+
+    def input_stats(self):
+        if self.input_mux is None:
+            return None
+        return self.input_mux.stats()
+
+    def run_latency_probe(self, input_name=None, count=200, interval=0.01, timeout=1.0):
+        # Blocks for count * interval seconds, run it off the GUI thread
+        output = self.midi_output
+        if output is None:
+            raise IOError("No MIDI output selected")
+        mux = self.input_multiplexer()
+        added = input_name is None or input_name not in mux.port_names()
+        source = self.add_input(input_name) if added else input_name
+        try:
+            probe = LatencyProbe(output, mux, source, count, interval, timeout)
+            return probe.run(self.midi_output_name, self.transport.name)
+        finally:
+            if added:
+                mux.remove_port(source)
+
+    def handle_captured_feedback(self, captured):
+        # Latency probes coming back on the feedback port are not device state
+        if probe_sequence(captured.message) is not None:
+            return
+        self.handle_feedback_message(captured.message, captured.source)
+
+    def handle_feedback_message(self, message, source=None):
+        # The device echoes its state changes, including those made on its panel
+        self.device_state.update(self.midi_output_name, message)
+        if source is None:
+            source = self.feedback_input_name
+        log_midi_event("received", message, source)
+        if self.journal is not None:
+            self.journal.record_message(RECEIVED, message)
+        for listener in self.message_listeners:
+            listener(message)
+
+    def route_message(self, captured):
+        # Runs on the thru consumer thread, so no message boxes here
+        if self.midi_output is None:
+            return
+        message = captured.message
+        lane = LANE_CONTROL if message.type == "control_change" else None
+        self.send_messages(
+            [message],
+            f"Thru from {captured.source}: {message}",
+            source=captured.source,
+            always_send=True,
+            lane=lane,
+            warn=False,
+        )
+
+    def handle_midi_message(self, message, source=None, timestamp=None):
+        if timestamp is None:
+            self.midi_message_list.append(message)
+        else:
+            self.midi_message_list.append(message, timestamp)
+        log_midi_event("received", message, source)
+        if self.journal is not None:
+            self.journal.record_message(RECEIVED, message)
+        if source is None:
+            self.window.midi_log.append(f"{message}")
+        else:
+            self.window.midi_log.append(f"[{source}] {message}")
         self.window.update_status_bar(f"Received MIDI message: {message}")
 
     def generate_profile(self):
@@ -59,40 +343,299 @@ class MidiHandler:
         self.window.right_column.clear()
         self.window.right_column.append(json.dumps(config_data, indent=2))
 
-    def send_midi_message(self, pc_number, cc_number, cc_value):
+    def build_messages(self, pc_number, cc_number, cc_value, channel=None):
+        if channel is None:
+            channel = self.midi_channel
+        messages = []
+        status_message = "Midi "
+        if pc_number is not None:
+            messages.append(
+                mido.Message("program_change", channel=channel, program=pc_number)
+            )
+            status_message += f"Program: {pc_number}"
 
+        if cc_number is not None and cc_value is not None:
+            messages.append(
+                mido.Message(
+                    "control_change",
+                    channel=channel,
+                    control=cc_number,
+                    value=cc_value,
+                )
+            )
+            status_message += f"Control: {cc_number} Value: {cc_value}"
+        return messages, status_message
+
+    def compile_send(
+        self, pc_number, cc_number, cc_value, name=None, always_send=False
+    ):
+        return SendAction(self, pc_number, cc_number, cc_value, name, always_send)
+
+    def send_midi_message(self, pc_number, cc_number, cc_value):
         if self.midi_output is None:
-            QMessageBox.warning(
-                None,
-                "MIDI output port not found",
-                "Please connect a valid MIDI output port and try again",
+            self.warn_output_missing()
+            return
+
+        try:
+            messages, status_message = self.build_messages(
+                pc_number, cc_number, cc_value
             )
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
             return
+        self.send_messages(messages, status_message)
 
+    def set_control(self, cc_number, value, smoothing=0.0):
+        if self.cc_coalescer is None:
+            self.cc_coalescer = ControlChangeCoalescer(
+                self.send_control_change, self.cc_max_rate
+            )
+            self.cc_coalescer.start()
+        self.cc_coalescer.set(self.midi_channel, cc_number, value, smoothing)
+
+    def send_control_change(self, channel, cc_number, value):
+        # Runs on the coalescer thread, so no message boxes here
+        if self.midi_output is None and self.reconnect_supervisor is None:
+            logging.warning(f"No MIDI output for control change {cc_number}")
+            return
+        messages, status_message = self.build_messages(None, cc_number, value, channel)
+        self.send_messages(
+            messages,
+            status_message,
+            source="control",
+            lane=LANE_CONTROL,
+            warn=False,
+        )
+
+    def send_realtime(self, message):
+        # Clock ticks skip logging and journaling, there are dozens per second
+        output = self.midi_output
+        if isinstance(output, OutputScheduler):
+            output.send_realtime(message)
+        elif output is not None:
+            output.send(message)
+
+    def send_sysex_file(
+        self, path, progress=None, finished=None, opener=open, total_bytes=None
+    ):
+        if self.midi_output is None:
+            self.warn_output_missing()
+            return None
+        if self.sysex_transfer is not None and self.sysex_transfer.running:
+            self.window.update_status_bar("A SysEx transfer is already running")
+            return None
+        self.sysex_transfer = SysexTransfer(
+            self.midi_output,
+            path,
+            self.sysex_chunk_size,
+            self.sysex_pause,
+            progress,
+            finished,
+            opener,
+            total_bytes,
+        )
+        self.sysex_transfer.start()
+        return self.sysex_transfer
+
+    def cancel_sysex(self):
+        if self.sysex_transfer is not None:
+            self.sysex_transfer.cancel()
+            self.sysex_transfer.wait()
+            self.sysex_transfer = None
+
+    def send_patch(self, library, ref, progress=None, finished=None):
         try:
-            status_message = "Midi "
-            if pc_number is not None:
-                program_change = mido.Message(
-                    "program_change", channel=self.midi_channel, program=pc_number
+            digest = library.resolve(ref)
+        except KeyError as e:
+            logging.error(f"Error sending SysEx patch: {e}")
+            self.window.update_status_bar(f"SysEx patch not found: {ref}")
+            return None
+        # Streamed straight out of the compressed library file
+        return self.send_sysex_file(
+            library.object_path(digest),
+            progress,
+            finished,
+            gzip.open,
+            library.entry(digest)["size"],
+        )
+
+    def start_librarian(self, library, port_name=None, gap=0.5, request=None):
+        if self.librarian is not None:
+            return self.librarian
+        recorder = LibrarianRecorder(library, self.midi_output_name, gap)
+        feedback = self.feedback_input_name
+        if self.feedback_input is not None and port_name in (None, feedback):
+            self.message_listeners.append(recorder.post)
+        else:
+            try:
+                self.librarian_input = self.add_input(port_name)
+            except Exception as e:
+                logging.error(f"Error opening MIDI input for the librarian: {e}")
+                self.window.update_status_bar(f"Error opening MIDI input: {e}")
+                return None
+            self.librarian_consumer = self.input_mux.add_consumer(
+                InputConsumer(
+                    "librarian",
+                    lambda captured: recorder.post(captured.message),
+                    self.input_queue_size,
+                    [self.librarian_input],
+                )
+            )
+        recorder.start()
+        self.librarian = recorder
+        if request:
+            self.send_messages(
+                [mido.Message.from_bytes(request)],
+                "SysEx dump requested",
+                source="librarian",
+                always_send=True,
+            )
+        return recorder
+
+    def stop_librarian(self):
+        if self.librarian is None:
+            return None
+        if self.librarian.post in self.message_listeners:
+            self.message_listeners.remove(self.librarian.post)
+        if self.librarian_input is not None:
+            self.input_mux.remove_consumer(self.librarian_consumer)
+            self.input_mux.remove_port(self.librarian_input)
+            self.librarian_input = None
+            self.librarian_consumer = None
+        summary = self.librarian.stop()
+        self.librarian = None
+        return summary
+
+    def stop_controls(self):
+        if self.cc_coalescer is not None:
+            self.cc_coalescer.stop()
+            self.cc_coalescer = None
+
+    def send_messages(
+        self,
+        messages,
+        status_message,
+        started=None,
+        source=None,
+        always_send=False,
+        lane=None,
+        warn=True,
+    ):
+        # Callers off the GUI thread pass warn=False, message boxes are GUI only
+        if self.midi_output is None:
+            supervisor = self.reconnect_supervisor
+            if supervisor is not None and supervisor.hold(messages):
+                self.window.update_status_bar(
+                    f"{status_message} (queued until the MIDI output reconnects)"
                 )
-                self.midi_output.send(program_change)
-                status_message += f"Program: {pc_number}"
+                return
+            if self.midi_output is None:
+                if warn:
+                    self.warn_output_missing()
+                else:
+                    logging.warning(f"No MIDI output for: {status_message}")
+                return
 
-            if cc_number is not None and cc_value is not None:
-                cc_message = mido.Message(
-                    "control_change",
-                    channel=self.midi_channel,
-                    control=cc_number,
-                    value=cc_value,
+        port = self.midi_output_name
+        if self.suppress_redundant and not always_send:
+            messages = self.device_state.changed_messages(port, messages)
+            if not messages:
+                self.window.update_status_bar(f"{status_message} (already active)")
+                return
+
+        sent = 0
+        # Only the output scheduler has lanes, other ports send in call order
+        laned = lane is not None and isinstance(self.midi_output, OutputScheduler)
+        try:
+            for message in messages:
+                self.transmit(
+                    self.midi_output, port, message, source, lane if laned else None
                 )
-                self.midi_output.send(cc_message)
-                status_message += f"Control: {cc_number} Value: {cc_value}"
+                sent += 1
+            if started is not None:
+                latency = (time.perf_counter() - started) * 1000
+                status_message += f" ({latency:.2f} ms)"
             self.window.update_status_bar(status_message)
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
+            if self.reconnect_supervisor is not None:
+                self.reconnect_supervisor.connection_lost(e, messages[sent:])
+
+    def transmit(self, output, port, message, source=None, lane=None):
+        if lane is None:
+            output.send(message)
+        else:
+            output.send(message, lane)
+        self.device_state.update(port, message)
+        log_midi_event("sent", message, port, source)
+        if self.journal is not None:
+            self.journal.record_message(SENT, message, source)
+
+    def panic(self):
+        output = self.midi_output
+        transfer = self.sysex_transfer
+        if transfer is not None:
+            transfer.cancel()
+            # The scheduler only sends whole messages, so its panic never splits
+            # one. A transfer writing straight to the port stops after its
+            # current chunk, which is waited for briefly, never joined
+            if not isinstance(output, OutputScheduler):
+                transfer.wait(PANIC_TRANSFER_WAIT)
+        if self.cc_coalescer is not None:
+            self.cc_coalescer.cancel()
+        # Nothing held for a reconnect may go out after the panic
+        dropped = 0
+        if self.reconnect_supervisor is not None:
+            dropped = self.reconnect_supervisor.discard_pending()
+        if output is None:
+            self.warn_output_missing()
+            return None
+        try:
+            if isinstance(output, OutputScheduler):
+                dropped += output.panic()
+            else:
+                running = transfer is not None and transfer.running
+                if running and hasattr(output, "send_bytes"):
+                    # Still mid-message: end it so the device leaves SysEx mode
+                    output.send_bytes(bytes([SYSEX_END]))
+                for message in self.panic_messages:
+                    output.send(message)
+        except Exception as e:
+            logging.error(f"Error sending MIDI panic: {e}")
+            return None
+        # Controllers were reset, so nothing on the device can be assumed any more
+        self.device_state.forget(self.midi_output_name)
+        logging.warning(f"MIDI panic sent to {self.midi_output_name}")
+        if self.journal is not None:
+            self.journal.mark("panic")
+        self.window.update_status_bar(
+            f"MIDI panic: all notes and sounds off ({dropped} queued messages dropped)"
+        )
+        return dropped
+
+    def warn_output_missing(self):
+        QMessageBox.warning(
+            None,
+            "MIDI output port not found",
+            "Please connect a valid MIDI output port and try again",
+        )
+
+    def close_output(self):
+        if self.midi_output is not None:
+            self.midi_output.close()
+            self.midi_output = None
+
+    def output_stats(self):
+        if isinstance(self.midi_output, OutputScheduler):
+            return self.midi_output.stats()
+        return None
 
     def get_output(self):
-        return mido.get_output_names()
+        return self.transport.output_names()
 
     def open_output(self, selected_port):
-        return mido.open_output(selected_port)
+        if self.isolated_output:
+            return IsolatedOutput(
+                self.transport.name, selected_port, elevated=self.isolated_priority
+            )
+        return self.transport.open(selected_port)
@@ -0,0 +1,317 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import mido
+
+# 31250 baud with a start and a stop bit around every byte
+DIN_BYTES_PER_SECOND = 3125
+
+# Lanes in priority order: a queued program switch never waits behind CC ramps
+# or a SysEx transfer
+LANE_SWITCH = 0
+LANE_CONTROL = 1
+LANE_BULK = 2
+LANE_NAMES = ("switch", "control", "bulk")
+
+# All sound off, reset all controllers, all notes off
+PANIC_CONTROLLERS = (120, 121, 123)
+PANIC = object()
+
+
+def message_lane(message):
+    if message.type == "sysex":
+        return LANE_BULK
+    return LANE_SWITCH
+
+
+def panic_messages():
+    return [
+        mido.Message("control_change", channel=channel, control=control, value=0)
+        for channel in range(16)
+        for control in PANIC_CONTROLLERS
+    ]
+
+
+def panic_bytes(running_status=True):
+    encoder = RunningStatusEncoder(timeout=None)
+    data = bytearray()
+    for message in panic_messages():
+        message_bytes = message.bytes()
+        data += (
+            encoder.encode(message_bytes) if running_status else bytes(message_bytes)
+        )
+    return bytes(data)
+
+
+class RunningStatusEncoder:
+    def __init__(self, timeout=1.0, clock=time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self.running_status = None
+        self.last_encoded = 0.0
+        self.bytes_saved = 0
+
+    def encode(self, data):
+        status = data[0]
+        now = self.clock()
+        # Receivers that missed a status byte resync after an idle period
+        if self.timeout is not None and now - self.last_encoded > self.timeout:
+            self.running_status = None
+        self.last_encoded = now
+
+        if status >= 0xF8:
+            return bytes(data)
+        if status >= 0xF0:
+            self.running_status = None
+            return bytes(data)
+        if status == self.running_status:
+            self.bytes_saved += 1
+            return bytes(data[1:])
+        self.running_status = status
+        return bytes(data)
+
+    def reset(self):
+        self.running_status = None
+
+
+class OutputScheduler:
+    def __init__(
+        self,
+        port,
+        bytes_per_second=DIN_BYTES_PER_SECOND,
+        buffer_size=32,
+        running_status=True,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        on_error=None,
+        close_timeout=1.0,
+    ):
+        self.port = port
+        self.on_error = on_error
+        self.close_timeout = close_timeout
+        self.name = getattr(port, "name", None)
+        self.bytes_per_second = bytes_per_second
+        self.buffer_time = buffer_size / bytes_per_second
+        self.clock = clock
+        self.sleep = sleep
+        # Running status needs a byte stream, mido ports take whole messages
+        self.byte_stream = hasattr(port, "send_bytes")
+        self.encoder = None
+        if running_status and self.byte_stream:
+            self.encoder = RunningStatusEncoder(clock=clock)
+        # Built once per port, so a panic costs a single write
+        self.panic_messages = panic_messages()
+        self.panic_data = panic_bytes(self.encoder is not None)
+        self.lanes = [deque() for _ in LANE_NAMES]
+        self.condition = threading.Condition()
+        # Serialises port writes between the worker and realtime senders
+        self.port_lock = threading.Lock()
+        self.unfinished = 0
+        self.panic_requested = False
+        self.panic_sending = False
+        self.stopping = False
+        self.wire_free_at = 0.0
+        self.messages_sent = 0
+        self.lane_sent = [0] * len(LANE_NAMES)
+        self.realtime_sent = 0
+        self.wire_bytes = 0
+        self.max_queue_depth = 0
+        self.dropped = 0
+        self.panics = 0
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self.run, name="midi-output-scheduler", daemon=True
+        )
+        self.thread.start()
+
+    def send(self, message, lane=None):
+        if self.closed:
+            raise IOError("Output scheduler is closed")
+        if lane is None:
+            lane = message_lane(message)
+        with self.condition:
+            self.lanes[lane].append(message)
+            self.unfinished += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            self.condition.notify_all()
+
+    def send_realtime(self, message):
+        # Clock and transport messages skip the lanes: they are written from the
+        # caller's thread straight away, between two queued messages at worst
+        if self.closed:
+            raise IOError("Output scheduler is closed")
+        with self.port_lock:
+            if self.byte_stream:
+                self.port.send_bytes(bytes(message.bytes()))
+            else:
+                self.port.send(message)
+            self.account(len(message.bytes()))
+            self.realtime_sent += 1
+
+    def panic(self):
+        # Everything still queued is dropped, the panic goes out next
+        with self.condition:
+            dropped = self.queue_depth
+            for lane in self.lanes:
+                lane.clear()
+            self.unfinished -= dropped
+            self.dropped += dropped
+            self.panic_requested = True
+            self.condition.notify_all()
+        return dropped
+
+    def next_message(self):
+        with self.condition:
+            while True:
+                if self.panic_requested:
+                    self.panic_requested = False
+                    self.panic_sending = True
+                    return None, PANIC
+                for lane, messages in enumerate(self.lanes):
+                    if messages:
+                        return lane, messages.popleft()
+                if self.stopping:
+                    return None, None
+                self.condition.wait()
+
+    def run(self):
+        while True:
+            lane, message = self.next_message()
+            if message is None:
+                return
+            try:
+                if message is PANIC:
+                    self.transmit_panic()
+                else:
+                    self.transmit(message)
+                    self.lane_sent[lane] += 1
+            except Exception as e:
+                logging.error(f"Error sending MIDI message: {e}")
+                self.report_error(e, message)
+            finally:
+                if message is PANIC:
+                    self.panic_done()
+                else:
+                    self.task_done()
+
+    def report_error(self, error, message):
+        # A failed send usually means the port is gone: the failed message and
+        # everything still queued go back to the owner, e.g. to be held until
+        # the output reconnects
+        if self.on_error is None or self.closed:
+            return
+        unsent = []
+        with self.condition:
+            for lane in self.lanes:
+                unsent.extend(lane)
+                lane.clear()
+            self.unfinished -= len(unsent)
+        if message is not PANIC:
+            unsent.insert(0, message)
+        self.on_error(error, unsent)
+
+    def panic_done(self):
+        with self.condition:
+            self.panic_sending = False
+            self.condition.notify_all()
+
+    def task_done(self):
+        with self.condition:
+            self.unfinished -= 1
+            if not self.unfinished:
+                self.condition.notify_all()
+
+    def wait_for_wire(self):
+        # Only let the interface buffer hold buffer_size bytes ahead of the wire
+        delay = self.wire_free_at - self.buffer_time - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+    def account(self, length):
+        now = self.clock()
+        self.wire_free_at = max(now, self.wire_free_at) + (
+            length / self.bytes_per_second
+        )
+        self.wire_bytes += length
+
+    def transmit(self, message):
+        data = message.bytes()
+        if self.encoder is not None:
+            data = self.encoder.encode(data)
+
+        self.wait_for_wire()
+        with self.port_lock:
+            if self.byte_stream:
+                self.port.send_bytes(bytes(data))
+            else:
+                self.port.send(message)
+            self.account(len(data))
+        self.messages_sent += 1
+
+    def transmit_panic(self):
+        if not self.byte_stream:
+            for message in self.panic_messages:
+                self.transmit(message)
+        else:
+            self.wait_for_wire()
+            with self.port_lock:
+                self.port.send_bytes(self.panic_data)
+                self.account(len(self.panic_data))
+            self.messages_sent += len(self.panic_messages)
+            if self.encoder is not None:
+                # The panic ran its own running status, start afresh after it
+                self.encoder.reset()
+        self.panics += 1
+
+    @property
+    def queue_depth(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    @property
+    def bytes_saved(self):
+        return self.encoder.bytes_saved if self.encoder is not None else 0
+
+    def stats(self):
+        stats = {
+            "messages_sent": self.messages_sent,
+            "wire_bytes": self.wire_bytes,
+            "running_status": self.encoder is not None,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "dropped": self.dropped,
+            "panics": self.panics,
+            "realtime_sent": self.realtime_sent,
+        }
+        for name, sent in zip(LANE_NAMES, self.lane_sent):
+            stats[f"{name}_sent"] = sent
+        # Only byte stream ports get running status, mido ports take whole messages
+        if self.encoder is not None:
+            stats["bytes_saved"] = self.bytes_saved
+        return stats
+
+    def drain(self):
+        with self.condition:
+            while self.unfinished or self.panic_requested or self.panic_sending:
+                self.condition.wait()
+
+    def close(self):
+        # Whatever is still queued is dropped, call drain() first to send it
+        if self.closed:
+            return
+        self.closed = True
+        with self.condition:
+            dropped = self.queue_depth
+            for lane in self.lanes:
+                lane.clear()
+            self.unfinished -= dropped
+            self.dropped += dropped
+            self.stopping = True
+            self.condition.notify_all()
+        if dropped:
+            logging.warning(f"Dropped {dropped} queued MIDI messages on close")
+        # Closed from the worker itself when an error handler closes the output
+        if threading.current_thread() is not self.thread:
+            self.thread.join(self.close_timeout)
+        self.port.close()
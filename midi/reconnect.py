@@ -0,0 +1,214 @@
+import logging
+import threading
+from collections import OrderedDict
+
+IDLE = "idle"
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+
+
+def message_key(message):
+    # Only the latest message per destination matters once the port is back
+    if message.type == "program_change":
+        return (message.type, message.channel)
+    if message.type == "control_change":
+        return (message.type, message.channel, message.control)
+    return (message.type, id(message))
+
+
+class PendingSends:
+    def __init__(self, max_size=16):
+        self.max_size = max_size
+        self.messages = OrderedDict()
+        self.dropped = 0
+
+    def add(self, message):
+        key = message_key(message)
+        if key in self.messages:
+            del self.messages[key]
+            self.dropped += 1
+        self.messages[key] = message
+        if len(self.messages) > self.max_size:
+            self.messages.popitem(last=False)
+            self.dropped += 1
+
+    def take(self):
+        messages = list(self.messages.values())
+        self.messages.clear()
+        return messages
+
+    def restore(self, messages):
+        # Unsent messages go back ahead of those held since, unless replaced
+        newer = self.messages
+        self.messages = OrderedDict(
+            (message_key(message), message)
+            for message in messages
+            if message_key(message) not in newer
+        )
+        self.messages.update(newer)
+        while len(self.messages) > self.max_size:
+            self.messages.popitem(last=False)
+            self.dropped += 1
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class ReconnectSupervisor:
+    def __init__(
+        self,
+        midi_handler,
+        on_state_change=None,
+        list_ports=None,
+        min_delay=0.25,
+        max_delay=4.0,
+        poll_interval=1.0,
+        max_pending=16,
+    ):
+        self.midi_handler = midi_handler
+        self.on_state_change = on_state_change
+        self.list_ports = list_ports or midi_handler.get_output
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.pending = PendingSends(max_pending)
+        self.port_name = None
+        self.state = IDLE
+        self.attempts = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="midi-reconnect", daemon=True
+        )
+        self.thread.start()
+
+    def watch(self, port_name, connected=True):
+        with self.lock:
+            self.port_name = port_name
+            self.attempts = 0
+            if not port_name:
+                self.set_state(IDLE)
+            else:
+                self.set_state(CONNECTED if connected else RECONNECTING)
+        self.wake.set()
+
+    def hold(self, messages):
+        # Returns False when the output is back and the caller can send itself
+        with self.lock:
+            if self.state != RECONNECTING:
+                return False
+            for message in messages:
+                self.pending.add(message)
+            return True
+
+    def connection_lost(self, error=None, unsent=()):
+        with self.lock:
+            if not self.port_name:
+                return
+            for message in unsent:
+                self.pending.add(message)
+            if self.state == RECONNECTING:
+                return
+            logging.error(f"MIDI output '{self.port_name}' lost: {error}")
+            self.close_output()
+            self.attempts = 0
+            self.set_state(RECONNECTING)
+        self.wake.set()
+
+    def close_output(self):
+        midi_output = self.midi_handler.midi_output
+        self.midi_handler.midi_output = None
+        self.midi_handler.device_state.forget(self.port_name)
+        if midi_output is not None:
+            try:
+                midi_output.close()
+            except Exception as e:
+                logging.error(f"Error closing MIDI output: {e}")
+
+    def set_state(self, state):
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def run(self):
+        delay = self.min_delay
+        while not self.stopped.is_set():
+            if self.state == RECONNECTING:
+                if self.reconnect():
+                    delay = self.min_delay
+                    continue
+                self.wake.wait(delay)
+                delay = min(delay * 2, self.max_delay)
+            elif self.state == CONNECTED:
+                self.wake.wait(self.poll_interval)
+                self.check_port()
+            else:
+                self.wake.wait()
+            self.wake.clear()
+
+    def check_port(self):
+        port_name = self.port_name
+        if self.state != CONNECTED or not port_name:
+            return
+        try:
+            available = port_name in self.list_ports()
+        except Exception as e:
+            logging.error(f"Error listing MIDI outputs: {e}")
+            return
+        if not available:
+            self.connection_lost("port disappeared")
+
+    def reconnect(self):
+        # Opening the port and flushing can take seconds, e.g. while the isolated
+        # sender process starts, so the lock is only held to check and publish
+        with self.lock:
+            if self.state != RECONNECTING:
+                return True
+            self.attempts += 1
+            port_name = self.port_name
+        try:
+            midi_output = self.midi_handler.wrap_output(
+                self.midi_handler.open_output(port_name)
+            )
+        except Exception as e:
+            logging.info(f"Reconnect attempt {self.attempts} failed: {e}")
+            return False
+        # Held messages go out before the new port is published, so nothing
+        # sent meanwhile can be overtaken by an older held message
+        while True:
+            with self.lock:
+                if self.state != RECONNECTING or self.port_name != port_name:
+                    # The output was changed meanwhile
+                    midi_output.close()
+                    return True
+                pending = self.pending.take()
+                if not pending:
+                    self.midi_handler.midi_output = midi_output
+                    self.midi_handler.midi_output_name = port_name
+                    logging.warning(
+                        f"MIDI output '{port_name}' reconnected after {self.attempts} attempts"
+                    )
+                    self.set_state(CONNECTED)
+                    return True
+            try:
+                while pending:
+                    self.midi_handler.transmit(
+                        midi_output, port_name, pending[0], "reconnect"
+                    )
+                    pending.pop(0)
+            except Exception as e:
+                logging.info(f"Reconnect attempt {self.attempts} failed: {e}")
+                with self.lock:
+                    self.pending.restore(pending)
+                midi_output.close()
+                return False
+
+    def discard_pending(self):
+        with self.lock:
+            return len(self.pending.take())
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        self.thread.join()
@@ -0,0 +1,361 @@
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import statistics
+import struct
+import threading
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import mido
+
+from midi.output_scheduler import OutputScheduler
+from midi.transports import get_transport
+
+# write index, read index, capacity
+HEADER = struct.Struct("<QQQ")
+# enqueue time, length, flags, data
+RECORD = struct.Struct("<dBB22s")
+RECORD_DATA_SIZE = 22
+CONTINUED = 0x80
+
+
+class SendRing:
+    # Single producer, single consumer. Each side only writes its own index,
+    # and the producer publishes records by advancing the write index last.
+    # Long messages span several records and may be published a few records
+    # at a time, the consumer keeps the unfinished part between takes.
+    def __init__(self, buffer, capacity):
+        self.buffer = buffer
+        self.capacity = capacity
+        self.partial = b""
+
+    @classmethod
+    def size_for(cls, capacity):
+        return HEADER.size + capacity * RECORD.size
+
+    @classmethod
+    def create(cls, buffer, capacity):
+        HEADER.pack_into(buffer, 0, 0, 0, capacity)
+        return cls(buffer, capacity)
+
+    @classmethod
+    def attach(cls, buffer):
+        return cls(buffer, HEADER.unpack_from(buffer, 0)[2])
+
+    @staticmethod
+    def chunks(data):
+        chunks = []
+        for start in range(0, len(data), RECORD_DATA_SIZE):
+            end = start + RECORD_DATA_SIZE
+            chunks.append(data[start:end])
+        return chunks
+
+    def indexes(self):
+        write_index, read_index, _ = HEADER.unpack_from(self.buffer, 0)
+        return write_index, read_index
+
+    def __len__(self):
+        write_index, read_index = self.indexes()
+        return write_index - read_index
+
+    def put(self, timestamp, data):
+        chunks = self.chunks(data)
+        if len(self) + len(chunks) > self.capacity:
+            return False
+        self.write(timestamp, chunks)
+        return True
+
+    def write(self, timestamp, chunks):
+        # Writes as many of the message's remaining chunks as there is room for
+        write_index, read_index = self.indexes()
+        count = min(len(chunks), self.capacity - (write_index - read_index))
+        for number in range(count):
+            chunk = chunks[number]
+            flags = CONTINUED if number < len(chunks) - 1 else 0
+            offset = HEADER.size + (write_index % self.capacity) * RECORD.size
+            RECORD.pack_into(self.buffer, offset, timestamp, len(chunk), flags, chunk)
+            write_index += 1
+        if count:
+            struct.pack_into("<Q", self.buffer, 0, write_index)
+        return count
+
+    def take(self):
+        write_index, read_index = self.indexes()
+        while read_index < write_index:
+            offset = HEADER.size + (read_index % self.capacity) * RECORD.size
+            timestamp, length, flags, chunk = RECORD.unpack_from(self.buffer, offset)
+            read_index += 1
+            self.partial += chunk[:length]
+            if not flags & CONTINUED:
+                data, self.partial = self.partial, b""
+                yield timestamp, data
+        struct.pack_into("<Q", self.buffer, 8, read_index)
+
+
+def elevate_priority():
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(10))
+        return "SCHED_FIFO"
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(-10)
+        return "nice -10"
+    except (AttributeError, OSError) as e:
+        logging.info(f"Sender process keeps its default priority: {e}")
+        return None
+
+
+def run_sender(
+    shm_name, transport_name, port_name, doorbell, stop, connection, elevated, collect
+):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = SendRing.attach(shm.buf)
+    try:
+        port = get_transport(transport_name).open(port_name)
+    except Exception as e:
+        connection.send(("error", str(e)))
+        shm.close()
+        return
+    priority = elevate_priority() if elevated else None
+    byte_stream = hasattr(port, "send_bytes")
+    latencies = array("d")
+    sent = 0
+    # Everything allocated so far lives for the whole process; keep the
+    # collector away from the send loop
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+    connection.send(("ready", priority))
+
+    while True:
+        doorbell.acquire()
+        for timestamp, data in ring.take():
+            try:
+                if byte_stream:
+                    port.send_bytes(data)
+                else:
+                    port.send(mido.Message.from_bytes(data))
+            except Exception as e:
+                logging.error(f"Error sending MIDI message: {e}")
+            sent += 1
+            if collect:
+                latencies.append(time.perf_counter() - timestamp)
+        if stop.is_set() and not len(ring):
+            break
+
+    port.close()
+    connection.send(("stopped", sent, latencies.tobytes()))
+    del ring
+    shm.close()
+
+
+class IsolatedOutput:
+    def __init__(
+        self,
+        transport_name,
+        port_name,
+        capacity=1024,
+        elevated=False,
+        collect_latency=False,
+        timeout=10.0,
+        send_timeout=2.0,
+    ):
+        self.name = port_name
+        self.send_timeout = send_timeout
+        # The ring takes one producer at a time, sends come from several threads
+        self.lock = threading.Lock()
+        self.context = multiprocessing.get_context("spawn")
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=SendRing.size_for(capacity)
+        )
+        self.ring = SendRing.create(self.shm.buf, capacity)
+        self.doorbell = self.context.Semaphore(0)
+        self.stop_event = self.context.Event()
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(
+            target=run_sender,
+            args=(
+                self.shm.name,
+                transport_name,
+                port_name,
+                self.doorbell,
+                self.stop_event,
+                child_connection,
+                elevated,
+                collect_latency,
+            ),
+            name="midi-sender",
+            daemon=True,
+        )
+        self.process.start()
+        self.closed = False
+        self.sent = 0
+        self.latencies = None
+
+        if not self.connection.poll(timeout):
+            self.abort()
+            raise IOError(f"MIDI sender process did not start for '{port_name}'")
+        reply = self.connection.recv()
+        if reply[0] == "error":
+            self.abort()
+            raise IOError(reply[1])
+        self.priority = reply[1]
+
+    def send(self, message):
+        chunks = SendRing.chunks(bytes(message.bytes()))
+        timestamp = time.perf_counter()
+        deadline = time.monotonic() + self.send_timeout
+        with self.lock:
+            # A full ring waits for the sender to catch up, and messages larger
+            # than the ring are streamed through it a part at a time
+            while chunks:
+                if self.closed or not self.process.is_alive():
+                    raise IOError("MIDI sender process is not running")
+                written = self.ring.write(timestamp, chunks)
+                if written:
+                    self.doorbell.release()
+                    chunks = chunks[written:]
+                    deadline = time.monotonic() + self.send_timeout
+                elif time.monotonic() > deadline:
+                    raise IOError("MIDI sender ring buffer stayed full")
+                else:
+                    time.sleep(0.001)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.stop_event.set()
+        self.doorbell.release()
+        if self.connection.poll(5.0):
+            _, self.sent, latencies = self.connection.recv()
+            self.latencies = array("d")
+            self.latencies.frombytes(latencies)
+        self.process.join(5.0)
+        self.release()
+
+    def abort(self):
+        self.closed = True
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.release()
+
+    def release(self):
+        del self.ring
+        self.shm.close()
+        self.shm.unlink()
+
+
+class TimingPort:
+    def __init__(self):
+        self.name = "timing"
+        self.received = array("d")
+
+    def send(self, message):
+        self.received.append(time.perf_counter())
+
+    def close(self):
+        pass
+
+
+def ui_load(stop):
+    # Stands in for the Qt thread: allocation churn that triggers collections,
+    # and pure Python work that holds the GIL
+    while not stop.is_set():
+        garbage = [{"index": index, "items": [index] * 8} for index in range(20000)]
+        total = 0
+        for item in garbage:
+            total += item["index"]
+        del garbage
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "count": count,
+        "p50_ms": ordered[count // 2] * 1000,
+        "p99_ms": ordered[int(count * 0.99)] * 1000,
+        "p999_ms": ordered[min(count - 1, int(count * 0.999))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+def drive(port, count, rate, message):
+    interval = 1.0 / rate
+    sent_at = array("d")
+    next_send = time.perf_counter()
+    for _ in range(count):
+        while time.perf_counter() < next_send:
+            time.sleep(0)
+        sent_at.append(time.perf_counter())
+        port.send(message)
+        next_send += interval
+    return sent_at
+
+
+def benchmark(count=2000, rate=500, load=True, elevated=False):
+    message = mido.Message("control_change", control=7, value=64)
+    stop = threading.Event()
+    loader = threading.Thread(target=ui_load, args=(stop,), daemon=True)
+    if load:
+        loader.start()
+    try:
+        timing_port = TimingPort()
+        scheduler = OutputScheduler(timing_port, bytes_per_second=10**9)
+        sent_at = drive(scheduler, count, rate, message)
+        scheduler.drain()
+        scheduler.close()
+        in_process = [
+            received - sent for sent, received in zip(sent_at, timing_port.received)
+        ]
+
+        isolated_output = IsolatedOutput(
+            "memory", "benchmark", elevated=elevated, collect_latency=True
+        )
+        drive(isolated_output, count, rate, message)
+        isolated_output.close()
+        isolated = list(isolated_output.latencies)
+    finally:
+        stop.set()
+        if load:
+            loader.join()
+    return {
+        "in-process thread": percentiles(in_process),
+        f"isolated process ({isolated_output.priority or 'default priority'})": (
+            percentiles(isolated)
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare send latency of the in-process and isolated MIDI sender"
+    )
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500, help="messages per second")
+    parser.add_argument("--no-load", action="store_true", help="skip the UI load")
+    parser.add_argument("--elevated", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.count, args.rate, not args.no_load, args.elevated)
+    print(
+        f"{'mode':40} {'p50':>8} {'p99':>8} {'p99.9':>8} {'max':>8}  (ms, enqueue to send)"
+    )
+    for mode, result in results.items():
+        print(
+            f"{mode:40} {result['p50_ms']:8.3f} {result['p99_ms']:8.3f} "
+            f"{result['p999_ms']:8.3f} {result['max_ms']:8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
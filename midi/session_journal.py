@@ -0,0 +1,232 @@
+import argparse
+import mmap
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import mido
+
+MAGIC = b"MASJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+RECORD = struct.Struct("<QHBB4s")
+RECORD_DATA_SIZE = 4
+
+SENT = 0x01
+RECEIVED = 0x02
+TAG = 0x04
+MARK = 0x08
+CONTINUED = 0x80
+
+DEFAULT_CAPACITY = 65536
+
+JournalEntry = namedtuple("JournalEntry", ["timestamp_ns", "direction", "tag", "data"])
+
+
+class JournalError(Exception):
+    pass
+
+
+class SessionJournal:
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+        self.tag_ids = {}
+        self.lock = threading.Lock()
+        self.file = open(path, "w+b")
+        self.file.truncate(HEADER.size + capacity * RECORD.size)
+        self.buffer = mmap.mmap(self.file.fileno(), 0)
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, RECORD.size, 0)
+
+    def record(self, direction, data, tag=None):
+        timestamp_ns = time.monotonic_ns()
+        with self.lock:
+            if self.buffer is None:
+                return
+            tag_id = self._tag_id(tag)
+            self._write(timestamp_ns, tag_id, direction, bytes(data))
+
+    def record_message(self, direction, message, tag=None):
+        self.record(direction, message.bytes(), tag)
+
+    def mark(self, label):
+        self.record(MARK, b"", label)
+
+    def _tag_id(self, tag):
+        if tag is None:
+            return 0
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tag_ids) + 1
+            self.tag_ids[tag] = tag_id
+            self._write(time.monotonic_ns(), tag_id, TAG, str(tag).encode("utf-8"))
+        return tag_id
+
+    def _write(self, timestamp_ns, tag_id, flags, data):
+        # Payloads longer than one record continue in the following records
+        chunks = []
+        for start in range(0, len(data), RECORD_DATA_SIZE):
+            end = start + RECORD_DATA_SIZE
+            chunks.append(data[start:end])
+        chunks = chunks or [b""]
+        if self.count + len(chunks) > self.capacity:
+            self._grow(len(chunks))
+        for index, chunk in enumerate(chunks):
+            chunk_flags = flags | (CONTINUED if index < len(chunks) - 1 else 0)
+            RECORD.pack_into(
+                self.buffer,
+                HEADER.size + self.count * RECORD.size,
+                timestamp_ns,
+                tag_id,
+                chunk_flags,
+                len(chunk),
+                chunk,
+            )
+            self.count += 1
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, RECORD.size, self.count)
+
+    def _grow(self, needed):
+        while self.count + needed > self.capacity:
+            self.capacity *= 2
+        self.buffer.flush()
+        self.buffer.close()
+        self.file.truncate(HEADER.size + self.capacity * RECORD.size)
+        self.buffer = mmap.mmap(self.file.fileno(), 0)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer is not None:
+                self.buffer.flush()
+
+    def close(self):
+        with self.lock:
+            if self.buffer is None:
+                return
+            self.buffer.flush()
+            self.buffer.close()
+            self.buffer = None
+            self.file.truncate(HEADER.size + self.count * RECORD.size)
+            self.file.close()
+
+
+class JournalReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as journal_file:
+            self.buffer = mmap.mmap(journal_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.buffer.close()
+            raise JournalError(f"Not a session journal: {path}")
+        if version != VERSION:
+            self.buffer.close()
+            raise JournalError(f"Unsupported journal version {version}: {path}")
+        # A journal that was not closed cleanly may be larger than its records
+        available = (len(self.buffer) - HEADER.size) // RECORD.size
+        self.count = min(self.count, available)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+
+    def records(self):
+        start = HEADER.size
+        end = start + self.count * RECORD.size
+        view = memoryview(self.buffer)[start:end]
+        iterator = RECORD.iter_unpack(view)
+        try:
+            yield from iterator
+        finally:
+            # The mmap cannot be closed while the view is still exported
+            del iterator
+            view.release()
+
+    def entries(self, include_marks=True):
+        tags = {0: None}
+        pending = []
+        for timestamp_ns, tag_id, flags, length, data in self.records():
+            pending.append(data[:length])
+            if flags & CONTINUED:
+                continue
+            payload = b"".join(pending)
+            pending = []
+            if flags & TAG:
+                tags[tag_id] = payload.decode("utf-8")
+            elif flags & MARK:
+                if include_marks:
+                    yield JournalEntry(timestamp_ns, MARK, tags.get(tag_id), b"")
+            else:
+                yield JournalEntry(
+                    timestamp_ns, flags & (SENT | RECEIVED), tags.get(tag_id), payload
+                )
+
+    def messages(self, direction=SENT | RECEIVED):
+        for entry in self.entries(include_marks=False):
+            if entry.direction & direction:
+                yield entry, mido.Message.from_bytes(entry.data)
+
+
+def replay(reader, port, speed=1.0, direction=SENT, sleep=time.sleep):
+    # A speed of 0 sends every message back to back
+    sent = 0
+    first_timestamp_ns = None
+    started = time.monotonic()
+    for entry, message in reader.messages(direction):
+        if first_timestamp_ns is None:
+            first_timestamp_ns = entry.timestamp_ns
+        if speed > 0:
+            due = (entry.timestamp_ns - first_timestamp_ns) / 1e9 / speed
+            delay = due - (time.monotonic() - started)
+            if delay > 0:
+                sleep(delay)
+        port.send(message)
+        sent += 1
+    return sent
+
+
+def direction_label(direction):
+    return {SENT: "sent", RECEIVED: "received", MARK: "mark"}.get(direction, "?")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a session journal")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = subparsers.add_parser("dump", help="print every journal entry")
+    dump_parser.add_argument("journal")
+
+    replay_parser = subparsers.add_parser("replay", help="send the journal to a port")
+    replay_parser.add_argument("journal")
+    replay_parser.add_argument("port")
+    replay_parser.add_argument("--speed", type=float, default=1.0)
+    replay_parser.add_argument("--received", action="store_true")
+
+    args = parser.parse_args(argv)
+    with JournalReader(args.journal) as reader:
+        if args.command == "dump":
+            start = None
+            for entry in reader.entries():
+                if start is None:
+                    start = entry.timestamp_ns
+                elapsed = (entry.timestamp_ns - start) / 1e9
+                data = entry.data.hex(" ").upper()
+                print(
+                    f"{elapsed:12.6f} {direction_label(entry.direction):8} "
+                    f"{entry.tag or '-':24} {data}"
+                )
+        else:
+            direction = RECEIVED if args.received else SENT
+            with mido.open_output(args.port) as port:
+                sent = replay(reader, port, args.speed, direction)
+            print(f"Replayed {sent} messages to {args.port}")
+
+
+if __name__ == "__main__":
+    main()
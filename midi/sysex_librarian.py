@@ -0,0 +1,263 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from common.file_utils import atomic_write
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+MIN_PREFIX = 6
+
+
+def patch_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class PatchLibrary:
+    # Patches are stored once, gzip compressed and named by the SHA-256 of their
+    # bytes, so the same patch in many backups costs nothing. The manifest maps
+    # hashes to names and devices, so lookups never open the patch files.
+    # The librarian thread stores while the GUI thread resolves and lists.
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.objects_directory = os.path.join(directory, "objects")
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.patches = {}
+        self.names = {}
+        self.dirty = False
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as manifest_file:
+                self.patches = json.load(manifest_file)["patches"]
+        for digest, entry in sorted(
+            self.patches.items(), key=lambda item: item[1]["added"]
+        ):
+            for name in entry["names"]:
+                self.names[name] = digest
+
+    def __len__(self):
+        with self.lock:
+            return len(self.patches)
+
+    def __contains__(self, digest):
+        with self.lock:
+            return digest in self.patches
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_directory, digest[:2], digest[2:] + ".syx.gz")
+
+    def store(self, data, name, device=None):
+        with self.lock:
+            digest = patch_hash(data)
+            entry = self.patches.get(digest)
+            new = entry is None
+            if new:
+                path = self.object_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # mtime=0 keeps the stored bytes a function of the patch alone
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                atomic_write(path, compressed)
+                entry = {
+                    "names": [],
+                    "device": device,
+                    "size": len(data),
+                    "stored_size": len(compressed),
+                    "messages": data.count(0xF0),
+                    "added": time.time(),
+                }
+                self.patches[digest] = entry
+            if name not in entry["names"]:
+                entry["names"].append(name)
+            self.names[name] = digest
+            self.dirty = True
+            return digest, new
+
+    def resolve(self, ref):
+        with self.lock:
+            if ref in self.patches:
+                return ref
+            if ref in self.names:
+                return self.names[ref]
+            if len(ref) >= MIN_PREFIX:
+                matches = [digest for digest in self.patches if digest.startswith(ref)]
+                if len(matches) == 1:
+                    return matches[0]
+                if matches:
+                    raise KeyError(f"Patch '{ref}' is ambiguous")
+            raise KeyError(f"No patch '{ref}' in the library")
+
+    def entry(self, ref):
+        with self.lock:
+            return self.patches[self.resolve(ref)]
+
+    def open(self, ref):
+        return gzip.open(self.object_path(self.resolve(ref)), "rb")
+
+    def load(self, ref):
+        with self.open(ref) as patch_file:
+            return patch_file.read()
+
+    def save_manifest(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            manifest = {"version": MANIFEST_VERSION, "patches": self.patches}
+            atomic_write(
+                self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True)
+            )
+            self.dirty = False
+
+    def list(self, device=None):
+        with self.lock:
+            entries = [
+                (digest, entry)
+                for digest, entry in self.patches.items()
+                if device is None or entry["device"] == device
+            ]
+            return sorted(entries, key=lambda item: item[1]["added"])
+
+    def stats(self):
+        with self.lock:
+            return {
+                "patches": len(self.patches),
+                "size": sum(entry["size"] for entry in self.patches.values()),
+                "stored_size": sum(
+                    entry["stored_size"] for entry in self.patches.values()
+                ),
+            }
+
+
+class SysexAssembler:
+    # A patch dump is often several SysEx messages in a row; the dump ends when
+    # the input stays quiet for longer than the gap
+    def __init__(self, gap=0.5):
+        self.gap = gap
+        self.parts = []
+        self.last_time = None
+
+    def feed(self, message, timestamp):
+        if message.type != "sysex":
+            return None
+        completed = None
+        if self.parts and timestamp - self.last_time > self.gap:
+            completed = self.finish()
+        self.parts.append(bytes(message.bytes()))
+        self.last_time = timestamp
+        return completed
+
+    def flush(self, now=None):
+        if not self.parts:
+            return None
+        if now is not None and now - self.last_time <= self.gap:
+            return None
+        return self.finish()
+
+    def finish(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+class LibrarianRecorder:
+    def __init__(
+        self, library, device=None, gap=0.5, on_stored=None, clock=time.monotonic
+    ):
+        self.library = library
+        self.device = device
+        self.assembler = SysexAssembler(gap)
+        self.on_stored = on_stored
+        self.clock = clock
+        self.queue = queue.Queue()
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.dumps = 0
+        self.new = 0
+        self.thread = threading.Thread(
+            target=self.run, name="midi-librarian", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def post(self, message):
+        # Called on the MIDI input thread, storing happens on the librarian thread
+        self.queue.put((message, self.clock()))
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.assembler.gap)
+            except queue.Empty:
+                self.store(self.assembler.flush(self.clock()))
+                continue
+            if item is None:
+                self.store(self.assembler.flush())
+                return
+            message, timestamp = item
+            self.store(self.assembler.feed(message, timestamp))
+
+    def store(self, data):
+        if data is None:
+            return
+        self.dumps += 1
+        name = f"{self.device or 'patch'} {self.started} #{self.dumps:03d}"
+        try:
+            digest, new = self.library.store(data, name, self.device)
+            # Saved per dump, so a crash mid-backup keeps what was received
+            self.library.save_manifest()
+        except Exception as e:
+            logging.error(f"Error storing SysEx patch {name}: {e}")
+            return
+        if new:
+            self.new += 1
+        logging.info(f"Stored SysEx patch {name}: {digest[:12]} ({len(data)} bytes)")
+        if self.on_stored is not None:
+            self.on_stored(digest, name, new)
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.library.save_manifest()
+        return {
+            "dumps": self.dumps,
+            "new": self.new,
+            "duplicates": self.dumps - self.new,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MyAmpSwitcher SysEx patch library")
+    parser.add_argument("library", help="library folder, e.g. patches")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="list the stored patches")
+    list_parser.add_argument("--device")
+    export_parser = commands.add_parser("export", help="write a patch as a .syx file")
+    export_parser.add_argument("patch", help="patch name or hash prefix")
+    export_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    library = PatchLibrary(args.library)
+    if args.command == "list":
+        for digest, entry in library.list(args.device):
+            print(
+                f"{digest[:12]}  {entry['size']:>8}  {entry['device'] or '-':20} "
+                f"{', '.join(entry['names'])}"
+            )
+        stats = library.stats()
+        print(
+            f"{stats['patches']} patches, {stats['size']} bytes "
+            f"stored in {stats['stored_size']} bytes"
+        )
+    else:
+        with open(args.path, "wb") as sysex_file:
+            sysex_file.write(library.load(args.patch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+
+import mido
+
+SYSEX_START = 0xF0
+SYSEX_END = 0xF7
+
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+def read_sysex_messages(path, read_size=65536, opener=open):
+    # Yields one complete F0 ... F7 message at a time, so only the message being
+    # sent is held in memory, never the whole dump
+    with opener(path, "rb") as sysex_file:
+        current = None
+        while True:
+            block = sysex_file.read(read_size)
+            if not block:
+                break
+            position = 0
+            while position < len(block):
+                if current is None:
+                    start = block.find(SYSEX_START, position)
+                    if start == -1:
+                        break
+                    current = bytearray([SYSEX_START])
+                    position = start + 1
+                end = block.find(SYSEX_END, position)
+                stop = len(block) if end == -1 else end
+                if block.find(SYSEX_START, position, stop) != -1:
+                    raise ValueError(f"Unterminated SysEx message in {path}")
+                if end == -1:
+                    current += block[position:]
+                    break
+                end += 1
+                current += block[position:end]
+                yield bytes(current)
+                current = None
+                position = end
+        if current is not None:
+            raise ValueError(f"Unterminated SysEx message at the end of {path}")
+
+
+class SysexTransfer:
+    def __init__(
+        self,
+        port,
+        path,
+        chunk_size=256,
+        pause=0.02,
+        progress=None,
+        finished=None,
+        opener=open,
+        total_bytes=None,
+    ):
+        self.port = port
+        self.path = path
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.progress = progress
+        self.finished = finished
+        self.opener = opener
+        if total_bytes is None:
+            total_bytes = os.path.getsize(path)
+        self.total_bytes = total_bytes
+        self.sent_bytes = 0
+        self.messages_sent = 0
+        self.state = None
+        self.error = None
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name="midi-sysex-transfer", daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.state
+
+    def run(self):
+        try:
+            self.state = self.transfer()
+        except Exception as e:
+            logging.error(f"Error sending SysEx file {self.path}: {e}")
+            self.state = FAILED
+            self.error = str(e)
+        logging.info(
+            f"SysEx transfer {self.state}: {self.path}, "
+            f"{self.messages_sent} messages, {self.sent_bytes} bytes"
+        )
+        if self.finished is not None:
+            self.finished(self.state, self.sent_bytes, self.error)
+
+    def chunks(self, data, byte_stream):
+        # Ports that take whole messages get each SysEx message as one chunk
+        if not byte_stream:
+            yield data
+            return
+        for start in range(0, len(data), self.chunk_size):
+            end = start + self.chunk_size
+            yield data[start:end]
+
+    def transfer(self):
+        byte_stream = hasattr(self.port, "send_bytes")
+        # The output scheduler queues messages, wait for each one to leave
+        drain = getattr(self.port, "drain", None)
+        for data in read_sysex_messages(self.path, opener=self.opener):
+            sent_in_message = 0
+            for chunk in self.chunks(data, byte_stream):
+                if self.cancelled.is_set():
+                    if sent_in_message:
+                        # Terminate the partial message so the device leaves SysEx mode
+                        self.port.send_bytes(bytes([SYSEX_END]))
+                    return CANCELLED
+                if byte_stream:
+                    self.port.send_bytes(chunk)
+                else:
+                    self.port.send(mido.Message.from_bytes(chunk))
+                if drain is not None:
+                    drain()
+                sent_in_message += len(chunk)
+                self.sent_bytes += len(chunk)
+                if self.progress is not None:
+                    self.progress(self.sent_bytes, self.total_bytes)
+                if self.pause:
+                    # Gives slow devices time to digest, and wakes up on cancel
+                    self.cancelled.wait(self.pause)
+            self.messages_sent += 1
+        if self.progress is not None:
+            self.progress(self.total_bytes, self.total_bytes)
+        return DONE
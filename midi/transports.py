@@ -0,0 +1,305 @@
+import argparse
+import glob
+import logging
+import os
+import select
+import statistics
+import sys
+import threading
+import time
+
+import mido
+
+
+class MidoTransport:
+    name = "mido"
+
+    def output_names(self):
+        return mido.get_output_names()
+
+    def open(self, port_name):
+        return mido.open_output(port_name)
+
+
+class RawMidiPort:
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or path
+        self.fd = os.open(path, os.O_WRONLY)
+        self.closed = False
+
+    def send(self, message):
+        self.send_bytes(bytes(message.bytes()))
+
+    def send_bytes(self, data):
+        # A full device buffer can take only part of the data
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def close(self):
+        if not self.closed:
+            os.close(self.fd)
+            self.closed = True
+
+
+class RawMidiTransport:
+    # Writes straight to the ALSA rawmidi device, bypassing the sequencer
+    name = "rawmidi"
+    device_pattern = "/dev/snd/midiC*D*"
+
+    def devices(self):
+        devices = {}
+        for path in sorted(glob.glob(self.device_pattern)):
+            card, device = os.path.basename(path).lstrip("midiC").split("D")
+            devices[f"{self.card_name(card)} {card}:{device}"] = path
+        return devices
+
+    def card_name(self, card):
+        try:
+            with open(f"/proc/asound/card{card}/id") as card_id:
+                return card_id.read().strip()
+        except OSError:
+            return f"card{card}"
+
+    def output_names(self):
+        return list(self.devices())
+
+    def open(self, port_name):
+        path = self.devices().get(port_name, port_name)
+        return RawMidiPort(path, port_name)
+
+
+class MemoryPort:
+    def __init__(self, name="memory"):
+        self.name = name
+        self.messages = []
+        self.closed = False
+
+    def send(self, message):
+        self.messages.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+class MemoryTransport:
+    name = "memory"
+
+    def __init__(self):
+        self.ports = {}
+
+    def output_names(self):
+        return list(self.ports) or ["memory"]
+
+    def open(self, port_name):
+        port = MemoryPort(port_name)
+        self.ports[port_name] = port
+        return port
+
+
+class PipeOutputPort(RawMidiPort):
+    def __init__(self, fd, name):
+        self.path = None
+        self.name = name
+        self.fd = fd
+        self.closed = False
+
+
+class PipeInputPort:
+    def __init__(self, fd, name):
+        self.name = name
+        self.fd = fd
+        self.parser = mido.Parser()
+        self.closed = False
+
+    def fileno(self):
+        return self.fd
+
+    def read_available(self, timeout=0.0):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            self.parser.feed(os.read(self.fd, 4096))
+
+    def poll(self):
+        message = self.parser.get_message()
+        if message is None:
+            self.read_available()
+            message = self.parser.get_message()
+        return message
+
+    def receive(self, block=True, timeout=None):
+        if not block:
+            return self.poll()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        message = self.parser.get_message()
+        while message is None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self.read_available(remaining)
+            message = self.parser.get_message()
+        return message
+
+    def iter_pending(self):
+        self.read_available()
+        message = self.parser.get_message()
+        while message is not None:
+            yield message
+            message = self.parser.get_message()
+
+    def close(self):
+        if not self.closed:
+            os.close(self.fd)
+            self.closed = True
+
+
+class PipeTransport:
+    # A loopback stand-in for a real interface: what is sent can be read back
+    name = "pipe"
+
+    def __init__(self):
+        self.inputs = {}
+
+    def output_names(self):
+        return ["pipe"]
+
+    def open(self, port_name):
+        read_fd, write_fd = os.pipe()
+        self.inputs[port_name] = PipeInputPort(read_fd, port_name)
+        return PipeOutputPort(write_fd, port_name)
+
+    def open_input(self, port_name):
+        return self.inputs.pop(port_name)
+
+
+TRANSPORTS = {
+    "mido": MidoTransport,
+    "rawmidi": RawMidiTransport,
+    "memory": MemoryTransport,
+    "pipe": PipeTransport,
+}
+
+
+def get_transport(name):
+    try:
+        return TRANSPORTS[name]()
+    except KeyError:
+        logging.error(f"Unknown MIDI transport '{name}', using mido")
+        return MidoTransport()
+
+
+DEVICE_TRANSPORTS = ("mido", "rawmidi")
+
+
+def benchmark_port(port, count=10000, message=None):
+    message = message or mido.Message("control_change", control=7, value=64)
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter_ns()
+        port.send(message)
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+    return {
+        "count": count,
+        "mean_us": statistics.fmean(timings) / 1000,
+        "p50_us": timings[len(timings) // 2] / 1000,
+        "p99_us": timings[int(len(timings) * 0.99)] / 1000,
+        "max_us": timings[-1] / 1000,
+    }
+
+
+def drain(input_port, stop):
+    while not stop.is_set():
+        readable, _, _ = select.select([input_port.fd], [], [], 0.05)
+        if readable:
+            os.read(input_port.fd, 65536)
+
+
+def benchmark_stand_ins(count=10000):
+    results = {}
+
+    memory_port = MemoryTransport().open("memory")
+    results["memory"] = benchmark_port(memory_port, count)
+
+    pipe_transport = PipeTransport()
+    pipe_port = pipe_transport.open("pipe")
+    pipe_input = pipe_transport.open_input("pipe")
+    stop = threading.Event()
+    drainer = threading.Thread(target=drain, args=(pipe_input, stop), daemon=True)
+    drainer.start()
+    results["pipe"] = benchmark_port(pipe_port, count)
+    stop.set()
+    drainer.join()
+    pipe_port.close()
+    pipe_input.close()
+
+    rawmidi = RawMidiTransport()
+    for port_name in rawmidi.output_names():
+        if "virmidi" in port_name.lower() or "virtual" in port_name.lower():
+            port = rawmidi.open(port_name)
+            results[f"rawmidi ({port_name})"] = benchmark_port(port, count)
+            results[f"rawmidi ({port_name})"]["transport"] = "rawmidi"
+            port.close()
+            break
+
+    try:
+        port = mido.open_output("MyAmpSwitcher benchmark", virtual=True)
+    except Exception as e:
+        logging.info(f"Skipping mido benchmark: {e}")
+    else:
+        results[f"mido ({mido.backend.name})"] = benchmark_port(port, count)
+        results[f"mido ({mido.backend.name})"]["transport"] = "mido"
+        port.close()
+    return results
+
+
+def fastest_transport(results):
+    # Only transports that reach real devices are worth recommending
+    candidates = [
+        result
+        for result in results.values()
+        if result.get("transport") in DEVICE_TRANSPORTS
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda result: result["p99_us"])["transport"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MIDI output transports")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--transport", choices=list(TRANSPORTS))
+    parser.add_argument("--port", help="benchmark a real port of --transport")
+    args = parser.parse_args(argv)
+
+    if args.port:
+        transport = get_transport(args.transport or "mido")
+        port = transport.open(args.port)
+        try:
+            result = benchmark_port(port, args.count)
+            result["transport"] = transport.name
+            results = {f"{transport.name} ({args.port})": result}
+        finally:
+            port.close()
+    else:
+        results = benchmark_stand_ins(args.count)
+
+    print(
+        f"{'transport':32} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}  (us per send)"
+    )
+    for name, result in sorted(results.items(), key=lambda item: item[1]["p50_us"]):
+        print(
+            f"{name:32} {result['mean_us']:9.2f} {result['p50_us']:9.2f} "
+            f"{result['p99_us']:9.2f} {result['max_us']:9.2f}"
+        )
+    if sys.platform.startswith("linux") and not RawMidiTransport().output_names():
+        print("No rawmidi devices found, load snd-virmidi to benchmark rawmidi")
+    fastest = fastest_transport(results)
+    if fastest:
+        print(f'Fastest on this machine: set "output_transport": "{fastest}"')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+
+@pytest.fixture(scope="session")
+def qt_application():
+    # Widgets need a platform plugin, CI has no display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication(sys.argv[:1])
@@ -0,0 +1,101 @@
+import os
+import json
+import zipfile
+from common.bulk_import import bulk_import, content_hash, validate_source
+from common.file_utils import atomic_write
+from common.profile_schema import validate_profile
+
+
+def write_profile(directory, filename, profile_data, indent=None):
+    with open(os.path.join(directory, filename), "w") as profile_file:
+        json.dump(profile_data, profile_file, indent=indent)
+
+
+def make_profile(name, program):
+    return {
+        "name": name,
+        "channel": 1,
+        "buttons": [{"order": 0, "name": "clean", "program_change": program}],
+    }
+
+
+def test_validate_profile():
+    assert validate_profile(make_profile("Amp", 1)) == []
+    assert validate_profile([]) == ["profile must be an object"]
+    errors = validate_profile(
+        {
+            "name": "Amp",
+            "channel": 20,
+            "buttons": [{"program_change": 128}, {"cc_number": 1}, "button"],
+        }
+    )
+    assert errors == [
+        "channel must be between 0 and 15",
+        "buttons[0].program_change must be between 0 and 127",
+        "buttons[1] needs both cc_number and cc_value",
+        "buttons[2] must be an object",
+    ]
+
+
+def test_content_hash_ignores_formatting():
+    profile = make_profile("Amp", 1)
+    reordered = dict(reversed(list(profile.items())))
+    assert content_hash(profile) == content_hash(reordered)
+    assert content_hash(profile) != content_hash(make_profile("Amp", 2))
+
+
+def test_validate_source_reports_invalid_json():
+    name, _, digest, errors = validate_source(("broken.json", b"{"))
+    assert name == "broken.json"
+    assert digest is None
+    assert errors[0].startswith("invalid json")
+
+
+def test_bulk_import_directory(tmpdir):
+    source = tmpdir.mkdir("source")
+    profiles = tmpdir.mkdir("profiles")
+    write_profile(str(profiles), "existing.json", make_profile("Amp", 1), indent=4)
+    write_profile(str(source), "same.json", make_profile("Amp", 1))
+    write_profile(str(source), "new.json", make_profile("Amp", 2))
+    write_profile(str(source), "zz-copy.json", make_profile("Amp", 2))
+    write_profile(str(source), "bad.json", {"name": "Amp", "channel": "one"})
+    write_profile(str(profiles), "new.json", make_profile("Other", 3))
+
+    report = bulk_import(str(source), str(profiles), workers=0)
+
+    assert report.imported == ["new-2.json"]
+    assert report.duplicates == [
+        ("same.json", "existing.json"),
+        ("zz-copy.json", "new-2.json"),
+    ]
+    assert report.invalid == [("bad.json", ["channel must be an integer"])]
+    assert "Imported: 1" in report.format()
+
+
+def test_bulk_import_zip_in_process_pool(tmpdir):
+    archive_path = os.path.join(str(tmpdir), "profiles.zip")
+    profiles = tmpdir.mkdir("profiles")
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        for program in range(40):
+            archive.writestr(
+                f"bank/profile-{program}.json",
+                json.dumps(make_profile("Amp", program)),
+            )
+        archive.writestr("bank/readme.txt", "not a profile")
+
+    report = bulk_import(archive_path, str(profiles), workers=2, chunksize=8)
+
+    assert len(report.imported) == 40
+    assert sorted(os.listdir(str(profiles))) == sorted(report.imported)
+    with open(os.path.join(str(profiles), "profile-7.json")) as profile_file:
+        assert json.load(profile_file) == make_profile("Amp", 7)
+
+
+def test_atomic_write_replaces_file(tmpdir):
+    path = os.path.join(str(tmpdir), "profile.json")
+    atomic_write(path, "{}")
+    atomic_write(path, '{"name": "Amp"}')
+
+    with open(path) as profile_file:
+        assert json.load(profile_file) == {"name": "Amp"}
+    assert os.listdir(str(tmpdir)) == ["profile.json"]
@@ -0,0 +1,50 @@
+import mido
+from unittest.mock import MagicMock
+from gui.button_highlighter import ACTIVE_PROPERTY, ButtonHighlighter
+from midi.button_index import ButtonIndex
+
+
+def make_highlighter(buttons):
+    button_index = ButtonIndex()
+    button_index.add_profile("amp", buttons, 0)
+    highlighter = ButtonHighlighter(button_index)
+    widgets = [MagicMock() for _ in buttons]
+    highlighter.set_buttons("amp", widgets)
+    return highlighter, button_index, widgets
+
+
+def test_flush_highlights_the_matching_button(qt_application):
+    highlighter, _, widgets = make_highlighter(
+        [{"program_change": 1}, {"program_change": 2}]
+    )
+
+    highlighter.post(mido.Message("program_change", program=2))
+    highlighter.flush()
+
+    widgets[1].setProperty.assert_called_once_with(ACTIVE_PROPERTY, True)
+    assert not widgets[0].setProperty.called
+
+
+def test_reload_drops_matches_for_the_previous_buttons(qt_application):
+    highlighter, button_index, _ = make_highlighter(
+        [{"program_change": 1}, {"program_change": 2}]
+    )
+    highlighter.post(mido.Message("program_change", program=2))
+
+    button_index.add_profile("amp", [{"program_change": 1}], 0)
+    widgets = [MagicMock()]
+    highlighter.set_buttons("amp", widgets)
+    highlighter.flush()
+
+    assert highlighter.active == {}
+    assert not widgets[0].setProperty.called
+
+
+def test_stale_positions_past_the_end_are_skipped(qt_application):
+    highlighter, _, _ = make_highlighter([{"program_change": 1}, {"program_change": 2}])
+    highlighter.widgets = [MagicMock()]
+    highlighter.pending = {("program_change", 0): [("amp", 1)]}
+
+    highlighter.flush()
+
+    assert highlighter.active == {}
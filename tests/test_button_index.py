@@ -0,0 +1,48 @@
+import mido
+from midi.button_index import ButtonIndex, button_keys, group_key, message_key
+
+BUTTONS = [
+    {"name": "Clean", "program_change": 1},
+    {"name": "Lead", "program_change": 2, "cc_number": 102, "cc_value": 1},
+    {"name": "Boost", "cc_number": 102, "cc_value": 1},
+]
+
+
+def test_button_keys_and_groups():
+    keys = button_keys(BUTTONS[1], 3)
+    assert keys == [("program_change", 3, 2), ("control_change", 3, 102, 1)]
+    assert [group_key(key) for key in keys] == [
+        ("program_change", 3),
+        ("control_change", 3, 102),
+    ]
+    assert message_key(mido.Message("note_on")) is None
+
+
+def test_lookup_resolves_buttons_across_profiles():
+    index = ButtonIndex()
+    index.add_profile("amp.json", BUTTONS, 0)
+    index.add_profile("other.json", [{"name": "Crunch", "program_change": 1}], 0)
+
+    key, matches = index.lookup(mido.Message("program_change", channel=0, program=1))
+    assert key == ("program_change", 0, 1)
+    assert matches == [("amp.json", 0), ("other.json", 0)]
+
+    _, matches = index.lookup(
+        mido.Message("control_change", channel=0, control=102, value=1)
+    )
+    assert matches == [("amp.json", 1), ("amp.json", 2)]
+    _, matches = index.lookup(mido.Message("program_change", channel=1, program=1))
+    assert matches == []
+
+
+def test_reindexing_a_profile_replaces_its_entries():
+    index = ButtonIndex()
+    index.add_profile("amp.json", BUTTONS, 0)
+    index.add_profile("amp.json", BUTTONS[:1], 5)
+
+    assert index.lookup(mido.Message("program_change", channel=0, program=1))[1] == []
+    assert index.lookup(mido.Message("program_change", channel=5, program=1))[1] == [
+        ("amp.json", 0)
+    ]
+    index.remove_profile("amp.json")
+    assert len(index) == 0
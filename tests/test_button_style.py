@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock, patch
+from gui.button_style import ACTIVE_RULE, COLOR_PROPERTY, ButtonStyle
+
+
+def make_container():
+    container = MagicMock()
+    container.styleSheet.return_value = "QLabel{color: red;}"
+    return container
+
+
+def test_stylesheet_is_rebuilt_only_for_new_colors():
+    container = make_container()
+    button_style = ButtonStyle(container)
+
+    container.setStyleSheet.reset_mock()
+    button_style.prepare(["#ff0000", None, "#00ff00", "#ff0000"])
+    button_style.prepare(["#00ff00"])
+
+    container.setStyleSheet.assert_called_once()
+    stylesheet = container.setStyleSheet.call_args[0][0]
+    assert stylesheet.startswith("QLabel{color: red;}")
+    assert 'QPushButton[colorClass="c0"]{background: #ff0000;' in stylesheet
+    assert 'QPushButton[colorClass="c1"]{background: #00ff00;' in stylesheet
+    assert stylesheet.endswith(ACTIVE_RULE)
+
+
+def test_buttons_get_a_color_class_property():
+    container = make_container()
+    button_style = ButtonStyle(container)
+    button = MagicMock()
+    container.setStyleSheet.reset_mock()
+
+    button_style.style_button(button, "#0000ff")
+    button_style.style_button(MagicMock(), None)
+
+    button.setProperty.assert_called_once_with(COLOR_PROPERTY, "c0")
+    assert container.setStyleSheet.call_count == 1
+
+
+def test_fonts_are_cached():
+    button_style = ButtonStyle(make_container())
+    with patch("gui.button_style.QFont") as font_class:
+        first = button_style.font("Arial", 14)
+        assert button_style.font("Arial", 14) is first
+        button_style.font("Arial", 16)
+    assert font_class.call_count == 2
+
+
+def test_invalid_colors_are_left_out_of_the_stylesheet():
+    container = make_container()
+    button_style = ButtonStyle(container)
+    button = MagicMock()
+
+    button_style.prepare(["red", "red; } QWidget{background: black;"])
+    button_style.style_button(button, "red; } QWidget{background: black;")
+
+    stylesheet = container.setStyleSheet.call_args[0][0]
+    assert 'QPushButton[colorClass="c0"]{background: #ff0000;' in stylesheet
+    assert "QWidget" not in stylesheet
+    assert stylesheet.endswith(ACTIVE_RULE)
+    button.setProperty.assert_not_called()
@@ -0,0 +1,76 @@
+import mido
+import threading
+from unittest.mock import MagicMock
+from midi.cc_coalescer import ControlChangeCoalescer
+from midi.midi_handler import MidiHandler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_latest_value_wins_per_channel_and_control():
+    clock = FakeClock()
+    coalescer = ControlChangeCoalescer(MagicMock(), clock=clock)
+    for value in range(100):
+        coalescer.set(0, 7, value)
+    coalescer.set(1, 7, 5)
+    coalescer.set(0, 91, 64)
+
+    assert coalescer.due(clock.now) == [(0, 7, 99), (1, 7, 5), (0, 91, 64)]
+    assert coalescer.due(clock.now) == []
+    assert coalescer.stats()["received"] == 102
+
+
+def test_repeated_value_is_not_resent():
+    clock = FakeClock()
+    coalescer = ControlChangeCoalescer(MagicMock(), clock=clock)
+    coalescer.set(0, 7, 10)
+    coalescer.due(clock.now)
+    coalescer.set(0, 7, 10)
+    assert coalescer.due(clock.now) == []
+
+
+def test_smoothing_ramps_from_the_last_sent_value():
+    clock = FakeClock()
+    coalescer = ControlChangeCoalescer(MagicMock(), clock=clock)
+    coalescer.set(0, 7, 0, smoothing=0.1)
+    assert coalescer.due(clock.now) == [(0, 7, 0)]
+
+    coalescer.set(0, 7, 100, smoothing=0.1)
+    clock.now = 0.05
+    assert coalescer.due(clock.now) == [(0, 7, 50)]
+    clock.now = 0.2
+    assert coalescer.due(clock.now) == [(0, 7, 100)]
+    assert coalescer.ramps == {}
+
+
+def test_cancel_abandons_ramps():
+    clock = FakeClock()
+    coalescer = ControlChangeCoalescer(MagicMock(), clock=clock)
+    coalescer.set(0, 7, 0)
+    coalescer.due(clock.now)
+    coalescer.set(0, 7, 100, smoothing=1.0)
+    coalescer.cancel()
+    assert coalescer.due(clock.now) == []
+    assert coalescer.sent_values == {}
+
+
+def test_worker_sends_through_midi_handler():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = MagicMock()
+    midi_handler.set_midi_channel(2)
+    sent = threading.Event()
+    midi_handler.midi_output.send.side_effect = lambda message: sent.set()
+
+    midi_handler.set_control(7, 90)
+    assert sent.wait(2.0)
+    midi_handler.stop_controls()
+
+    midi_handler.midi_output.send.assert_called_once_with(
+        mido.Message("control_change", channel=2, control=7, value=90)
+    )
@@ -0,0 +1,172 @@
+import threading
+import mido
+from unittest.mock import MagicMock, call
+from midi.device_state import DeviceState
+from midi.midi_handler import MidiHandler
+
+
+def test_program_change_is_redundant_after_update():
+    device_state = DeviceState()
+    message = mido.Message("program_change", channel=1, program=3)
+
+    assert not device_state.is_redundant("amp", message)
+    device_state.update("amp", message)
+    assert device_state.is_redundant("amp", message)
+    assert not device_state.is_redundant("fx", message)
+    assert not device_state.is_redundant(
+        "amp", mido.Message("program_change", channel=2, program=3)
+    )
+
+
+def test_concurrent_updates_and_forget():
+    device_state = DeviceState()
+    errors = []
+
+    def update():
+        try:
+            for value in range(2000):
+                device_state.update(
+                    "amp", mido.Message("control_change", control=value % 100)
+                )
+                device_state.update("amp", mido.Message("program_change"))
+        except Exception as e:
+            errors.append(e)
+
+    def forget():
+        try:
+            for _ in range(2000):
+                device_state.forget("amp")
+                device_state.control("amp", 0, 1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for target in (update, forget)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_control_change_tracks_last_value():
+    device_state = DeviceState()
+    device_state.update("amp", mido.Message("control_change", control=7, value=64))
+
+    assert device_state.control("amp", 0, 7) == 64
+    assert device_state.is_redundant(
+        "amp", mido.Message("control_change", control=7, value=64)
+    )
+    assert not device_state.is_redundant(
+        "amp", mido.Message("control_change", control=7, value=65)
+    )
+
+
+def test_program_change_forgets_controls_on_its_channel():
+    device_state = DeviceState()
+    device_state.update("amp", mido.Message("control_change", channel=0, control=7))
+    device_state.update("amp", mido.Message("control_change", channel=1, control=7))
+    device_state.update("amp", mido.Message("program_change", channel=0, program=1))
+
+    assert device_state.control("amp", 0, 7) is None
+    assert device_state.control("amp", 1, 7) == 0
+
+
+def test_other_messages_are_never_redundant():
+    device_state = DeviceState()
+    sysex = mido.Message("sysex", data=[1])
+    device_state.update("amp", sysex)
+    assert not device_state.is_redundant("amp", sysex)
+
+
+def test_forget_port():
+    device_state = DeviceState()
+    device_state.update("amp", mido.Message("program_change", program=1))
+    device_state.update("fx", mido.Message("program_change", program=1))
+    device_state.forget("amp")
+
+    assert device_state.program("amp", 0) is None
+    assert device_state.program("fx", 0) == 1
+    device_state.forget()
+    assert device_state.program("fx", 0) is None
+
+
+def make_handler():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock, [])
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_output_name = "amp"
+    midi_handler.midi_channel = 0
+    midi_handler.suppress_redundant = True
+    return midi_handler
+
+
+def test_send_skips_redundant_messages():
+    midi_handler = make_handler()
+    send_action = midi_handler.compile_send(1, 2, 127)
+
+    send_action()
+    send_action()
+
+    assert midi_handler.midi_output.send.call_count == 2
+    midi_handler.window.update_status_bar.assert_called_with(
+        "Midi Program: 1Control: 2 Value: 127 (already active)"
+    )
+
+
+def test_send_only_changed_part_of_button():
+    midi_handler = make_handler()
+    midi_handler.compile_send(1, None, None)()
+    midi_handler.midi_output.send.reset_mock()
+
+    midi_handler.compile_send(1, 2, 127)()
+
+    assert midi_handler.midi_output.send.call_args_list == [
+        call(mido.Message("control_change", control=2, value=127))
+    ]
+
+
+def test_controls_after_a_new_program_are_sent():
+    device_state = DeviceState()
+    device_state.update("amp", mido.Message("program_change", program=3))
+    device_state.update("amp", mido.Message("control_change", control=7, value=100))
+    button = [
+        mido.Message("program_change", program=5),
+        mido.Message("control_change", control=7, value=100),
+    ]
+
+    assert device_state.changed_messages("amp", button) == button
+    assert device_state.control("amp", 0, 7) == 100
+
+
+def test_pc_and_cc_button_sends_its_cc_after_the_new_program():
+    midi_handler = make_handler()
+    midi_handler.compile_send(3, None, None)()
+    midi_handler.compile_send(None, 7, 100)()
+    midi_handler.midi_output.send.reset_mock()
+
+    midi_handler.compile_send(1, 7, 100)()
+
+    assert midi_handler.midi_output.send.call_args_list == [
+        call(mido.Message("program_change", program=1)),
+        call(mido.Message("control_change", control=7, value=100)),
+    ]
+
+
+def test_always_send_overrides_suppression():
+    midi_handler = make_handler()
+    send_action = midi_handler.compile_send(1, None, None, always_send=True)
+
+    send_action()
+    send_action()
+
+    assert midi_handler.midi_output.send.call_count == 2
+
+
+def test_feedback_input_updates_device_state():
+    midi_handler = make_handler()
+    midi_handler.handle_feedback_message(mido.Message("program_change", program=4))
+
+    midi_handler.compile_send(4, None, None)()
+
+    assert not midi_handler.midi_output.send.called
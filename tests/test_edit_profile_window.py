@@ -0,0 +1,30 @@
+import json
+import os
+from unittest.mock import MagicMock
+from gui.edit_profile_window import EditProfileWindow
+
+
+def test_save_replaces_the_profile_instead_of_mutating_it(qt_application, tmpdir):
+    with open(os.path.join(str(tmpdir), "settings.json"), "w") as settings_file:
+        json.dump({"profile": "amp.json"}, settings_file)
+    profile_data = {
+        "name": "Amp",
+        "channel": 0,
+        "tempo": 120,
+        "buttons": [{"order": 0, "name": "clean", "program_change": 1}],
+    }
+    original = json.loads(json.dumps(profile_data))
+    main_window = MagicMock()
+    window = EditProfileWindow(profile_data, main_window, str(tmpdir))
+    edited = {"name": "Amp", "channel": 2, "buttons": []}
+    window.json_text.setPlainText(json.dumps(edited))
+
+    window.save_and_close()
+
+    assert profile_data == original
+    saved = main_window.update_content.call_args[0][0]
+    assert saved == edited
+    assert saved is not profile_data
+    main_window.profile_manager.save_profile_data.assert_called_once_with(
+        "amp.json", edited
+    )
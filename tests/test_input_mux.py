@@ -0,0 +1,167 @@
+import time
+import mido
+from unittest.mock import MagicMock
+from midi.input_mux import CapturedMessage, InputConsumer, InputMultiplexer
+from midi.message_capture import MessageCapture
+from midi.midi_handler import MidiHandler
+from midi.transports import PipeTransport
+
+
+def pc(program, channel=0):
+    return mido.Message("program_change", channel=channel, program=program)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def open_pipes(*names):
+    # The readers stay in the transport until open_input takes them
+    transport = PipeTransport()
+    outputs = {name: transport.open(name) for name in names}
+    return transport, outputs
+
+
+def test_consumer_drops_oldest_when_full():
+    consumer = InputConsumer("recorder", maxsize=3)
+    for program in range(5):
+        consumer.offer(CapturedMessage("in", 0.0, pc(program)))
+
+    assert [captured.message.program for captured in consumer.drain()] == [2, 3, 4]
+    assert consumer.stats() == {"received": 5, "dropped": 2, "queued": 0}
+
+
+def test_consumer_filters_sources():
+    consumer = InputConsumer("thru", sources=["pedal"])
+    assert consumer.accepts(CapturedMessage("pedal", 0.0, pc(1)))
+    assert not consumer.accepts(CapturedMessage("amp", 0.0, pc(1)))
+
+
+def test_multiplexer_tags_messages_from_every_port():
+    transport, outputs = open_pipes("pedal", "keys")
+    inputs = {name: transport.open_input(name) for name in outputs}
+    mux = InputMultiplexer()
+    for name, port in inputs.items():
+        mux.add_port(name, port)
+    polled = mux.add_consumer(InputConsumer("recorder"))
+    handled = []
+    mux.add_consumer(InputConsumer("state", handled.append, sources=["pedal"]))
+    mux.start()
+    outputs["pedal"].send(pc(1))
+    outputs["keys"].send(pc(2, channel=3))
+    outputs["pedal"].send(pc(3))
+
+    assert wait_for(lambda: mux.stats()["ports"] == {"pedal": 2, "keys": 1})
+    captured = polled.drain()
+    assert sorted((item.source, item.message.program) for item in captured) == [
+        ("keys", 2),
+        ("pedal", 1),
+        ("pedal", 3),
+    ]
+    assert all(item.timestamp > 0 for item in captured)
+    assert wait_for(lambda: len(handled) == 2)
+    assert {item.source for item in handled} == {"pedal"}
+    mux.stop()
+    for port in outputs.values():
+        port.close()
+    assert all(port.closed for port in inputs.values())
+
+
+def test_multiplexer_removes_failing_ports():
+    port = MagicMock(spec=["iter_pending", "close"])
+    port.iter_pending.side_effect = IOError("unplugged")
+    mux = InputMultiplexer()
+    mux.add_port("pedal", port)
+
+    assert mux.poll() == 0
+    assert mux.port_names() == []
+    port.close.assert_called_once()
+
+
+def test_midi_handler_records_from_named_inputs():
+    transport, outputs = open_pipes("pedal", "keys")
+    capture = MessageCapture()
+    midi_handler = MidiHandler(MagicMock(), capture)
+    midi_handler.transport = transport
+
+    midi_handler.start_midi_input(["pedal", "keys"])
+    outputs["pedal"].send(pc(4))
+    outputs["keys"].send(pc(5))
+    assert wait_for(lambda: midi_handler.recorder_consumer.stats()["received"] == 2)
+    midi_handler.stop_midi_input()
+
+    assert sorted(message.program for message in capture) == [4, 5]
+    logged = [args[0][0] for args in midi_handler.window.midi_log.append.call_args_list]
+    assert sorted(logged) == [
+        "[keys] program_change channel=0 program=5 time=0",
+        "[pedal] program_change channel=0 program=4 time=0",
+    ]
+    assert midi_handler.input_mux.port_names() == []
+    midi_handler.stop_inputs()
+    for port in outputs.values():
+        port.close()
+
+
+def test_controller_inputs_update_state_and_route_thru():
+    transport, outputs = open_pipes("amp", "pedal")
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.transport = transport
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_output_name = "amp"
+    listener = MagicMock()
+    midi_handler.message_listeners.append(listener)
+
+    midi_handler.start_feedback_input("amp")
+    assert midi_handler.start_controller_inputs(["pedal", "missing"], thru=True) == [
+        "pedal"
+    ]
+    outputs["amp"].send(pc(1))
+    outputs["pedal"].send(pc(2))
+
+    assert wait_for(lambda: listener.call_count == 2)
+    assert wait_for(lambda: midi_handler.midi_output.send.call_count == 1)
+    assert midi_handler.midi_output.send.call_args[0][0].program == 2
+    assert midi_handler.input_stats()["consumers"]["thru"]["received"] == 1
+    midi_handler.stop_inputs()
+    assert midi_handler.input_stats() is None
+    for port in outputs.values():
+        port.close()
+
+
+def test_recorder_shares_and_leaves_the_feedback_input():
+    transport, outputs = open_pipes("amp", "pedal")
+    capture = MessageCapture()
+    midi_handler = MidiHandler(MagicMock(), capture)
+    midi_handler.transport = transport
+
+    midi_handler.start_feedback_input("amp")
+    midi_handler.start_midi_input(["amp", "pedal"])
+    outputs["amp"].send(pc(3))
+    assert wait_for(lambda: midi_handler.recorder_consumer.stats()["received"] == 1)
+    midi_handler.stop_midi_input()
+
+    assert [message.program for message in capture] == [3]
+    assert midi_handler.input_mux.port_names() == ["amp"]
+    midi_handler.stop_feedback_input()
+    assert midi_handler.input_mux.port_names() == []
+    midi_handler.stop_inputs()
+    for port in outputs.values():
+        port.close()
+
+
+def test_feedback_input_is_removed_by_its_registered_name():
+    midi_handler = MidiHandler(MagicMock())
+    port = MagicMock(spec=["name", "iter_pending", "close"])
+    port.name = "amp in 20:0"
+    port.iter_pending.return_value = []
+    midi_handler.open_input = MagicMock(return_value=port)
+
+    midi_handler.start_feedback_input("amp in")
+    midi_handler.stop_feedback_input()
+
+    assert midi_handler.input_mux.port_names() == []
+    port.close.assert_called_once()
+    midi_handler.stop_inputs()
@@ -0,0 +1,130 @@
+import mido
+import pytest
+from unittest.mock import MagicMock, patch
+from midi.input_mux import CapturedMessage
+from midi.latency_probe import (
+    LatencyProbe,
+    ProbeReport,
+    main,
+    parse_pair,
+    probe_message,
+    probe_sequence,
+)
+from midi.midi_handler import MidiHandler
+from midi.transports import PipeTransport
+
+
+def test_probe_sequence_round_trip():
+    for sequence in (0, 1, 127, 128, 2**28 - 1):
+        assert probe_sequence(probe_message(sequence)) == sequence
+    assert probe_sequence(mido.Message("program_change", program=1)) is None
+    assert probe_sequence(mido.Message("sysex", data=[0x7D, 0x00, 0x01])) is None
+
+
+def test_report_counts_loss_reordering_and_duplicates():
+    arrivals = [(0, 0.001), (2, 0.002), (1, 0.003), (2, 0.004), (4, 0.001)]
+    report = ProbeReport("amp", "pipe", 6, arrivals)
+
+    summary = report.summary()
+    assert summary["received"] == 4
+    assert summary["lost"] == 2
+    assert summary["reordered"] == 1
+    assert summary["duplicates"] == 1
+    assert summary["min_ms"] == 1.0
+    assert summary["max_ms"] == 3.0
+    assert "2 lost, 1 reordered" in report.format()
+
+
+def test_report_states_the_arrival_resolution():
+    arrivals = [(0, 0.001)]
+    assert "within 0.200 ms" in ProbeReport("amp", "mido", 1, arrivals, 0.0002).format()
+    assert (
+        "as the data arrives" in ProbeReport("amp", "pipe", 1, arrivals, 0.0).format()
+    )
+    assert "resolution_ms" not in ProbeReport("amp", "pipe", 1, arrivals).summary()
+
+
+def test_report_without_arrivals():
+    report = ProbeReport("amp", "mido", 10, [])
+    assert report.lost == 10
+    assert "p50_ms" not in report.summary()
+    assert "Round trip" not in report.format()
+
+
+def test_probe_ignores_other_messages():
+    probe = LatencyProbe(MagicMock(), MagicMock(), "amp", count=1)
+    probe.sent_at[0] = 1.0
+    probe.receive(CapturedMessage("amp", 1.5, mido.Message("program_change")))
+    probe.receive(CapturedMessage("amp", 1.5, probe_message(7)))
+    assert probe.arrivals == []
+
+    probe.receive(CapturedMessage("amp", 1.5, probe_message(0)))
+    assert probe.arrivals == [(0, 0.5)]
+    assert probe.complete.is_set()
+
+
+def test_parse_pair():
+    assert parse_pair("USB=Loop") == ("USB", "Loop")
+    assert parse_pair("USB") == ("USB", "USB")
+
+
+def test_midi_handler_measures_pipe_loopback():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.transport = PipeTransport()
+    midi_handler.midi_output = midi_handler.open_output("pipe")
+    midi_handler.midi_output_name = "pipe"
+    try:
+        report = midi_handler.run_latency_probe("pipe", count=50, interval=0.001)
+    finally:
+        midi_handler.stop_inputs()
+        midi_handler.close_output()
+
+    assert report.port == "pipe"
+    assert report.transport == "pipe"
+    assert report.received == 50
+    assert report.lost == 0
+    assert report.summary()["p50_ms"] >= 0
+    assert report.resolution == 0.0
+
+
+def test_probes_on_the_feedback_port_are_not_logged_or_journaled():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.journal = MagicMock()
+    listener = MagicMock()
+    midi_handler.message_listeners.append(listener)
+
+    with patch("midi.midi_handler.log_midi_event") as log_midi_event:
+        midi_handler.handle_captured_feedback(
+            CapturedMessage("amp", 1.0, probe_message(3))
+        )
+        midi_handler.handle_captured_feedback(
+            CapturedMessage("amp", 1.0, mido.Message("program_change", program=1))
+        )
+
+    assert log_midi_event.call_count == 1
+    assert midi_handler.journal.record_message.call_count == 1
+    assert listener.call_count == 1
+
+
+def test_midi_handler_needs_an_output():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = None
+    with pytest.raises(IOError):
+        midi_handler.run_latency_probe("pipe")
+
+
+def test_main_reports_each_pair(capsys):
+    main(
+        [
+            "--transport",
+            "pipe",
+            "--port",
+            "pipe",
+            "--count",
+            "20",
+            "--interval",
+            "1",
+        ]
+    )
+    output = capsys.readouterr().out
+    assert "pipe (pipe): 20/20 probes back, 0 lost" in output
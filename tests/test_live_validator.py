@@ -0,0 +1,82 @@
+import json
+import time
+from unittest.mock import MagicMock
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QLabel, QTextEdit
+from gui.live_validator import LiveValidator
+
+
+def process_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    QCoreApplication.processEvents()
+    return condition()
+
+
+def make_validator(text, validate, delay=50):
+    editor = QTextEdit()
+    editor.setPlainText(text)
+    error_label = QLabel()
+    validator = LiveValidator(editor, validate, error_label, delay=delay)
+    return editor, error_label, validator
+
+
+def checked(validator):
+    return lambda: validator.checked_generation == validator.generation
+
+
+def test_edits_are_debounced_into_one_background_check(qt_application):
+    validate = MagicMock(return_value=[])
+    editor, _, validator = make_validator('{"size": 1}', validate)
+    assert process_until(checked(validator))
+
+    for size in range(2, 6):
+        editor.setPlainText(json.dumps({"size": size}))
+    assert process_until(checked(validator))
+    validator.stop()
+
+    assert [call[0][0] for call in validate.call_args_list] == [
+        {"size": 1},
+        {"size": 5},
+    ]
+    assert validator.data == {"size": 5}
+
+
+def test_background_errors_are_shown(qt_application):
+    states = []
+    editor, error_label, validator = make_validator(
+        '{\n    "size": -1\n}', lambda data: ["size must be a positive integer"]
+    )
+    validator.state_changed.connect(states.append)
+    assert process_until(lambda: states)
+
+    editor.setPlainText('{\n    "size": \n}')
+    assert process_until(lambda: len(states) == 2)
+    validator.stop()
+
+    assert states == [False, False]
+    assert validator.data is None
+    assert error_label.text().startswith("Line 3: Invalid JSON")
+
+
+def test_stale_results_are_ignored(qt_application):
+    editor, _, validator = make_validator("{}", lambda data: [])
+    assert process_until(checked(validator))
+    validator.stop()
+
+    validator.generation += 1
+    validator.show_result(validator.generation - 1, None, [(1, "stale")])
+
+    assert validator.errors == []
+    assert validator.data == {}
+
+
+def test_current_checks_unvalidated_text_at_once(qt_application):
+    editor, _, validator = make_validator("{}", lambda data: [], delay=10000)
+    assert process_until(checked(validator))
+
+    editor.setPlainText('{"size": 2}')
+    assert validator.current() == ({"size": 2}, [])
+    validator.stop()
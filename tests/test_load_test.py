@@ -0,0 +1,91 @@
+import os
+import argparse
+import mido
+import pytest
+from midi.load_test import (
+    FakeOutputPort,
+    LoadTest,
+    count_out_of_order,
+    journal_stream,
+    paced_bursts,
+    parse_mix,
+    synthetic_stream,
+)
+from midi.session_journal import SENT, SessionJournal
+
+
+def test_synthetic_stream_respects_mix():
+    messages = list(synthetic_stream(50, {"cc": 1}, seed=1))
+    assert len(messages) == 50
+    assert {message.type for message in messages} == {"control_change"}
+
+    messages = list(synthetic_stream(200, {"pc": 1, "sysex": 1}, seed=1))
+    assert {message.type for message in messages} == {"program_change", "sysex"}
+
+
+def test_paced_bursts():
+    bursts = list(paced_bursts(list(range(10)), rate=100, burst=4))
+    assert [len(burst) for _, burst in bursts] == [4, 4, 2]
+    assert [due for due, _ in bursts] == pytest.approx([0.0, 0.04, 0.08])
+
+
+def test_count_out_of_order():
+    messages = [object() for _ in range(4)]
+    order = {id(message): index for index, message in enumerate(messages)}
+    delivered = [messages[0], messages[2], messages[1], messages[3]]
+    assert count_out_of_order(order, messages) == 0
+    assert count_out_of_order(order, delivered) == 1
+
+
+def test_run_recorder():
+    load_test = LoadTest(synthetic_stream(300, seed=2), rate=0, burst=10)
+    report = load_test.run_recorder(track_memory=True)
+
+    assert report.generated == report.delivered == 300
+    assert report.dropped == 0
+    assert report.out_of_order == 0
+    assert report.memory_growth is not None
+    assert "Throughput" in report.format()
+
+
+def test_run_recorder_reports_input_queue_drops():
+    # The whole stream arrives before the first drain, a small queue overflows
+    load_test = LoadTest(synthetic_stream(300, seed=3), rate=0, burst=300)
+    report = load_test.run_recorder(queue_size=16, drain_interval=0.2)
+
+    assert report.dropped > 0
+    assert report.delivered <= 32
+    assert report.out_of_order == 0
+
+
+def test_run_output_reports_dropped_sends():
+    class FlakyPort(FakeOutputPort):
+        def send(self, message):
+            if message.type == "sysex":
+                raise IOError("buffer overflow")
+            super().send(message)
+
+    messages = [
+        mido.Message("program_change", program=1),
+        mido.Message("sysex", data=[1, 2]),
+        mido.Message("program_change", program=2),
+    ]
+    report = LoadTest(messages, rate=0, burst=1).run_output(port=FlakyPort())
+
+    assert report.delivered == 2
+    assert report.dropped == 1
+
+
+def test_journal_stream(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    journal = SessionJournal(journal_path)
+    journal.record_message(SENT, mido.Message("program_change", program=4))
+    journal.close()
+
+    assert journal_stream(journal_path) == [mido.Message("program_change", program=4)]
+
+
+def test_parse_mix():
+    assert parse_mix("pc=1,cc=4") == {"pc": 1.0, "cc": 4.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("note=1")
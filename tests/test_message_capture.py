@@ -0,0 +1,63 @@
+import os
+import mido
+from unittest.mock import MagicMock
+from midi.message_capture import MessageCapture
+from midi.midi_handler import MidiHandler
+
+
+def test_capture_stores_messages_with_delta_times():
+    capture = MessageCapture()
+    capture.append(mido.Message("program_change", channel=1, program=4), 10.0)
+    capture.append(mido.Message("control_change", control=7, value=90), 10.25)
+    capture.append(mido.Message("sysex", data=[1, 2, 3]), 10.5)
+
+    messages = list(capture)
+    assert len(capture) == 3
+    assert messages[0].program == 4 and messages[0].time == 0
+    assert messages[1].value == 90 and messages[1].time == 0.25
+    assert messages[2].data == (1, 2, 3)
+    assert capture[-1].type == "sysex"
+    assert list(capture.times()) == [0.0, 0.25, 0.5]
+    assert capture.duration() == 0.5
+    assert capture.memory_size() == 2 + 3 + 5 + 3 * 4 * 2
+
+
+def test_capture_clear():
+    capture = MessageCapture()
+    capture.append(mido.Message("program_change", program=1), 1.0)
+    capture.clear()
+    capture.append(mido.Message("program_change", program=2), 5.0)
+    assert len(capture) == 1
+    assert capture[0].time == 0
+
+
+def test_midi_file_round_trip(tmpdir):
+    capture = MessageCapture()
+    capture.append(mido.Message("program_change", channel=2, program=9), 0.0)
+    capture.append(mido.Message("clock"), 0.1)
+    capture.append(mido.Message("control_change", channel=2, control=1, value=3), 0.5)
+    capture.append(mido.Message("sysex", data=[0x7D, 1]), 1.5)
+    path = os.path.join(tmpdir, "capture.mid")
+
+    capture.save_midi_file(path)
+    loaded = MessageCapture.load_midi_file(path)
+
+    assert [message.type for message in loaded] == [
+        "program_change",
+        "control_change",
+        "sysex",
+    ]
+    assert [round(seconds, 3) for seconds in loaded.times()] == [0.0, 0.5, 1.5]
+    assert loaded[0].channel == 2 and loaded[0].program == 9
+
+
+def test_midi_handler_records_into_capture():
+    capture = MessageCapture()
+    midi_handler = MidiHandler(MagicMock(), capture)
+    midi_handler.handle_midi_message(mido.Message("program_change", program=3))
+    midi_handler.handle_midi_message(mido.Message("control_change", control=7, value=1))
+    midi_handler.generate_profile()
+
+    profile = midi_handler.window.right_column.append.call_args[0][0]
+    assert '"program_change": 3' in profile
+    assert '"cc_number": 7' in profile
@@ -0,0 +1,77 @@
+import mido
+import sys
+import threading
+import time
+from midi.midi_clock import PPQN, ClockStats, MidiClock, TapTempo, clamp_bpm
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tap_tempo_averages_recent_taps():
+    clock = FakeClock()
+    tap_tempo = TapTempo(clock=clock)
+    assert tap_tempo.tap() is None
+    for _ in range(3):
+        clock.now += 0.5
+        bpm = tap_tempo.tap()
+    assert bpm == 120.0
+
+    clock.now += 5.0
+    assert tap_tempo.tap() is None
+
+
+def test_tempo_is_clamped():
+    assert clamp_bpm(5) == 20.0
+    assert clamp_bpm(1000) == 300.0
+    assert MidiClock(lambda message: None, bpm=90).interval() == 60.0 / (90 * PPQN)
+
+
+def test_clock_stats_separate_jitter_from_drift():
+    stats = ClockStats()
+    stats.record(0.0, 0.001)
+    stats.record(0.02, 0.0205)
+    stats.record(0.04, 0.041)
+    summary = stats.summary()
+    assert summary["ticks"] == 3
+    assert round(summary["max_jitter_ms"], 6) == 1.0
+    assert round(summary["drift_ms"], 6) == 0.0
+
+
+def test_clock_stats_can_be_read_while_recording():
+    stats = ClockStats()
+    recording = threading.Thread(
+        target=lambda: [stats.record(tick, tick + 0.001) for tick in range(200000)]
+    )
+    # Switch threads often, so the summary runs in the middle of appends
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        recording.start()
+        while recording.is_alive():
+            stats.summary()
+        recording.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert stats.summary()["ticks"] == 200000
+
+
+def test_clock_sends_start_ticks_and_stop():
+    sent = []
+    midi_clock = MidiClock(sent.append, bpm=300)
+    midi_clock.start()
+    time.sleep(0.1)
+    midi_clock.stop()
+
+    assert sent[0] == mido.Message("start")
+    assert sent[-1] == mido.Message("stop")
+    ticks = sent[1:-1]
+    assert ticks and all(message.type == "clock" for message in ticks)
+    assert midi_clock.statistics()["ticks"] == len(ticks)
+    # 300 BPM is 120 ticks per second
+    assert 5 <= len(ticks) <= 20
@@ -0,0 +1,112 @@
+import json
+import logging
+import mido
+from unittest.mock import MagicMock
+from midi.midi_event_log import (
+    EVENT_LOGGER_NAME,
+    MidiEventFilter,
+    MidiEventFormatter,
+    log_midi_event,
+)
+from midi.midi_handler import MidiHandler
+
+
+class RecordCollector(logging.Handler):
+    def __init__(self):
+        super(RecordCollector, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def collect_events():
+    collector = RecordCollector()
+    event_logger = logging.getLogger(EVENT_LOGGER_NAME)
+    event_logger.setLevel(logging.INFO)
+    event_logger.addHandler(collector)
+    return collector
+
+
+def release_events(collector):
+    event_logger = logging.getLogger(EVENT_LOGGER_NAME)
+    event_logger.removeHandler(collector)
+    event_logger.setLevel(logging.NOTSET)
+
+
+def test_log_midi_event_disabled_by_default():
+    collector = RecordCollector()
+    logging.getLogger(EVENT_LOGGER_NAME).addHandler(collector)
+    try:
+        log_midi_event("sent", mido.Message("program_change", program=1))
+    finally:
+        logging.getLogger(EVENT_LOGGER_NAME).removeHandler(collector)
+    assert collector.records == []
+
+
+def test_formatter_writes_json_line():
+    collector = collect_events()
+    try:
+        log_midi_event(
+            "sent",
+            mido.Message("control_change", channel=1, control=2, value=127),
+            port="USB MIDI CABLE",
+            source="clean",
+        )
+    finally:
+        release_events(collector)
+
+    event = json.loads(MidiEventFormatter().format(collector.records[0]))
+    assert event["direction"] == "sent"
+    assert event["port"] == "USB MIDI CABLE"
+    assert event["source"] == "clean"
+    assert event["message"] == {
+        "type": "control_change",
+        "channel": 1,
+        "control": 2,
+        "value": 127,
+    }
+    assert "time" in event and "monotonic" in event
+
+
+def test_formatter_writes_sysex_as_hex():
+    collector = collect_events()
+    try:
+        log_midi_event("received", mido.Message("sysex", data=[1, 2, 3]))
+    finally:
+        release_events(collector)
+
+    event = json.loads(MidiEventFormatter().format(collector.records[0]))
+    assert event["message"] == {"type": "sysex", "data": "F0 01 02 03 F7"}
+
+
+def test_filter_separates_events_from_application_log():
+    event_record = logging.makeLogRecord({"midi_event": {}})
+    app_record = logging.makeLogRecord({"msg": "Application started"})
+
+    assert MidiEventFilter(events=True).filter(event_record)
+    assert not MidiEventFilter(events=True).filter(app_record)
+    assert MidiEventFilter(events=False).filter(app_record)
+    assert not MidiEventFilter(events=False).filter(event_record)
+
+
+def test_send_messages_logs_each_sent_message():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock)
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_output_name = "USB MIDI CABLE"
+    midi_handler.midi_channel = 1
+
+    collector = collect_events()
+    try:
+        midi_handler.compile_send(1, 2, 127, "clean")()
+    finally:
+        release_events(collector)
+
+    events = [record.midi_event for record in collector.records]
+    assert [event["message"].type for event in events] == [
+        "program_change",
+        "control_change",
+    ]
+    assert all(event["source"] == "clean" for event in events)
+    assert all(event["port"] == "USB MIDI CABLE" for event in events)
@@ -39,15 +39,20 @@ def test_set_midi_output():
 def test_start_midi_input():
     window_mock = MagicMock()
     midi_handler = MidiHandler(window_mock)
+    port = MagicMock(spec=["name", "iter_pending", "close"])
+    port.name = "default in"
+    port.iter_pending.return_value = []
 
-    with patch.object(mido, "open_input") as mock_open_input:
-        midi_handler.start_midi_input()
+    with patch.object(mido, "open_input", return_value=port) as mock_open_input:
+        consumer = midi_handler.start_midi_input()
 
-    assert midi_handler.midi_input == mock_open_input.return_value
+    mock_open_input.assert_called_once_with(None)
+    assert midi_handler.midi_input == ["default in"]
+    assert midi_handler.recorder_consumer is consumer
     assert window_mock.update_status_bar.call_args_list == [
         call("MIDI Input Capture\n")
     ]
-    assert midi_handler.midi_input.callback == midi_handler.handle_midi_message
+    midi_handler.stop_inputs()
 
 
 def test_start_midi_input_exception():
@@ -66,16 +71,17 @@ def test_start_midi_input_exception():
 def test_stop_midi_input():
     window_mock = MagicMock()
     midi_handler = MidiHandler(window_mock)
-    midi_handler.midi_input = MagicMock()
+    midi_handler.input_mux = MagicMock()
+    midi_handler.midi_input = ["default in"]
+    midi_handler.midi_input_added = ["default in"]
+    consumer = midi_handler.recorder_consumer = MagicMock()
+    consumer.drain.return_value = []
 
     midi_handler.stop_midi_input()
 
     assert midi_handler.midi_input is None
-    if midi_handler.midi_input:
-        midi_handler.midi_input.close.assert_called_once()
-    else:
-        print("DEBUG: midi_input is None")
-
+    midi_handler.input_mux.remove_consumer.assert_called_once_with(consumer)
+    midi_handler.input_mux.remove_port.assert_called_once_with("default in")
     window_mock.update_status_bar.assert_called_once_with("MIDI Input Stopped\n")
 
 
@@ -188,3 +194,73 @@ def test_open_output():
         output_port = midi_handler_instance.open_output("selected_port")
     assert output_port == "output_port_mock"
     mock_open_output.assert_called_once_with("selected_port")
+
+
+def test_compile_send_builds_messages_once():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock)
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_channel = 1
+
+    send_action = midi_handler.compile_send(1, 2, 127, "clean")
+    with patch.object(
+        midi_handler, "build_messages", wraps=midi_handler.build_messages
+    ) as mock_build:
+        send_action()
+        send_action()
+
+    assert mock_build.call_count == 1
+    assert (
+        midi_handler.midi_output.send.call_args_list
+        == [
+            call(mido.Message("program_change", channel=1, program=1)),
+            call(mido.Message("control_change", channel=1, control=2, value=127)),
+        ]
+        * 2
+    )
+    window_mock.update_status_bar.assert_called_with(
+        "Midi Program: 1Control: 2 Value: 127"
+    )
+
+
+def test_compile_send_recompiles_on_channel_change():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock)
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_channel = 1
+
+    send_action = midi_handler.compile_send(5, None, None)
+    send_action()
+    midi_handler.set_midi_channel(3)
+    send_action()
+
+    assert midi_handler.midi_output.send.call_args_list == [
+        call(mido.Message("program_change", channel=1, program=5)),
+        call(mido.Message("program_change", channel=3, program=5)),
+    ]
+
+
+def test_send_messages_reports_latency():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock)
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_channel = 1
+
+    send_action = midi_handler.compile_send(1, None, None)
+    with patch("midi.midi_handler.time.perf_counter", return_value=10.0015):
+        send_action(started=10.0)
+
+    window_mock.update_status_bar.assert_called_once_with("Midi Program: 1 (1.50 ms)")
+
+
+def test_control_changes_without_output_only_log():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = None
+    midi_handler.reconnect_supervisor = MagicMock()
+    midi_handler.reconnect_supervisor.hold.return_value = False
+
+    with patch.object(QMessageBox, "warning") as mock_warning:
+        midi_handler.send_control_change(0, 7, 100)
+
+    assert not mock_warning.called
+    midi_handler.reconnect_supervisor.hold.assert_called_once()
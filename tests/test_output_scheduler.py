@@ -0,0 +1,360 @@
+import threading
+import mido
+from unittest.mock import MagicMock, patch
+from midi.midi_handler import PANIC_TRANSFER_WAIT, MidiHandler
+from midi.output_scheduler import (
+    DIN_BYTES_PER_SECOND,
+    LANE_CONTROL,
+    OutputScheduler,
+    RunningStatusEncoder,
+    panic_bytes,
+    panic_messages,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class BytePort:
+    def __init__(self):
+        self.name = "raw"
+        self.data = []
+        self.closed = False
+
+    def send_bytes(self, data):
+        self.data.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+class BlockingPort(BytePort):
+    # Holds the scheduler thread in its first send until released
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def send_bytes(self, data):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5.0)
+        super().send_bytes(data)
+
+
+class FailingPort(BlockingPort):
+    def send_bytes(self, data):
+        super().send_bytes(data)
+        raise IOError("device unplugged")
+
+
+def cc(control, value, channel=0):
+    return mido.Message(
+        "control_change", channel=channel, control=control, value=value
+    ).bytes()
+
+
+def test_running_status_omits_repeated_status():
+    encoder = RunningStatusEncoder(clock=FakeClock())
+    assert encoder.encode(cc(7, 1)) == bytes([0xB0, 7, 1])
+    assert encoder.encode(cc(7, 2)) == bytes([7, 2])
+    assert encoder.encode(cc(7, 3, channel=1)) == bytes([0xB1, 7, 3])
+    assert encoder.bytes_saved == 1
+
+
+def test_running_status_realtime_and_system_messages():
+    encoder = RunningStatusEncoder(clock=FakeClock())
+    encoder.encode(cc(7, 1))
+    assert encoder.encode([0xF8]) == bytes([0xF8])
+    assert encoder.encode(cc(7, 2)) == bytes([7, 2])
+    assert encoder.encode([0xF0, 1, 0xF7]) == bytes([0xF0, 1, 0xF7])
+    assert encoder.encode(cc(7, 3)) == bytes([0xB0, 7, 3])
+
+
+def test_running_status_resends_status_after_idle():
+    clock = FakeClock()
+    encoder = RunningStatusEncoder(timeout=1.0, clock=clock)
+    encoder.encode(cc(7, 1))
+    clock.now = 2.0
+    assert encoder.encode(cc(7, 2)) == bytes([0xB0, 7, 2])
+
+
+def test_scheduler_applies_running_status_on_byte_ports():
+    port = BytePort()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9)
+    for value in range(3):
+        scheduler.send(mido.Message("control_change", control=7, value=value))
+    scheduler.drain()
+    scheduler.close()
+
+    assert port.data == [bytes([0xB0, 7, 0]), bytes([7, 1]), bytes([7, 2])]
+    assert scheduler.stats()["bytes_saved"] == 2
+    assert scheduler.stats()["wire_bytes"] == 7
+    assert port.closed
+
+
+def test_scheduler_sends_messages_to_mido_ports():
+    port = MagicMock(spec=["send", "close", "name"])
+    scheduler = OutputScheduler(port, bytes_per_second=10**9)
+    message = mido.Message("program_change", program=1)
+    scheduler.send(message)
+    scheduler.drain()
+
+    port.send.assert_called_once_with(message)
+    assert scheduler.bytes_saved == 0
+    assert not scheduler.stats()["running_status"]
+    assert "bytes_saved" not in scheduler.stats()
+    scheduler.close()
+
+
+def test_scheduler_paces_to_wire_speed():
+    clock = FakeClock()
+    port = BytePort()
+    scheduler = OutputScheduler(
+        port,
+        buffer_size=0,
+        running_status=False,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    for value in range(3):
+        scheduler.send(mido.Message("control_change", control=7, value=value))
+    scheduler.drain()
+    scheduler.close()
+
+    assert clock.sleeps == [3 / DIN_BYTES_PER_SECOND, 3 / DIN_BYTES_PER_SECOND]
+
+
+def test_midi_handler_wraps_output_in_scheduler():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.output_scheduling = True
+    port = MagicMock()
+
+    with patch.object(midi_handler, "open_output", return_value=port):
+        midi_handler.set_midi_output("amp")
+
+    assert isinstance(midi_handler.midi_output, OutputScheduler)
+    assert midi_handler.output_stats()["messages_sent"] == 0
+    midi_handler.close_output()
+    assert midi_handler.midi_output is None
+    port.close.assert_called_once()
+
+
+def test_panic_bytes_use_running_status():
+    assert len(panic_messages()) == 48
+    assert len(panic_bytes(running_status=False)) == 144
+    data = panic_bytes()
+    assert len(data) == 16 * 7
+    assert data[:7] == bytes([0xB0, 120, 0, 121, 0, 123, 0])
+
+
+def test_scheduler_sends_switches_before_controls_and_bulk():
+    port = BlockingPort()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9, running_status=False)
+    scheduler.send(mido.Message("clock"))
+    port.entered.wait(5.0)
+    scheduler.send(mido.Message("sysex", data=[1]))
+    scheduler.send(mido.Message("control_change", control=7, value=1), LANE_CONTROL)
+    scheduler.send(mido.Message("program_change", program=5))
+    port.release.set()
+    scheduler.drain()
+
+    assert [data[0] for data in port.data] == [0xF8, 0xC0, 0xB0, 0xF0]
+    stats = scheduler.stats()
+    assert (stats["switch_sent"], stats["control_sent"], stats["bulk_sent"]) == (
+        2,
+        1,
+        1,
+    )
+    scheduler.close()
+
+
+def test_panic_preempts_queued_messages():
+    port = BlockingPort()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9)
+    scheduler.send(mido.Message("clock"))
+    port.entered.wait(5.0)
+    for value in range(10):
+        scheduler.send(mido.Message("control_change", control=7, value=value), 1)
+
+    assert scheduler.panic() == 10
+    port.release.set()
+    scheduler.drain()
+    scheduler.send(mido.Message("control_change", control=7, value=1))
+    scheduler.drain()
+    scheduler.close()
+
+    assert port.data == [bytes([0xF8]), panic_bytes(), bytes([0xB0, 7, 1])]
+    assert scheduler.stats()["dropped"] == 10
+    assert scheduler.stats()["panics"] == 1
+
+
+def test_midi_handler_panic():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_output_name = "amp"
+    midi_handler.device_state.update("amp", mido.Message("program_change", program=1))
+    transfer = midi_handler.sysex_transfer = MagicMock()
+
+    assert midi_handler.panic() == 0
+    assert midi_handler.midi_output.send.call_count == 48
+    transfer.cancel.assert_called_once()
+    assert midi_handler.device_state.changed_messages(
+        "amp", [mido.Message("program_change", program=1)]
+    )
+
+
+def test_midi_handler_panic_waits_briefly_for_the_sysex_transfer():
+    midi_handler = MidiHandler(MagicMock(), [])
+    calls = []
+    midi_handler.midi_output = BytePort()
+    midi_handler.midi_output.send = lambda message: calls.append("send")
+    transfer = midi_handler.sysex_transfer = MagicMock(running=False)
+    transfer.wait.side_effect = lambda timeout: calls.append(("wait", timeout))
+
+    midi_handler.panic()
+
+    assert calls[:2] == [("wait", PANIC_TRANSFER_WAIT), "send"]
+    assert midi_handler.midi_output.data == []
+
+
+def test_midi_handler_panic_ends_a_sysex_transfer_still_running():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_output = BytePort()
+    midi_handler.midi_output.send = MagicMock()
+    midi_handler.sysex_transfer = MagicMock(running=True)
+
+    midi_handler.panic()
+
+    assert midi_handler.midi_output.data == [bytes([0xF7])]
+    assert midi_handler.midi_output.send.call_count == 48
+
+
+def test_midi_handler_panic_does_not_wait_for_scheduled_transfers():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_output = MagicMock(spec=OutputScheduler)
+    midi_handler.midi_output.panic.return_value = 3
+    transfer = midi_handler.sysex_transfer = MagicMock()
+
+    assert midi_handler.panic() == 3
+    transfer.cancel.assert_called_once()
+    assert not transfer.wait.called
+
+
+def test_drain_waits_for_a_requested_panic():
+    port = BlockingPort()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9)
+    scheduler.panic()
+    assert port.entered.wait(2.0)
+
+    drained = threading.Thread(target=scheduler.drain)
+    drained.start()
+    drained.join(0.05)
+    waited_for_panic = drained.is_alive()
+    port.release.set()
+    drained.join(2.0)
+
+    assert waited_for_panic
+    assert not drained.is_alive()
+    assert port.data == [panic_bytes()]
+    scheduler.close()
+
+
+def test_midi_handler_sends_controls_on_the_control_lane():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_output = MagicMock(spec=OutputScheduler)
+    midi_handler.set_midi_channel(0)
+
+    midi_handler.send_control_change(0, 7, 100)
+    midi_handler.send_midi_message(1, None, None)
+
+    assert midi_handler.midi_output.send.call_args_list[0][0][1] == LANE_CONTROL
+    assert len(midi_handler.midi_output.send.call_args_list[1][0]) == 1
+
+
+def test_realtime_messages_skip_the_queue():
+    port = BytePort()
+    scheduler = OutputScheduler(port, bytes_per_second=1000, buffer_size=1)
+    for _ in range(3):
+        scheduler.send(mido.Message("sysex", data=[0x7D] * 498))
+
+    scheduler.send_realtime(mido.Message("clock"))
+
+    assert b"\xf8" in port.data
+    assert len(port.data) < 4
+    assert scheduler.stats()["realtime_sent"] == 1
+    scheduler.close()
+
+
+def test_midi_handler_sends_realtime_around_the_scheduler():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_output = MagicMock(spec=OutputScheduler)
+
+    midi_handler.send_realtime(mido.Message("clock"))
+
+    midi_handler.midi_output.send_realtime.assert_called_once()
+    assert not midi_handler.midi_output.send.called
+
+
+def test_scheduler_reports_failed_and_queued_messages():
+    port = FailingPort()
+    on_error = MagicMock()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9, on_error=on_error)
+    messages = [mido.Message("program_change", program=value) for value in range(3)]
+    scheduler.send(messages[0])
+    port.entered.wait(5.0)
+    scheduler.send(messages[1])
+    scheduler.send(messages[2])
+    port.release.set()
+    scheduler.drain()
+
+    error, unsent = on_error.call_args[0]
+    assert isinstance(error, IOError)
+    assert unsent == messages
+    assert scheduler.queue_depth == 0
+    scheduler.close()
+
+
+def test_close_drops_queued_messages_without_waiting():
+    port = BlockingPort()
+    scheduler = OutputScheduler(port, bytes_per_second=10**9, close_timeout=0.1)
+    scheduler.send(mido.Message("clock"))
+    port.entered.wait(5.0)
+    for _ in range(5):
+        scheduler.send(mido.Message("sysex", data=[1] * 100))
+    scheduler.close()
+    port.release.set()
+    scheduler.thread.join(5.0)
+
+    assert port.data == [bytes([0xF8])]
+    assert scheduler.stats()["dropped"] == 5
+    assert port.closed
+
+
+def test_midi_handler_reports_scheduler_failures_to_the_supervisor():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.output_scheduling = True
+    midi_handler.reconnect_supervisor = MagicMock()
+    port = FailingPort()
+    port.release.set()
+    with patch.object(midi_handler, "open_output", return_value=port):
+        midi_handler.set_midi_output("amp")
+    midi_handler.set_midi_channel(0)
+
+    midi_handler.send_midi_message(1, None, None)
+    midi_handler.midi_output.drain()
+
+    midi_handler.reconnect_supervisor.connection_lost.assert_called_once()
+    unsent = midi_handler.reconnect_supervisor.connection_lost.call_args[0][1]
+    assert unsent == [mido.Message("program_change", program=1)]
+    midi_handler.close_output()
@@ -0,0 +1,80 @@
+from common.profile_history import ProfileHistory
+
+
+def make_profile(channel=0, count=3):
+    return {
+        "name": "Bank",
+        "channel": channel,
+        "buttons": [
+            {"name": f"Preset {number}", "program_change": number}
+            for number in range(count)
+        ],
+    }
+
+
+def test_undo_redo_and_new_edit_drops_redo_branch():
+    history = ProfileHistory()
+    history.record(make_profile(0), "opened")
+    history.record(make_profile(1), "channel")
+    history.record(make_profile(2), "channel")
+
+    assert history.undo() == make_profile(1)
+    assert history.undo() == make_profile(0)
+    assert history.undo() is None
+    assert history.redo() == make_profile(1)
+
+    history.record(make_profile(5), "edit")
+    assert not history.can_redo()
+    assert history.undo() == make_profile(1)
+
+
+def test_unchanged_state_is_not_recorded_and_live_data_is_not_aliased():
+    history = ProfileHistory()
+    profile = make_profile()
+    assert history.record(profile, "opened")
+    assert not history.record(make_profile(), "edit")
+
+    profile["buttons"][0]["name"] = "Changed in place"
+    assert history.current() == make_profile()
+
+
+def test_unchanged_buttons_are_shared_between_revisions():
+    history = ProfileHistory()
+    profile = make_profile(count=100)
+    history.record(profile, "opened")
+    profile["buttons"][50]["program_change"] = 127
+    history.record(profile, "edit")
+
+    first, second = history.revisions
+    shared = sum(a is b for a, b in zip(first.buttons, second.buttons))
+    assert shared == 99
+    assert history.stats()["unique_strings"] == 102
+
+
+def test_history_is_bounded():
+    history = ProfileHistory(max_revisions=10)
+    for channel in range(50):
+        history.record(make_profile(channel % 16, count=1 + channel), "edit")
+
+    assert len(history.revisions) == 10
+    assert history.current() == make_profile(49 % 16, count=50)
+    live = {revision.fields for revision in history.revisions}
+    for revision in history.revisions:
+        live.update(revision.buttons)
+    assert set(history.pool) == live
+
+
+def test_save_and_load(tmpdir):
+    path = str(tmpdir.join("bank.json.history.json"))
+    history = ProfileHistory()
+    for channel in range(4):
+        history.record(make_profile(channel), f"revision {channel}")
+    history.undo()
+    history.save(path)
+
+    loaded = ProfileHistory.load(path, max_revisions=3)
+    assert len(loaded.revisions) == 3
+    assert loaded.current() == make_profile(2)
+    assert loaded.current_label() == "revision 2"
+    assert loaded.redo() == make_profile(3)
+    assert loaded.revisions[0].buttons[0] is loaded.revisions[1].buttons[0]
@@ -0,0 +1,158 @@
+import os
+import json
+from unittest.mock import patch
+from common.profile_library import ProfileLibrary
+from common.profile_manager import ProfileManager
+
+
+def make_profile(name, program, device=None, tags=None):
+    profile_data = {
+        "name": name,
+        "channel": 1,
+        "buttons": [{"order": 0, "name": "clean", "program_change": program}],
+    }
+    if device:
+        profile_data["device"] = device
+    if tags:
+        profile_data["tags"] = tags
+    return profile_data
+
+
+def test_save_and_load(tmpdir):
+    library = ProfileLibrary(os.path.join(str(tmpdir), "profiles.db"))
+    profile_data = make_profile("Iridium", 1, "Strymon Iridium", ["amp", "modeler"])
+
+    assert library.save("iridium.json", profile_data) == 1
+    assert library.load("iridium.json") == profile_data
+    assert library.load("missing.json") is None
+    assert "iridium.json" in library
+    library.close()
+
+
+def test_lookups_by_name_device_and_tag(tmpdir):
+    library = ProfileLibrary(os.path.join(str(tmpdir), "profiles.db"))
+    library.save("iridium.json", make_profile("Iridium", 1, "Strymon", ["amp"]))
+    library.save("timeline.json", make_profile("Timeline", 2, "Strymon", ["delay"]))
+    library.save("jvm.json", make_profile("JVM", 3, "Marshall", ["amp"]))
+
+    assert library.find_by_name("JVM") == ["jvm.json"]
+    assert sorted(library.find_by_device("Strymon")) == [
+        "iridium.json",
+        "timeline.json",
+    ]
+    assert sorted(library.find_by_tag("amp")) == ["iridium.json", "jvm.json"]
+
+    library.save("jvm.json", make_profile("JVM", 3, "Marshall", ["head"]))
+    assert library.find_by_tag("amp") == ["iridium.json"]
+    library.close()
+
+
+def test_revision_history(tmpdir):
+    library = ProfileLibrary(os.path.join(str(tmpdir), "profiles.db"))
+    library.save("amp.json", make_profile("Amp", 1))
+    assert library.save("amp.json", make_profile("Amp", 2)) == 2
+
+    assert [revision for revision, _ in library.revisions("amp.json")] == [1, 2]
+    assert library.load_revision("amp.json", 1) == make_profile("Amp", 1)
+    assert library.load("amp.json") == make_profile("Amp", 2)
+
+    library.delete("amp.json")
+    assert library.revisions("amp.json") == []
+    library.close()
+
+
+def test_old_revisions_are_pruned(tmpdir):
+    library = ProfileLibrary(os.path.join(str(tmpdir), "profiles.db"), max_revisions=3)
+    for program in range(5):
+        library.save("amp.json", make_profile("Amp", program))
+
+    assert [revision for revision, _ in library.revisions("amp.json")] == [3, 4, 5]
+    assert library.load_revision("amp.json", 3) == make_profile("Amp", 2)
+    library.close()
+
+
+def test_import_and_export_json(tmpdir):
+    source = tmpdir.mkdir("source")
+    with open(os.path.join(str(source), "amp.json"), "w") as profile_file:
+        json.dump(make_profile("Amp", 1), profile_file)
+    with open(os.path.join(str(source), "broken.json"), "w") as profile_file:
+        profile_file.write("{")
+    library = ProfileLibrary(os.path.join(str(tmpdir), "profiles.db"))
+
+    assert library.import_directory(str(source)) == 1
+    assert library.import_directory(str(source)) == 0
+    exported = os.path.join(str(tmpdir), "exported")
+    assert library.export_directory(exported) == 1
+    with open(os.path.join(exported, "amp.json")) as profile_file:
+        assert json.load(profile_file) == make_profile("Amp", 1)
+    library.close()
+
+
+def test_profile_manager_uses_library(tmpdir):
+    script_directory = str(tmpdir)
+    with open(os.path.join(script_directory, "settings.json"), "w") as settings_file:
+        json.dump(
+            {"profile": "amp.json", "profile_library": "profiles.db"}, settings_file
+        )
+    profiles_directory = tmpdir.mkdir("profiles")
+    with open(os.path.join(str(profiles_directory), "amp.json"), "w") as profile_file:
+        json.dump(make_profile("Amp", 1), profile_file)
+
+    profile_manager = ProfileManager(script_directory, "1.0")
+    assert profile_manager.load_profile_data("amp.json") == make_profile("Amp", 1)
+    assert "amp.json" in profile_manager.library
+
+    profile_manager.save_profile_data("amp.json", make_profile("Amp", 2))
+    assert profile_manager.load_profile_data("amp.json") == make_profile("Amp", 2)
+    with open(os.path.join(str(profiles_directory), "amp.json")) as profile_file:
+        assert json.load(profile_file) == make_profile("Amp", 1)
+    profile_manager.library.close()
+
+
+def test_profile_manager_saves_json_without_library(tmpdir):
+    script_directory = str(tmpdir)
+    profiles_directory = tmpdir.mkdir("profiles")
+    profile_manager = ProfileManager(script_directory, "1.0")
+
+    profile_manager.save_profile_data("amp.json", make_profile("Amp", 3))
+
+    assert profile_manager.library is None
+    with open(os.path.join(str(profiles_directory), "amp.json")) as profile_file:
+        assert json.load(profile_file) == make_profile("Amp", 3)
+
+
+def write_profile(path, profile_data, mtime):
+    with open(path, "w") as profile_file:
+        json.dump(profile_data, profile_file)
+    os.utime(path, (mtime, mtime))
+
+
+def test_profile_manager_imports_files_changed_on_disk(tmpdir):
+    script_directory = str(tmpdir)
+    with open(os.path.join(script_directory, "settings.json"), "w") as settings_file:
+        json.dump({"profile_library": "profiles.db"}, settings_file)
+    profiles_directory = str(tmpdir.mkdir("profiles"))
+    amp_path = os.path.join(profiles_directory, "amp.json")
+    write_profile(amp_path, make_profile("Amp", 1), 1000)
+    profile_manager = ProfileManager(script_directory, "1.0")
+    profile_manager.load_profile_data("amp.json")
+
+    # Saved in the app: the unchanged file does not override it
+    profile_manager.save_profile_data("amp.json", make_profile("Amp", 2))
+    assert profile_manager.load_profile_data("amp.json") == make_profile("Amp", 2)
+
+    # Edited on disk afterwards: the file wins
+    write_profile(amp_path, make_profile("Amp", 3), 2000)
+    assert profile_manager.load_profile_data("amp.json") == make_profile("Amp", 3)
+    assert len(profile_manager.library.revisions("amp.json")) == 3
+
+    # Added to the folder, e.g. by a bulk import: offered by Load
+    write_profile(
+        os.path.join(profiles_directory, "fx.json"), make_profile("Fx", 4), 3000
+    )
+    with patch(
+        "common.profile_manager.QInputDialog.getItem", return_value=("", False)
+    ) as get_item:
+        profile_manager.select_library_profile()
+    assert get_item.call_args[0][3] == ["Amp (amp.json)", "Fx (fx.json)"]
+    profile_manager.library.close()
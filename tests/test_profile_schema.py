@@ -0,0 +1,78 @@
+import json
+from common.profile_schema import (
+    check_document,
+    error_path,
+    locate,
+    validate_profile,
+    validate_settings,
+)
+
+PROFILE_TEXT = """{
+    "name": "Bank",
+    "channel": 0,
+    "buttons": [
+        {"name": "Clean", "program_change": 1},
+        {
+            "name": "Lead",
+            "program_change": 2,
+            "cc_number": 7,
+            "cc_value": 300
+        }
+    ]
+}"""
+
+
+def test_error_path():
+    assert error_path("buttons[1].cc_value must be between 0 and 127") == [
+        "buttons",
+        1,
+        "cc_value",
+    ]
+    assert error_path("channel must be an integer") == ["channel"]
+
+
+def test_locate_finds_nested_values():
+    offset = locate(PROFILE_TEXT, ["buttons", 1, "cc_value"])
+    assert PROFILE_TEXT[offset:].startswith("300")
+    offset = locate(PROFILE_TEXT, ["buttons", 0])
+    assert PROFILE_TEXT[offset:].startswith('{"name": "Clean"')
+
+
+def test_check_document_reports_lines():
+    data, errors = check_document(PROFILE_TEXT, validate_profile)
+    assert data == json.loads(PROFILE_TEXT)
+    assert errors == [(10, "buttons[1].cc_value must be between 0 and 127")]
+
+    data, errors = check_document('{\n  "name": "Bank",\n}', validate_profile)
+    assert data is None
+    assert errors[0][0] == 3
+    assert errors[0][1].startswith("Invalid JSON")
+
+
+def test_validate_settings():
+    assert validate_settings({"port_name": "USB MIDI CABLE", "size": 14}) == []
+    assert validate_settings(
+        {"size": 0, "x": "left", "journal": "yes", "stall_threshold_ms": -1}
+    ) == [
+        "x must be an integer",
+        "size must be at least 1",
+        "journal must be true or false",
+        "stall_threshold_ms must be greater than 0",
+    ]
+
+
+def test_validate_controls():
+    profile = {
+        "name": "Iridium",
+        "channel": 0,
+        "controls": [
+            {"name": "Volume", "cc_number": 7, "value": 100},
+            {"name": "Mix", "style": "fader", "cc_number": 200},
+            {"name": "Gain", "cc_number": 9, "min": 100, "max": 10},
+        ],
+    }
+    assert validate_profile(profile) == [
+        "controls[1].cc_number must be between 0 and 127",
+        "controls[1].style must be one of slider, knob",
+        "controls[2].min must not be greater than max",
+    ]
@@ -0,0 +1,189 @@
+import threading
+import time
+import mido
+from unittest.mock import MagicMock, patch
+from PyQt5.QtWidgets import QMessageBox
+from midi.midi_handler import MidiHandler
+from midi.session_journal import SENT
+from midi.reconnect import (
+    CONNECTED,
+    IDLE,
+    RECONNECTING,
+    PendingSends,
+    ReconnectSupervisor,
+)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def make_supervisor(midi_handler, ports, states=None):
+    return ReconnectSupervisor(
+        midi_handler,
+        on_state_change=states.append if states is not None else None,
+        list_ports=lambda: ports,
+        min_delay=0.01,
+        max_delay=0.02,
+        poll_interval=0.01,
+    )
+
+
+def test_pending_sends_keeps_latest_per_destination():
+    pending = PendingSends(max_size=2)
+    pending.add(mido.Message("program_change", program=1))
+    pending.add(mido.Message("control_change", control=7, value=1))
+    pending.add(mido.Message("program_change", program=2))
+    pending.add(mido.Message("control_change", control=8, value=1))
+
+    assert pending.take() == [
+        mido.Message("program_change", program=2),
+        mido.Message("control_change", control=8, value=1),
+    ]
+    assert pending.dropped == 2
+    assert len(pending) == 0
+
+
+def test_pending_sends_restore_keeps_newer_messages():
+    pending = PendingSends()
+    pending.add(mido.Message("program_change", program=5))
+
+    pending.restore(
+        [
+            mido.Message("program_change", program=4),
+            mido.Message("control_change", control=7, value=1),
+        ]
+    )
+
+    assert pending.take() == [
+        mido.Message("control_change", control=7, value=1),
+        mido.Message("program_change", program=5),
+    ]
+
+
+def test_send_failure_reconnects_and_flushes_pending():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock, [])
+    midi_handler.midi_channel = 0
+    broken_port = MagicMock()
+    broken_port.send.side_effect = IOError("device unplugged")
+    new_port = MagicMock()
+    states = []
+    supervisor = make_supervisor(midi_handler, ["amp"], states)
+    midi_handler.reconnect_supervisor = supervisor
+    midi_handler.open_output = MagicMock(side_effect=[IOError("busy"), new_port])
+    midi_handler.midi_output = broken_port
+    midi_handler.midi_output_name = "amp"
+    midi_handler.journal = MagicMock()
+    supervisor.watch("amp")
+
+    midi_handler.compile_send(3, None, None)()
+
+    assert wait_for(lambda: supervisor.state == CONNECTED and states[-1] == CONNECTED)
+    supervisor.stop()
+    assert RECONNECTING in states
+    broken_port.close.assert_called_once()
+    assert midi_handler.midi_output is new_port
+    new_port.send.assert_called_once_with(mido.Message("program_change", program=3))
+    assert midi_handler.open_output.call_count == 2
+    # The held message is tracked and journaled like any other send
+    assert midi_handler.device_state.program("amp", 0) == 3
+    midi_handler.journal.record_message.assert_called_once_with(
+        SENT, mido.Message("program_change", program=3), "reconnect"
+    )
+
+
+def test_sends_are_held_while_reconnecting():
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock, [])
+    midi_handler.midi_channel = 0
+    supervisor = make_supervisor(midi_handler, [])
+    midi_handler.reconnect_supervisor = supervisor
+    midi_handler.open_output = MagicMock(side_effect=IOError("not connected"))
+    supervisor.watch("amp", connected=False)
+
+    midi_handler.compile_send(1, None, None)()
+    midi_handler.compile_send(2, None, None)()
+    supervisor.stop()
+
+    assert supervisor.state == RECONNECTING
+    assert supervisor.pending.take() == [mido.Message("program_change", program=2)]
+    window_mock.update_status_bar.assert_called_with(
+        "Midi Program: 2 (queued until the MIDI output reconnects)"
+    )
+
+
+def test_port_disappearing_starts_reconnect():
+    midi_handler = MidiHandler(MagicMock(), [])
+    ports = ["amp"]
+    supervisor = make_supervisor(midi_handler, ports)
+    midi_handler.open_output = MagicMock(side_effect=IOError("not connected"))
+    midi_handler.midi_output = MagicMock()
+    supervisor.watch("amp")
+
+    ports.clear()
+
+    assert wait_for(lambda: supervisor.state == RECONNECTING)
+    supervisor.stop()
+    assert midi_handler.midi_output is None
+
+
+def test_hold_without_port_falls_back_to_warning():
+    midi_handler = MidiHandler(MagicMock(), [])
+    supervisor = make_supervisor(midi_handler, [])
+    supervisor.stop()
+
+    assert supervisor.state == IDLE
+    assert not supervisor.hold([mido.Message("program_change")])
+
+
+def test_panic_discards_sends_held_for_the_reconnect():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_channel = 0
+    supervisor = make_supervisor(midi_handler, [])
+    midi_handler.reconnect_supervisor = supervisor
+    midi_handler.open_output = MagicMock(side_effect=IOError("not connected"))
+    supervisor.watch("amp", connected=False)
+    midi_handler.compile_send(1, None, None)()
+
+    with patch.object(QMessageBox, "warning"):
+        midi_handler.panic()
+    supervisor.stop()
+
+    assert len(supervisor.pending) == 0
+
+
+def test_sends_are_held_while_the_port_is_opening():
+    midi_handler = MidiHandler(MagicMock(), [])
+    midi_handler.midi_channel = 0
+    opening = threading.Event()
+    opened = threading.Event()
+    new_port = MagicMock()
+
+    def open_output(port_name):
+        opening.set()
+        opened.wait(5.0)
+        return new_port
+
+    supervisor = make_supervisor(midi_handler, ["amp"])
+    midi_handler.reconnect_supervisor = supervisor
+    midi_handler.open_output = open_output
+    supervisor.watch("amp", connected=False)
+    assert opening.wait(2.0)
+
+    # The supervisor lock is free while the port opens
+    sender = threading.Thread(target=midi_handler.compile_send(3, None, None))
+    sender.start()
+    sender.join(1.0)
+    held_promptly = not sender.is_alive()
+    opened.set()
+    assert held_promptly
+
+    assert wait_for(lambda: supervisor.state == CONNECTED)
+    supervisor.stop()
+    new_port.send.assert_called_once_with(mido.Message("program_change", program=3))
@@ -0,0 +1,80 @@
+import mido
+import threading
+from unittest.mock import MagicMock
+from midi.midi_handler import MidiHandler
+from midi.sender_process import RECORD_DATA_SIZE, IsolatedOutput, SendRing
+from midi.transports import RawMidiTransport
+
+
+def test_ring_wraps_and_reassembles_long_messages():
+    ring = SendRing.create(bytearray(SendRing.size_for(4)), 4)
+    sysex = bytes([0xF0] + [0x11] * (RECORD_DATA_SIZE * 2) + [0xF7])
+
+    assert ring.put(1.0, bytes([0xC0, 5]))
+    assert ring.put(2.0, sysex)
+    assert not ring.put(3.0, bytes([0xB0, 7, 1]))
+    assert list(ring.take()) == [(1.0, bytes([0xC0, 5])), (2.0, sysex)]
+    assert len(ring) == 0
+
+    for value in range(3):
+        assert ring.put(3.0 + value, bytes([0xB0, 7, value]))
+    assert [data for _, data in ring.take()] == [
+        bytes([0xB0, 7, 0]),
+        bytes([0xB0, 7, 1]),
+        bytes([0xB0, 7, 2]),
+    ]
+
+
+def test_isolated_output_sends_from_another_process():
+    output = IsolatedOutput("memory", "memory", collect_latency=True)
+    for program in range(10):
+        output.send(mido.Message("program_change", program=program))
+    output.close()
+
+    assert output.sent == 10
+    assert len(output.latencies) == 10
+    assert all(latency >= 0 for latency in output.latencies)
+
+
+def test_ring_streams_messages_larger_than_itself():
+    ring = SendRing.create(bytearray(SendRing.size_for(2)), 2)
+    sysex = bytes([0xF0] + [0x22] * (RECORD_DATA_SIZE * 4) + [0xF7])
+    chunks = SendRing.chunks(sysex)
+
+    received = []
+    while chunks:
+        written = ring.write(1.0, chunks)
+        chunks = chunks[written:]
+        received.extend(ring.take())
+    assert received == [(1.0, sysex)]
+
+
+def test_isolated_output_takes_sends_from_several_threads():
+    output = IsolatedOutput("memory", "memory", capacity=8)
+    sysex = mido.Message("sysex", data=[0x33] * (RECORD_DATA_SIZE * 20))
+
+    def send_many():
+        for program in range(50):
+            output.send(mido.Message("program_change", program=program))
+        output.send(sysex)
+
+    senders = [threading.Thread(target=send_many) for _ in range(4)]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    output.close()
+
+    assert output.sent == 4 * 51
+
+
+def test_isolated_output_reports_open_errors():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.isolated_output = True
+    midi_handler.transport = RawMidiTransport()
+    try:
+        midi_handler.open_output("/nonexistent/midiC9D9")
+    except IOError as e:
+        assert "midiC9D9" in str(e)
+    else:
+        raise AssertionError("expected an IOError")
@@ -0,0 +1,108 @@
+import os
+import mido
+import pytest
+from unittest.mock import MagicMock
+from midi.midi_handler import MidiHandler
+from midi.session_journal import (
+    MARK,
+    RECEIVED,
+    RECORD,
+    HEADER,
+    SENT,
+    JournalError,
+    JournalReader,
+    SessionJournal,
+    replay,
+)
+
+
+def test_journal_round_trip(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    journal = SessionJournal(journal_path)
+    journal.mark("profile: Sample")
+    journal.record_message(SENT, mido.Message("program_change", program=11), "clean")
+    journal.record_message(
+        RECEIVED, mido.Message("control_change", control=102, value=1)
+    )
+    journal.close()
+
+    with JournalReader(journal_path) as reader:
+        entries = list(reader.entries())
+
+    assert [(entry.direction, entry.tag, entry.data) for entry in entries] == [
+        (MARK, "profile: Sample", b""),
+        (SENT, "clean", bytes([0xC0, 11])),
+        (RECEIVED, None, bytes([0xB0, 102, 1])),
+    ]
+    assert entries[0].timestamp_ns <= entries[1].timestamp_ns <= entries[2].timestamp_ns
+
+
+def test_journal_stores_long_messages_across_records(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    sysex = mido.Message("sysex", data=list(range(30)))
+    journal = SessionJournal(journal_path)
+    journal.record_message(RECEIVED, sysex)
+    journal.close()
+
+    with JournalReader(journal_path) as reader:
+        assert [message for _, message in reader.messages()] == [sysex]
+
+
+def test_journal_grows_past_capacity(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    journal = SessionJournal(journal_path, capacity=2)
+    for program in range(10):
+        journal.record_message(SENT, mido.Message("program_change", program=program))
+    journal.close()
+
+    assert os.path.getsize(journal_path) == HEADER.size + 10 * RECORD.size
+    with JournalReader(journal_path) as reader:
+        programs = [message.program for _, message in reader.messages(SENT)]
+    assert programs == list(range(10))
+
+
+def test_journal_reader_rejects_other_files(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "profile.json")
+    with open(journal_path, "wb") as journal_file:
+        journal_file.write(b"{}" * 20)
+
+    with pytest.raises(JournalError):
+        JournalReader(journal_path)
+
+
+def test_replay_accelerated(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    journal = SessionJournal(journal_path)
+    journal.record_message(SENT, mido.Message("program_change", program=1))
+    journal.record_message(RECEIVED, mido.Message("program_change", program=2))
+    journal.record_message(SENT, mido.Message("program_change", program=3))
+    journal.close()
+
+    port = MagicMock()
+    sleep = MagicMock()
+    with JournalReader(journal_path) as reader:
+        sent = replay(reader, port, speed=0, sleep=sleep)
+
+    assert sent == 2
+    assert not sleep.called
+    assert [c.args[0].program for c in port.send.call_args_list] == [1, 3]
+
+
+def test_midi_handler_records_sent_and_received(tmpdir):
+    journal_path = os.path.join(str(tmpdir), "session.masj")
+    window_mock = MagicMock()
+    midi_handler = MidiHandler(window_mock, [])
+    midi_handler.midi_output = MagicMock()
+    midi_handler.midi_channel = 0
+    midi_handler.journal = SessionJournal(journal_path)
+
+    midi_handler.compile_send(5, None, None, "lead")()
+    midi_handler.handle_midi_message(mido.Message("program_change", program=7))
+    midi_handler.journal.close()
+
+    with JournalReader(journal_path) as reader:
+        entries = list(reader.entries())
+    assert [(entry.direction, entry.tag) for entry in entries] == [
+        (SENT, "lead"),
+        (RECEIVED, None),
+    ]
@@ -0,0 +1,46 @@
+from gui.stall_watchdog import StallWatchdog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def busy_handler(watchdog):
+    watchdog.check()
+
+
+def test_stall_is_reported_once_with_main_thread_stack():
+    clock = FakeClock()
+    watchdog = StallWatchdog(threshold=0.25, clock=clock)
+
+    clock.now = 0.1
+    watchdog.check()
+    assert watchdog.stall_started is None
+
+    clock.now = 0.5
+    busy_handler(watchdog)
+    assert watchdog.stall_started == 0.0
+    assert "busy_handler" in watchdog.stall_stack
+
+    clock.now = 0.9
+    watchdog.check()
+    watchdog.beat()
+
+    assert watchdog.stats() == {"stalls": 1, "longest_stall_ms": 900.0}
+    duration, stack = watchdog.stalls[0]
+    assert "busy_handler" in stack
+    assert watchdog.stall_started is None
+
+
+def test_regular_heartbeats_do_not_stall():
+    clock = FakeClock()
+    watchdog = StallWatchdog(threshold=0.25, clock=clock)
+    for _ in range(10):
+        clock.now += 0.05
+        watchdog.beat()
+        watchdog.check()
+    assert watchdog.stats()["stalls"] == 0
@@ -0,0 +1,76 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from PyQt5.QtCore import QCoreApplication
+from gui.status_reporter import StatusReporter
+
+
+def process_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    QCoreApplication.processEvents()
+    return condition()
+
+
+def shown_messages(target):
+    return [call[0][0] for call in target.showMessage.call_args_list]
+
+
+def message_count(text):
+    # "3 messages, last: ..." stands for three posts, a plain message for one
+    if " messages, last: " in text:
+        return int(text.split(" ", 1)[0])
+    return 1
+
+
+def test_last_message_wins_with_count_prefix(qt_application):
+    target = MagicMock(spec=["showMessage", "clearMessage"])
+    reporter = StatusReporter(target, max_rate=10)
+    for message in ("first", "second", "third"):
+        reporter.post(message)
+
+    assert process_until(lambda: reporter.repaints == 1)
+    assert shown_messages(target) == ["3 messages, last: third"]
+    assert target.showMessage.call_args[0][1] == 2000
+
+    reporter.post("alone", 500)
+    assert process_until(lambda: reporter.repaints == 2)
+    target.showMessage.assert_called_with("alone", 500)
+
+
+def test_posts_from_threads_coalesce_into_few_repaints(qt_application):
+    target = MagicMock(spec=["showMessage", "clearMessage"])
+    reporter = StatusReporter(target, max_rate=10)
+
+    def post(thread_index):
+        for number in range(200):
+            reporter.post(f"thread {thread_index} message {number}")
+            time.sleep(0.0005)
+
+    threads = [threading.Thread(target=post, args=(index,)) for index in range(4)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    assert process_until(
+        lambda: not any(thread.is_alive() for thread in threads)
+        and not reporter.scheduled
+    )
+    elapsed = time.monotonic() - started
+
+    messages = shown_messages(target)
+    assert sum(message_count(message) for message in messages) == 800
+    assert reporter.stats() == {"posted": 800, "repaints": len(messages)}
+    # At most one repaint per interval, plus the one that starts the first
+    assert len(messages) <= elapsed * 10 + 2
+    assert messages[-1].endswith("message 199")
+
+
+def test_label_target_is_cleared_after_timeout(qt_application):
+    target = MagicMock(spec=["setText", "clear"])
+    reporter = StatusReporter(target, timeout=10)
+    reporter.post("recording")
+
+    assert process_until(lambda: target.clear.called)
+    target.setText.assert_called_once_with("recording")
@@ -0,0 +1,175 @@
+import os
+import mido
+import pytest
+from unittest.mock import MagicMock
+from common.profile_schema import validate_button
+from midi.midi_handler import MidiHandler
+from midi.sysex_librarian import (
+    LibrarianRecorder,
+    PatchLibrary,
+    SysexAssembler,
+    main,
+)
+from midi.sysex_transfer import DONE
+
+
+def sysex(*data):
+    return mido.Message("sysex", data=data)
+
+
+def dump(value, messages=3, length=100):
+    return b"".join(bytes(sysex(*([value] * length)).bytes()) for _ in range(messages))
+
+
+class BytePort:
+    def __init__(self):
+        self.name = "bytes"
+        self.written = bytearray()
+
+    def send_bytes(self, data):
+        self.written += data
+
+    def close(self):
+        pass
+
+
+def test_library_stores_identical_patches_once(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    first, new = library.store(dump(1), "clean", "amp")
+    second, second_new = library.store(dump(1), "clean backup", "amp")
+    other, _ = library.store(dump(2), "lead", "amp")
+
+    assert first == second and new and not second_new
+    assert len(library) == 2
+    assert library.entry("clean backup")["names"] == ["clean", "clean backup"]
+    assert library.entry(first)["messages"] == 3
+    assert library.load("lead") == dump(2)
+    stats = library.stats()
+    assert stats["size"] == 2 * len(dump(1))
+    assert stats["stored_size"] < stats["size"] / 4
+    assert len(os.listdir(library.objects_directory)) <= 2
+
+
+def test_library_manifest_is_reloaded(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    digest, _ = library.store(dump(1), "clean", "amp")
+    library.save_manifest()
+
+    reloaded = PatchLibrary(str(tmpdir))
+    assert reloaded.resolve("clean") == digest
+    assert reloaded.resolve(digest[:8]) == digest
+    assert reloaded.list("amp")[0][0] == digest
+    assert reloaded.list("modeler") == []
+
+
+def test_library_resolve_errors(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    library.store(dump(1), "clean")
+    with pytest.raises(KeyError):
+        library.resolve("missing")
+    with pytest.raises(KeyError):
+        library.resolve("")
+
+
+def test_assembler_groups_messages_until_a_gap():
+    assembler = SysexAssembler(gap=0.5)
+    assert assembler.feed(sysex(1), 0.0) is None
+    assert assembler.feed(mido.Message("clock"), 0.1) is None
+    assert assembler.feed(sysex(2), 0.2) is None
+    completed = assembler.feed(sysex(3), 1.0)
+
+    assert completed == bytes([0xF0, 1, 0xF7, 0xF0, 2, 0xF7])
+    assert assembler.flush(1.2) is None
+    assert assembler.flush(1.6) == bytes([0xF0, 3, 0xF7])
+    assert assembler.flush() is None
+
+
+def test_recorder_stores_received_dumps(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    now = [0.0]
+    stored = MagicMock()
+    recorder = LibrarianRecorder(
+        library, "amp", gap=0.5, on_stored=stored, clock=lambda: now[0]
+    )
+    recorder.start()
+    for value in (1, 1, 2):
+        for message in mido.parse_all(dump(value)):
+            recorder.post(message)
+        now[0] += 1.0
+    summary = recorder.stop()
+
+    assert summary == {"dumps": 3, "new": 2, "duplicates": 1}
+    assert stored.call_count == 3
+    assert PatchLibrary(str(tmpdir)).stats()["patches"] == 2
+
+
+def test_recorder_saves_the_manifest_after_each_dump(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    now = [0.0]
+    on_disk = []
+    recorder = LibrarianRecorder(
+        library,
+        "amp",
+        on_stored=lambda *args: on_disk.append(len(PatchLibrary(str(tmpdir)))),
+        clock=lambda: now[0],
+    )
+    recorder.start()
+    for value in (1, 2):
+        for message in mido.parse_all(dump(value)):
+            recorder.post(message)
+        now[0] += 1.0
+    recorder.stop()
+
+    assert on_disk == [1, 2]
+
+
+def test_midi_handler_sends_patches_from_the_library(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    library.store(dump(5), "lead")
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = BytePort()
+    midi_handler.sysex_pause = 0
+
+    transfer = midi_handler.send_patch(library, "lead")
+
+    assert transfer.wait(5.0) == DONE
+    assert bytes(midi_handler.midi_output.written) == dump(5)
+    assert midi_handler.send_patch(library, "missing") is None
+
+
+def test_midi_handler_librarian_listens_on_the_feedback_input(tmpdir):
+    library = PatchLibrary(str(tmpdir))
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = MagicMock()
+    midi_handler.feedback_input = MagicMock()
+    midi_handler.feedback_input_name = "amp in"
+
+    midi_handler.start_librarian(library, gap=0.05, request=bytes([0xF0, 1, 0xF7]))
+    midi_handler.handle_feedback_message(sysex(1, 2, 3))
+    summary = midi_handler.stop_librarian()
+
+    assert midi_handler.midi_output.send.call_args[0][0].data == (1,)
+    assert summary["dumps"] == 1
+    assert midi_handler.message_listeners == []
+    assert midi_handler.stop_librarian() is None
+
+
+def test_validate_button_patch():
+    assert validate_button({"patch": "lead"}, 0) == []
+    assert validate_button({"patch": ""}, 0) == [
+        "buttons[0].patch must be a patch name or hash"
+    ]
+
+
+def test_cli_lists_and_exports(tmpdir, capsys):
+    library = PatchLibrary(str(tmpdir))
+    library.store(dump(7), "crunch", "amp")
+    library.save_manifest()
+    path = os.path.join(tmpdir, "crunch.syx")
+
+    main([str(tmpdir), "list"])
+    main([str(tmpdir), "export", "crunch", path])
+
+    assert "crunch" in capsys.readouterr().out
+    with open(path, "rb") as sysex_file:
+        assert sysex_file.read() == dump(7)
@@ -0,0 +1,150 @@
+import os
+import threading
+import pytest
+from unittest.mock import MagicMock
+from midi.midi_handler import MidiHandler
+from midi.output_scheduler import OutputScheduler
+from midi.sysex_transfer import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    SysexTransfer,
+    read_sysex_messages,
+)
+from midi.transports import MemoryPort
+
+
+class BytePort:
+    def __init__(self):
+        self.name = "bytes"
+        self.written = bytearray()
+        self.writes = 0
+
+    def send_bytes(self, data):
+        self.written += data
+        self.writes += 1
+
+    def close(self):
+        pass
+
+
+def write_dump(tmpdir, messages, name="dump.syx"):
+    path = os.path.join(tmpdir, name)
+    with open(path, "wb") as sysex_file:
+        for data in messages:
+            sysex_file.write(bytes([0xF0]) + bytes(data) + bytes([0xF7]))
+    return path
+
+
+def test_read_sysex_messages_across_read_blocks(tmpdir):
+    messages = [[0x7D, index] * 40 for index in range(10)]
+    path = write_dump(tmpdir, messages)
+
+    read = list(read_sysex_messages(path, read_size=7))
+
+    assert len(read) == 10
+    assert read[3] == bytes([0xF0] + messages[3] + [0xF7])
+
+
+def test_read_sysex_messages_rejects_unterminated_messages(tmpdir):
+    path = os.path.join(tmpdir, "broken.syx")
+    with open(path, "wb") as sysex_file:
+        sysex_file.write(bytes([0xF0, 1, 2, 0xF0, 3, 0xF7]))
+    with pytest.raises(ValueError):
+        list(read_sysex_messages(path))
+
+    with open(path, "wb") as sysex_file:
+        sysex_file.write(bytes([0xF0, 1, 2]))
+    with pytest.raises(ValueError):
+        list(read_sysex_messages(path))
+
+
+def test_transfer_streams_chunks_to_byte_ports(tmpdir):
+    path = write_dump(tmpdir, [[1] * 600, [2] * 100])
+    port = BytePort()
+    progress = []
+    finished = MagicMock()
+
+    transfer = SysexTransfer(
+        port, path, 256, 0, lambda sent, total: progress.append((sent, total)), finished
+    )
+    transfer.start()
+
+    assert transfer.wait(5.0) == DONE
+    with open(path, "rb") as sysex_file:
+        assert bytes(port.written) == sysex_file.read()
+    assert port.writes == 4
+    assert progress[-1] == (704, 704)
+    assert transfer.messages_sent == 2
+    finished.assert_called_once_with(DONE, 704, None)
+
+
+def test_transfer_sends_whole_messages_to_message_ports(tmpdir):
+    path = write_dump(tmpdir, [[1] * 600, [2] * 100])
+    port = MemoryPort("memory")
+
+    transfer = SysexTransfer(port, path, 256, 0)
+    transfer.start()
+
+    assert transfer.wait(5.0) == DONE
+    assert [len(message.data) for message in port.messages] == [600, 100]
+
+
+def test_transfer_drains_the_output_scheduler(tmpdir):
+    path = write_dump(tmpdir, [[3] * 10] * 5)
+    port = MemoryPort("memory")
+    scheduler = OutputScheduler(port, bytes_per_second=1000000)
+
+    transfer = SysexTransfer(scheduler, path, 256, 0)
+    transfer.start()
+
+    assert transfer.wait(5.0) == DONE
+    assert len(port.messages) == 5
+    scheduler.close()
+
+
+def test_cancel_terminates_the_partial_message(tmpdir):
+    path = write_dump(tmpdir, [[1] * 1000])
+    port = BytePort()
+    first_chunk = threading.Event()
+    finished = MagicMock()
+
+    def progress(sent, total):
+        first_chunk.set()
+
+    transfer = SysexTransfer(port, path, 100, 10.0, progress, finished)
+    transfer.start()
+    first_chunk.wait(5.0)
+    transfer.cancel()
+
+    assert transfer.wait(5.0) == CANCELLED
+    assert bytes(port.written) == bytes([0xF0] + [1] * 99 + [0xF7])
+    finished.assert_called_once_with(CANCELLED, 100, None)
+
+
+def test_transfer_reports_port_errors(tmpdir):
+    path = write_dump(tmpdir, [[1] * 10])
+    port = MagicMock(spec=["send", "close"])
+    port.send.side_effect = IOError("unplugged")
+    finished = MagicMock()
+
+    transfer = SysexTransfer(port, path, 256, 0, finished=finished)
+    transfer.start()
+
+    assert transfer.wait(5.0) == FAILED
+    finished.assert_called_once_with(FAILED, 0, "unplugged")
+
+
+def test_midi_handler_runs_one_transfer_at_a_time(tmpdir):
+    path = write_dump(tmpdir, [[1] * 1000])
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.midi_output = BytePort()
+    midi_handler.sysex_chunk_size = 100
+    midi_handler.sysex_pause = 10.0
+
+    transfer = midi_handler.send_sysex_file(path)
+    assert midi_handler.send_sysex_file(path) is None
+    midi_handler.cancel_sysex()
+
+    assert transfer.state == CANCELLED
+    assert midi_handler.sysex_transfer is None
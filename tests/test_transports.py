@@ -0,0 +1,110 @@
+import os
+import mido
+from unittest.mock import MagicMock, patch
+from midi.midi_handler import MidiHandler
+from midi.output_scheduler import OutputScheduler
+from midi.transports import (
+    MemoryTransport,
+    MidoTransport,
+    PipeTransport,
+    RawMidiTransport,
+    benchmark_port,
+    fastest_transport,
+    get_transport,
+)
+
+
+def test_get_transport_falls_back_to_mido():
+    assert isinstance(get_transport("pipe"), PipeTransport)
+    assert isinstance(get_transport("carrier-pigeon"), MidoTransport)
+
+
+def test_pipe_transport_loops_back_messages():
+    transport = PipeTransport()
+    output = transport.open("pipe")
+    loopback = transport.open_input("pipe")
+    output.send(mido.Message("program_change", channel=2, program=5))
+    output.send_bytes(bytes([0xB2, 7, 100]))
+
+    received = [loopback.receive(timeout=1.0), loopback.receive(timeout=1.0)]
+
+    assert received[0] == mido.Message("program_change", channel=2, program=5)
+    assert received[1] == mido.Message(
+        "control_change", channel=2, control=7, value=100
+    )
+    assert loopback.poll() is None
+    output.close()
+    loopback.close()
+
+
+def test_pipe_transport_uses_running_status_through_scheduler():
+    transport = PipeTransport()
+    output = OutputScheduler(transport.open("pipe"), bytes_per_second=1000000)
+    loopback = transport.open_input("pipe")
+    for value in range(3):
+        output.send(mido.Message("control_change", control=7, value=value))
+    output.drain()
+    output.close()
+
+    data = os.read(loopback.fd, 64)
+    assert data == bytes([0xB0, 7, 0, 7, 1, 7, 2])
+    loopback.close()
+
+
+def test_rawmidi_transport_names_devices(tmpdir):
+    tmpdir.join("midiC1D0").write("")
+    transport = RawMidiTransport()
+    transport.device_pattern = str(tmpdir.join("midiC*D*"))
+    with patch.object(transport, "card_name", return_value="VirMIDI"):
+        assert transport.devices() == {"VirMIDI 1:0": str(tmpdir.join("midiC1D0"))}
+
+        port = transport.open("VirMIDI 1:0")
+    port.send(mido.Message("program_change", program=9))
+    port.close()
+
+    assert tmpdir.join("midiC1D0").read_binary() == bytes([0xC0, 9])
+
+
+def test_midi_handler_opens_ports_through_its_transport():
+    midi_handler = MidiHandler(MagicMock())
+    midi_handler.transport = MemoryTransport()
+    midi_handler.set_midi_channel(1)
+    midi_handler.set_midi_output("memory")
+
+    midi_handler.send_midi_message(3, None, None)
+
+    port = midi_handler.transport.ports["memory"]
+    assert port.messages == [mido.Message("program_change", channel=1, program=3)]
+    assert midi_handler.get_output() == ["memory"]
+
+
+def test_benchmark_reports_fastest_device_transport():
+    result = benchmark_port(MemoryTransport().open("memory"), count=100)
+    assert result["count"] == 100
+    assert result["p50_us"] <= result["p99_us"] <= result["max_us"]
+
+    results = {
+        "memory": {"p99_us": 0.1},
+        "mido (rtmidi)": {"p99_us": 9.0, "transport": "mido"},
+        "rawmidi (VirMIDI 1:0)": {"p99_us": 3.0, "transport": "rawmidi"},
+    }
+    assert fastest_transport(results) == "rawmidi"
+    assert fastest_transport({"memory": {"p99_us": 0.1}}) is None
+
+
+def test_raw_port_finishes_short_writes():
+    transport = PipeTransport()
+    output = transport.open("pipe")
+    loopback = transport.open_input("pipe")
+    write = os.write
+    message = mido.Message("sysex", data=list(range(10)))
+
+    with patch(
+        "midi.transports.os.write", side_effect=lambda fd, data: write(fd, data[:3])
+    ) as short_write:
+        output.send(message)
+
+    assert short_write.call_count == 4
+    assert os.read(loopback.fd, 64) == bytes(message.bytes())
+    output.close()
+    loopback.close()